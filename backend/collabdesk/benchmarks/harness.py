@@ -0,0 +1,120 @@
+"""
+Latency measurement and baseline comparison for the endpoint benchmarks.
+"""
+
+import json
+import math
+import time
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[rank]
+
+
+def measure(call, iterations, warmup=3):
+    """
+    Time ``call()`` ``iterations`` times after ``warmup`` untimed calls.
+    Returns latency percentiles in milliseconds and throughput in requests
+    per second.
+    """
+    status_codes = set()
+    for _ in range(warmup):
+        call()
+
+    timings = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        response = call()
+        timings.append((time.perf_counter() - start) * 1000)
+        status_codes.add(response.status_code)
+    elapsed = time.perf_counter() - started
+
+    timings.sort()
+    return {
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "p99_ms": round(percentile(timings, 99), 3),
+        "throughput_rps": round(iterations / elapsed, 1),
+        "status_codes": sorted(status_codes),
+    }
+
+
+def time_calls(call, iterations, warmup=1):
+    """Sorted wall-clock timings of ``call()`` in milliseconds"""
+    for _ in range(warmup):
+        call()
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - start) * 1000)
+    return sorted(timings)
+
+
+def load_baseline(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(path, baseline):
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def find_regressions(results, baseline, tolerance, slack_ms):
+    """
+    Return a message per endpoint whose p95 exceeds its baseline by more
+    than ``tolerance`` (a fraction) plus ``slack_ms`` of absolute noise, or
+    that has no baseline to compare against.
+    """
+    regressions = []
+    for name, result in sorted(results.items()):
+        expected = baseline.get(name)
+        if expected is None:
+            regressions.append(f"{name}: no baseline")
+            continue
+        limit = expected["p95_ms"] * (1 + tolerance) + slack_ms
+        if result["p95_ms"] > limit:
+            regressions.append(
+                f"{name}: p95 {result['p95_ms']}ms > {limit:.3f}ms "
+                f"(baseline {expected['p95_ms']}ms)"
+            )
+    return regressions
+
+
+def round_budget(value, step=64 * 1024):
+    """Round a byte budget up to a whole number of ``step``s"""
+    return int(math.ceil(value / step) * step)
+
+
+def format_report(results):
+    header = (
+        f"{'endpoint':<32}{'p50':>10}{'p95':>10}{'p99':>10}{'req/s':>10}"
+        f"{'peak KiB':>10}"
+    )
+    lines = [header, "-" * len(header)]
+    for name, result in sorted(results.items()):
+        lines.append(
+            f"{name:<32}{result['p50_ms']:>10}{result['p95_ms']:>10}"
+            f"{result['p99_ms']:>10}{result['throughput_rps']:>10}"
+            f"{result.get('peak_kb', '-'):>10}"
+        )
+    return "\n".join(lines)
+
+
+def format_table(title, columns, rows):
+    """``rows`` maps a label to one value per entry of ``columns``"""
+    header = f"{title:<32}" + "".join(f"{column:>10}" for column in columns)
+    lines = [header, "-" * len(header)]
+    for name, values in rows.items():
+        lines.append(f"{name:<32}" + "".join(f"{value:>10}" for value in values))
+    return "\n".join(lines)
@@ -0,0 +1,137 @@
+import datetime
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks import synthetic
+from collabdesk import cache
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a deterministic, production-scale dataset of users, profiles, "
+        "workspaces, members, events and event participants."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--prefix", default="synthetic", help="Username prefix for generated users"
+        )
+        parser.add_argument("--users", type=int, default=10000)
+        parser.add_argument("--workspaces", type=int, default=1000)
+        parser.add_argument("--events", type=int, default=1000000)
+        parser.add_argument(
+            "--members-median",
+            type=float,
+            default=12,
+            help="Median members per workspace (log-normal)",
+        )
+        parser.add_argument("--members-sigma", type=float, default=0.8)
+        parser.add_argument("--max-members", type=int, default=500)
+        parser.add_argument(
+            "--activity-alpha",
+            type=float,
+            default=1.2,
+            help="Pareto shape of per-user event counts; lower is more skewed",
+        )
+        parser.add_argument(
+            "--durations",
+            default=synthetic.DEFAULT_DURATIONS,
+            help="Meeting length distribution as minutes:weight pairs",
+        )
+        parser.add_argument("--individual-ratio", type=float, default=0.3)
+        parser.add_argument("--private-ratio", type=float, default=0.2)
+        parser.add_argument(
+            "--max-participants",
+            type=int,
+            default=4,
+            help="Most members a private event is shared with",
+        )
+        parser.add_argument("--days-back", type=int, default=180)
+        parser.add_argument("--days-ahead", type=int, default=180)
+        parser.add_argument(
+            "--anchor",
+            type=datetime.date.fromisoformat,
+            default=datetime.date.today(),
+            help="Date (YYYY-MM-DD) event times are spread around; fix it to "
+            "reproduce a dataset exactly",
+        )
+        parser.add_argument("--batch-size", type=int, default=10000)
+        parser.add_argument(
+            "--copy",
+            dest="use_copy",
+            action="store_true",
+            default=None,
+            help="Load with COPY (default on PostgreSQL)",
+        )
+        parser.add_argument("--no-copy", dest="use_copy", action="store_false")
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        existing = User.objects.using(options["database"]).filter(
+            username__startswith=f"{options['prefix']}-"
+        )
+        if existing.exists():
+            raise CommandError(
+                f"Users with prefix '{options['prefix']}' already exist; "
+                "choose another --prefix"
+            )
+
+        config = synthetic.Options(**options)
+        anchor = datetime.datetime.combine(
+            options["anchor"], datetime.time(), tzinfo=datetime.timezone.utc
+        )
+        generator = synthetic.Generator(config, random.Random(config.seed), anchor)
+        loader = synthetic.Loader(
+            options["batch_size"], options["use_copy"], options["database"]
+        )
+        mode = "COPY" if loader.use_copy else "bulk_create"
+        self.stdout.write(f"Loading with {mode} in batches of {loader.batch_size}")
+
+        user_ids = self.timed("users", lambda: loader.load_users(generator))
+        self.timed(
+            "profiles",
+            lambda: loader.load(synthetic.Profile, generator.profiles(user_ids)),
+        )
+        workspaces = list(generator.workspaces(user_ids))
+        self.timed("workspaces", lambda: loader.load(synthetic.Workspace, workspaces))
+        members, by_user = generator.memberships(workspaces, user_ids)
+        self.timed("members", lambda: loader.load(synthetic.WorkspaceMember, members))
+        private = []
+        self.timed(
+            "events",
+            lambda: loader.load(
+                synthetic.Event,
+                self.collect_private(generator.events(by_user), private),
+            ),
+        )
+        by_workspace = synthetic.members_by_workspace(members)
+        self.timed(
+            "participants",
+            lambda: loader.load(
+                synthetic.EventParticipant,
+                generator.participants(private, by_workspace),
+            ),
+        )
+
+        # Bulk loads bypass the model signals that version the response cache
+        cache.bump("events", "workspaces", "profiles")
+
+    def collect_private(self, events, private):
+        """Pass ``events`` through, keeping the private ones for participants"""
+        for event in events:
+            if event.is_private:
+                private.append(event)
+            yield event
+
+    def timed(self, label, load):
+        start = time.perf_counter()
+        result = load()
+        elapsed = time.perf_counter() - start
+        count = result if isinstance(result, int) else len(result)
+        self.stdout.write(f"{label}: {count} rows in {elapsed:.1f}s")
+        return result
@@ -0,0 +1,114 @@
+"""
+Synthetic data for benchmarks.
+
+``seed(volumes, rng)`` bulk-loads users, profiles, workspaces, members,
+events, event participants, board tasks and unavailability blocks with the synthetic data
+generator (benchmarks/synthetic.py), sized by per-workspace volumes. Every
+workspace has the same number of members, and events fall in the next few
+days. Everything is derived from the random generator so a given seed always
+produces the same dataset.
+"""
+
+import random
+
+from events.models import Event, EventParticipant, Unavailability
+from profiles.models import Profile
+from tasks.models import Task
+from workspaces.models import Workspace, WorkspaceMember
+from . import synthetic
+
+BATCH_SIZE = 2000
+# Events start between now and this many days ahead
+DAYS_AHEAD = 4
+
+# Named dataset sizes selectable with BENCHMARK_SCALE
+SCALES = {
+    "small": {
+        "users": 200,
+        "workspaces": 20,
+        "members_per_workspace": 10,
+        "events_per_workspace": 50,
+        "tasks_per_workspace": 50,
+        "unavailability_per_user": 4,
+    },
+    "medium": {
+        "users": 2000,
+        "workspaces": 200,
+        "members_per_workspace": 20,
+        "events_per_workspace": 100,
+        "tasks_per_workspace": 100,
+        "unavailability_per_user": 4,
+    },
+    "large": {
+        "users": 20000,
+        "workspaces": 1000,
+        "members_per_workspace": 30,
+        "events_per_workspace": 500,
+        "tasks_per_workspace": 200,
+        "unavailability_per_user": 4,
+    },
+}
+
+
+def options(volumes, prefix):
+    """Generator options for per-workspace ``volumes``"""
+    return synthetic.Options(
+        prefix=prefix,
+        users=volumes["users"],
+        workspaces=volumes["workspaces"],
+        events=volumes["workspaces"] * volumes["events_per_workspace"],
+        # A zero spread makes every team exactly this size
+        members_median=volumes["members_per_workspace"],
+        members_sigma=0,
+        max_members=volumes["members_per_workspace"],
+        days_back=0,
+        days_ahead=DAYS_AHEAD,
+        tasks_per_workspace=volumes["tasks_per_workspace"],
+        unavailability_per_user=volumes["unavailability_per_user"],
+    )
+
+
+def seed(volumes, rng=None, prefix="bench"):
+    """
+    Load a dataset of the given volumes and return a summary with sample
+    ids the benchmark can address endpoints with, and the username of a
+    member of that workspace to send them as. Use a distinct ``prefix`` to
+    load several datasets side by side.
+    """
+    generator = synthetic.Generator(options(volumes, prefix), rng or random.Random(0))
+    loader = synthetic.Loader(BATCH_SIZE)
+
+    user_ids = loader.load_users(generator)
+    loader.load(Profile, generator.profiles(user_ids))
+    workspaces = list(generator.workspaces(user_ids))
+    loader.load(Workspace, workspaces)
+    members, by_user = generator.memberships(workspaces, user_ids)
+    loader.load(WorkspaceMember, members)
+    by_workspace = synthetic.members_by_workspace(members)
+    events = list(generator.events(by_user))
+    loader.load(Event, events)
+    participants = list(generator.participants(events, by_workspace))
+    loader.load(EventParticipant, participants)
+    loader.load(Task, generator.tasks(workspaces, by_workspace))
+    loader.load(Unavailability, generator.unavailability(user_ids))
+
+    # Events land in their creators' workspaces at random; address one that has some
+    event = next(event for event in events if not event.is_private)
+    workspace_id = event.workspace_id_id
+    # Act as the creator of a shared event there, to list its participants
+    shared_in = {e.event_id: e.workspace_id_id for e in events if e.is_private}
+    shared = next(
+        (p for p in participants if shared_in[p.event_id] == workspace_id), None
+    )
+    member_id = shared.added_by_id if shared else by_workspace[workspace_id][0]
+    return {
+        "user_ids": user_ids,
+        "username": f"{prefix}-{user_ids.index(member_id)}",
+        "workspace_id": workspace_id,
+        "member_id": member_id,
+        "event_id": event.event_id,
+        "shared_event_id": shared.event_id if shared else event.event_id,
+        "profile_id": Profile.objects.filter(user_id=user_ids[0])
+        .values_list("profile_id", flat=True)
+        .first(),
+    }
@@ -0,0 +1,381 @@
+"""
+Deterministic production-scale data generation.
+
+Everything is drawn from one ``random.Random(seed)`` so the same options
+always produce identical rows (including primary keys). Rows are streamed in
+batches and loaded with ``bulk_create`` or, on PostgreSQL, ``COPY``. Both
+the ``generate_synthetic_data`` command and the benchmark datasets
+(benchmarks/seed.py) are built here.
+
+Times follow ``TIME_ZONE``, so working hours are local ones, and a creator's
+INDIVIDUAL events never overlap each other, as the API refuses such a
+booking.
+"""
+
+import datetime
+import io
+import itertools
+import json
+import math
+import uuid
+from bisect import bisect_left
+
+from django.contrib.auth import get_user_model
+from django.db import connections, models, transaction
+from django.utils import timezone
+
+from events import availability
+from events.models import Event, EventParticipant, Unavailability
+from profiles.models import Profile
+from tasks import ranks
+from tasks.models import Task
+from workspaces.models import Workspace, WorkspaceMember
+
+# Weekday working hours dominate; a little early/late and weekend activity
+HOUR_WEIGHTS = {h: 1 for h in range(7, 21)}
+HOUR_WEIGHTS.update({h: 6 for h in range(9, 17)})
+WEEKEND_KEEP_PROBABILITY = 0.2
+# New start times tried for an INDIVIDUAL event clashing with its creator's
+# others before it is made a GROUP event instead
+SHIFT_ATTEMPTS = 10
+
+DEFAULT_DURATIONS = "15:0.1,30:0.35,45:0.1,60:0.3,90:0.1,120:0.05"
+
+
+def parse_weights(spec):
+    """Parse "30:0.4,60:0.6" into ([30, 60], [0.4, 0.6])"""
+    values, weights = [], []
+    for part in spec.split(","):
+        value, weight = part.split(":")
+        values.append(int(value))
+        weights.append(float(weight))
+    return values, weights
+
+
+def random_uuid(rng):
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def members_by_workspace(members):
+    """{workspace_id: [user_id, ...]} for WorkspaceMember instances"""
+    by_workspace = {}
+    for member in members:
+        by_workspace.setdefault(member.workspace_id, []).append(member.user_id)
+    return by_workspace
+
+
+class Bookings:
+    """A creator's INDIVIDUAL events as sorted, disjoint [start, end) minutes"""
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+
+    def book(self, start, end):
+        """Add [start, end) unless it overlaps a booking; returns whether added"""
+        start, end = _minutes(start), _minutes(end)
+        i = bisect_left(self.starts, start)
+        if i and self.ends[i - 1] > start:
+            return False
+        if i < len(self.starts) and self.starts[i] < end:
+            return False
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        return True
+
+
+def _minutes(moment):
+    return int(moment.timestamp()) // 60
+
+
+class Options:
+    """Volumes and distribution parameters for one generation run"""
+
+    def __init__(self, **kwargs):
+        self.seed = kwargs.get("seed", 0)
+        self.prefix = kwargs.get("prefix", "synthetic")
+        self.users = kwargs.get("users", 10000)
+        self.workspaces = kwargs.get("workspaces", 1000)
+        self.events = kwargs.get("events", 1000000)
+        self.members_median = kwargs.get("members_median", 12)
+        self.members_sigma = kwargs.get("members_sigma", 0.8)
+        self.max_members = kwargs.get("max_members", 500)
+        self.activity_alpha = kwargs.get("activity_alpha", 1.2)
+        self.durations = parse_weights(kwargs.get("durations", DEFAULT_DURATIONS))
+        self.individual_ratio = kwargs.get("individual_ratio", 0.3)
+        self.private_ratio = kwargs.get("private_ratio", 0.2)
+        self.max_participants = kwargs.get("max_participants", 4)
+        self.days_back = kwargs.get("days_back", 180)
+        self.days_ahead = kwargs.get("days_ahead", 180)
+        self.tasks_per_workspace = kwargs.get("tasks_per_workspace", 0)
+        self.unavailability_per_user = kwargs.get("unavailability_per_user", 0)
+
+
+class Generator:
+    """Produces unsaved model instances for every table, in dependency order"""
+
+    def __init__(self, options, rng, now=None):
+        self.options = options
+        self.rng = rng
+        self.now = timezone.localtime(now or timezone.now()).replace(
+            minute=0, second=0, microsecond=0
+        )
+        self.hours, self.hour_weights = zip(*sorted(HOUR_WEIGHTS.items()))
+
+    def users(self):
+        User = get_user_model()
+        for i in range(self.options.users):
+            name = f"{self.options.prefix}-{i}"
+            yield User(username=name, email=f"{name}@example.com")
+
+    def profiles(self, user_ids):
+        for user_id in user_ids:
+            yield Profile(
+                profile_id=random_uuid(self.rng),
+                user_id_id=user_id,
+                full_name=f"User {user_id}",
+                bio="Synthetic user",
+                created_at=self.now,
+            )
+
+    def workspaces(self, user_ids):
+        for i in range(self.options.workspaces):
+            yield Workspace(
+                workspace_id=random_uuid(self.rng),
+                name=f"{self.options.prefix} workspace {i}",
+                created_by_id=self.rng.choice(user_ids),
+                created_at=self.now,
+            )
+
+    def member_count(self, population):
+        """Log-normal team sizes around the configured median"""
+        mu = math.log(self.options.members_median)
+        count = round(self.rng.lognormvariate(mu, self.options.members_sigma))
+        return max(1, min(count, self.options.max_members, population))
+
+    def memberships(self, workspaces, user_ids):
+        """Returns (members, {user_id: [workspace_id, ...]})"""
+        members, by_user = [], {}
+        for workspace in workspaces:
+            chosen = set(self.rng.sample(user_ids, self.member_count(len(user_ids))))
+            chosen.add(workspace.created_by_id)
+            for user_id in sorted(chosen):
+                members.append(
+                    WorkspaceMember(
+                        id=random_uuid(self.rng),
+                        workspace_id=workspace.workspace_id,
+                        user_id=user_id,
+                        joined_at=self.now,
+                    )
+                )
+                by_user.setdefault(user_id, []).append(workspace.workspace_id)
+        return members, by_user
+
+    def start_time(self):
+        while True:
+            day = self.rng.randrange(-self.options.days_back, self.options.days_ahead)
+            date = self.now + datetime.timedelta(days=day)
+            if date.weekday() < 5 or self.rng.random() < WEEKEND_KEEP_PROBABILITY:
+                break
+        hour = self.rng.choices(self.hours, self.hour_weights)[0]
+        return date.replace(hour=hour, minute=15 * self.rng.randrange(4))
+
+    def events(self, by_user):
+        """
+        Heavy-tailed activity: each user gets a Pareto weight and events are
+        assigned proportionally, then placed in one of the user's workspaces.
+        An INDIVIDUAL event clashing with its creator's earlier ones moves to
+        another time, or becomes a GROUP event after ``SHIFT_ATTEMPTS``.
+        """
+        user_ids = sorted(by_user)
+        weights = [
+            self.rng.paretovariate(self.options.activity_alpha) for _ in user_ids
+        ]
+        cum_weights = list(itertools.accumulate(weights))
+        durations, duration_weights = self.options.durations
+        bookings = {}
+
+        for i in range(self.options.events):
+            user_id = self.rng.choices(user_ids, cum_weights=cum_weights)[0]
+            start = self.start_time()
+            length = datetime.timedelta(
+                minutes=self.rng.choices(durations, duration_weights)[0]
+            )
+            individual = self.rng.random() < self.options.individual_ratio
+            if individual:
+                booked = bookings.setdefault(user_id, Bookings())
+                for _ in range(SHIFT_ATTEMPTS):
+                    if booked.book(start, start + length):
+                        break
+                    start = self.start_time()
+                else:
+                    individual = False
+            private = self.rng.random() < self.options.private_ratio
+            created = start - datetime.timedelta(days=self.rng.randrange(1, 30))
+            yield Event(
+                event_id=random_uuid(self.rng),
+                title=f"Meeting {i}",
+                description="Synthetic event",
+                start_time=start,
+                end_time=start + length,
+                event_type=(
+                    Event.EventType.INDIVIDUAL if individual else Event.EventType.GROUP
+                ),
+                location="Room",
+                is_private=private,
+                created_by_id=user_id,
+                workspace_id_id=self.rng.choice(by_user[user_id]),
+                created_at=created,
+                updated_at=created,
+            )
+
+    def participants(self, events, members):
+        """
+        Share each private event with up to ``max_participants`` other members
+        of its workspace; ``members`` maps workspace ids to member user ids.
+        """
+        for event in events:
+            if not event.is_private:
+                continue
+            others = [
+                user_id
+                for user_id in members[event.workspace_id_id]
+                if user_id != event.created_by_id
+            ]
+            count = self.rng.randint(0, min(self.options.max_participants, len(others)))
+            for user_id in self.rng.sample(others, count):
+                yield EventParticipant(
+                    id=random_uuid(self.rng),
+                    event_id=event.event_id,
+                    user_id=user_id,
+                    added_by_id=event.created_by_id,
+                    added_at=event.created_at,
+                )
+
+    def tasks(self, workspaces, members):
+        """
+        ``tasks_per_workspace`` board tasks per workspace, cycling through
+        the status columns with evenly spread ranks.
+        """
+        statuses = Task.Status.values
+        column_ranks = ranks.spread(self.options.tasks_per_workspace)
+        for workspace in workspaces:
+            for i in range(self.options.tasks_per_workspace):
+                yield Task(
+                    task_id=random_uuid(self.rng),
+                    workspace_id=workspace.workspace_id,
+                    name=f"Task {i}",
+                    priority=self.rng.choice(Task.Priority.values),
+                    tags=["synthetic"],
+                    status=statuses[i % len(statuses)],
+                    rank=column_ranks[i],
+                    created_by_id=self.rng.choice(members[workspace.workspace_id]),
+                    created_at=self.now,
+                )
+
+    def unavailability(self, user_ids):
+        """
+        ``unavailability_per_user`` one-hour blocks per user, alternately
+        one-off and repeating weekly forever
+        """
+        for user_id in user_ids:
+            for i in range(self.options.unavailability_per_user):
+                start = self.start_time()
+                block = Unavailability(
+                    unavailability_id=random_uuid(self.rng),
+                    user_id=user_id,
+                    reason="Synthetic block",
+                    start_time=start,
+                    end_time=start + datetime.timedelta(hours=1),
+                    recurrence=(
+                        Unavailability.Recurrence.WEEKLY
+                        if i % 2
+                        else Unavailability.Recurrence.NONE
+                    ),
+                    created_at=self.now,
+                )
+                # Bulk loads skip Unavailability.save()
+                block.series_end = availability.series_end(block)
+                yield block
+
+
+def _copy_value(value):
+    if value is None:
+        return "\\N"
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+class Loader:
+    """Writes model instances in batches with bulk_create or COPY"""
+
+    def __init__(self, batch_size=10000, use_copy=None, using="default"):
+        self.using = using
+        self.connection = connections[using]
+        self.batch_size = batch_size
+        if use_copy is None:
+            use_copy = self.connection.vendor == "postgresql"
+        self.use_copy = use_copy
+
+    def load_users(self, generator):
+        """
+        Users go through bulk_create so the database assigns their ids.
+        Returns the ids in creation order.
+        """
+        User = get_user_model()
+        User.objects.using(self.using).bulk_create(
+            generator.users(), batch_size=self.batch_size
+        )
+        return list(
+            User.objects.using(self.using)
+            .filter(username__startswith=f"{generator.options.prefix}-")
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+
+    def load(self, model, instances):
+        count = 0
+        for batch in batched(instances, self.batch_size):
+            with transaction.atomic(using=self.using):
+                if self.use_copy:
+                    self.copy(model, batch)
+                else:
+                    model.objects.using(self.using).bulk_create(batch)
+            count += len(batch)
+        return count
+
+    def _copy_prep(self, field, value):
+        # The driver's JSON adapter has no CSV text form
+        if isinstance(field, models.JSONField):
+            return None if value is None else json.dumps(value, cls=field.encoder)
+        return field.get_db_prep_save(value, self.connection)
+
+    def copy(self, model, batch):
+        # Auto-increment keys are left to the database
+        fields = [
+            f
+            for f in model._meta.concrete_fields
+            if not (f.primary_key and getattr(batch[0], f.attname) is None)
+        ]
+        buffer = io.StringIO()
+        for obj in batch:
+            # pre_save fills auto_now fields, as an INSERT would
+            values = (self._copy_prep(f, f.pre_save(obj, True)) for f in fields)
+            buffer.write(",".join(_copy_value(v) for v in values) + "\n")
+        buffer.seek(0)
+
+        columns = ", ".join(self.connection.ops.quote_name(f.column) for f in fields)
+        table = self.connection.ops.quote_name(model._meta.db_table)
+        sql = f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+        with self.connection.cursor() as cursor:
+            raw = cursor.cursor
+            if hasattr(raw, "copy_expert"):  # psycopg2
+                raw.copy_expert(sql, buffer)
+            else:  # psycopg 3
+                with raw.copy(sql) as copy:
+                    copy.write(buffer.getvalue())
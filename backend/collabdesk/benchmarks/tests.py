@@ -0,0 +1,555 @@
+"""
+Endpoint latency benchmarks. Skipped unless RUN_BENCHMARKS=1:
+
+    RUN_BENCHMARKS=1 BENCHMARK_SCALE=small python manage.py test benchmarks
+
+Set TEST_DB_ENGINE=postgresql (plus TEST_DB_NAME, TEST_DB_USER, ...) to run
+against a local Postgres instead of SQLite, BENCHMARK_UPDATE_BASELINE=1 to
+record the current numbers as the baseline, and BENCHMARK_OUTPUT=<path> to
+keep the raw results.
+"""
+
+import datetime
+import io
+import json
+import os
+import random
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.core import signals
+from django.db import connection, connections
+from django.db.models import Count
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from collabdesk import compression, database, memory, profiling
+from collabdesk.renderers import ORJSONRenderer
+from collabdesk.auth import Auth0TokenValidator
+from events import visibility
+from events.models import Event, EventParticipant
+from events.serializers import EventSerializer
+from profiles.models import Profile
+from workspaces.models import Workspace, WorkspaceMember
+from . import harness, seed, synthetic
+
+RUN_BENCHMARKS = os.getenv("RUN_BENCHMARKS") == "1"
+SCALE = os.getenv("BENCHMARK_SCALE", "small")
+ITERATIONS = int(os.getenv("BENCHMARK_ITERATIONS", "30"))
+TOLERANCE = float(os.getenv("BENCHMARK_TOLERANCE", "0.5"))
+SLACK_MS = float(os.getenv("BENCHMARK_SLACK_MS", "2"))
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+QUERY_BUDGETS_PATH = Path(__file__).with_name("query_budgets.json")
+MEMORY_BUDGETS_PATH = Path(__file__).with_name("memory_budgets.json")
+# Headroom over measured peaks when regenerating memory budgets
+MEMORY_BUDGET_HEADROOM = 1.5
+
+
+MEMORY_HEADER = memory.MEMORY_HEADER
+
+
+def stub_validate_token(self, token):
+    """Skip the JWKS fetch and signature check; the token is the username"""
+    return {"sub": token, "email": f"{token}@example.com"}
+
+
+class EndpointClientMixin:
+    """Stubbed-auth client calls for every API endpoint of a seeded dataset"""
+
+    def setUp(self):
+        patcher = mock.patch.object(
+            Auth0TokenValidator, "validate_token", stub_validate_token
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.auth = {"HTTP_AUTHORIZATION": "Bearer bench-0"}
+
+    def get(self, path, params=None):
+        return lambda: self.client.get(path, params, **self.auth)
+
+    def post(self, path, payload):
+        return lambda: self.client.post(
+            path, json.dumps(payload), content_type="application/json", **self.auth
+        )
+
+    def new_event_payload(self, dataset):
+        start = timezone.now() + datetime.timedelta(days=400)
+        payload = {
+            "title": "Benchmark",
+            "start_time": start.isoformat(),
+            "end_time": (start + datetime.timedelta(hours=1)).isoformat(),
+            "event_type": "GROUP",
+            "created_by": dataset["member_id"],
+            "workspace_id": str(dataset["workspace_id"]),
+        }
+        return payload
+
+    def endpoints(self, dataset):
+        # Endpoints limited to members are called as one
+        self.auth["HTTP_AUTHORIZATION"] = f"Bearer {dataset['username']}"
+        workspace_id = str(dataset["workspace_id"])
+        user_ids = ",".join(str(i) for i in dataset["user_ids"][:100])
+        now = timezone.now()
+        window = {
+            "start": now.isoformat(),
+            "end": (now + datetime.timedelta(days=seed.DAYS_AHEAD)).isoformat(),
+        }
+        return {
+            "events-list": self.get("/api/events/"),
+            "events-list-workspace": self.get(
+                "/api/events/", {"workspace_id": workspace_id}
+            ),
+            "events-detail": self.get(f"/api/events/{dataset['event_id']}/"),
+            "events-create": self.post("/api/events/", self.new_event_payload(dataset)),
+            "profiles-list": self.get("/api/profiles/"),
+            "profiles-detail": self.get(f"/api/profiles/{dataset['profile_id']}/"),
+            "profiles-by-user-ids": self.get("/api/profiles/", {"user_ids": user_ids}),
+            "profiles-batch": self.post(
+                "/api/profiles/batch/", {"user_ids": dataset["user_ids"][:500]}
+            ),
+            "workspaces-information": self.get(
+                "/api/workspaces/information/",
+                {"workspace_id": workspace_id, "user_id": dataset["member_id"]},
+            ),
+            "workspaces-list": self.get("/api/workspaces/list/"),
+            "events-calendar-month": self.get(
+                "/api/events/calendar/",
+                {"workspace_id": workspace_id, "view": "month", "tz": "Europe/Berlin"},
+            ),
+            "events-heatmap": self.get(
+                "/api/events/heatmap/",
+                {
+                    "workspace_id": workspace_id,
+                    "start": timezone.localdate().isoformat(),
+                    "end": (
+                        timezone.localdate() + datetime.timedelta(days=90)
+                    ).isoformat(),
+                },
+            ),
+            "events-upcoming": self.get("/api/events/mine/upcoming/"),
+            "search-events": self.get("/api/search/", {"q": "synthetic event"}),
+            "search-profiles": self.get(
+                "/api/search/", {"q": "user", "type": "profiles"}
+            ),
+            "tasks-board": self.get("/api/tasks/", {"workspace_id": workspace_id}),
+            "events-window": self.get(
+                "/api/events/window/", {"workspace_id": workspace_id, **window}
+            ),
+            "events-layout": self.get(
+                "/api/events/layout/", {"workspace_id": workspace_id, **window}
+            ),
+            "events-freebusy": self.get(
+                "/api/events/freebusy/", {"workspace_id": workspace_id, **window}
+            ),
+            "events-unavailability": self.get("/api/events/unavailability/", window),
+            "events-participants": self.get(
+                f"/api/events/{dataset['shared_event_id']}/participants/"
+            ),
+        }
+
+
+@unittest.skipUnless(RUN_BENCHMARKS, "set RUN_BENCHMARKS=1 to run benchmarks")
+@override_settings(SECURE_SSL_REDIRECT=False)
+class EndpointBenchmarkTests(EndpointClientMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = seed.seed(seed.SCALES[SCALE], random.Random(1234))
+
+    def test_endpoint_latency(self):
+        results = {}
+        for name, call in self.endpoints(self.dataset).items():
+            with self.subTest(endpoint=name):
+                results[name] = harness.measure(call, ITERATIONS)
+                self.assertLess(max(results[name]["status_codes"]), 400)
+
+        # One extra tracked call per endpoint, outside the timed loop
+        self.auth[MEMORY_HEADER] = profiling.make_token(memory.TOKEN_MODE)
+        for name, call in self.endpoints(self.dataset).items():
+            results[name]["peak_kb"] = int(call()[memory.PEAK_HEADER]) // 1024
+
+        print(f"\n[{SCALE} on {connection.vendor}]\n{harness.format_report(results)}")
+        if os.getenv("BENCHMARK_OUTPUT"):
+            harness.save_baseline(os.getenv("BENCHMARK_OUTPUT"), results)
+
+        baseline = harness.load_baseline(BASELINE_PATH)
+        key = f"{connection.vendor}:{SCALE}"
+        if os.getenv("BENCHMARK_UPDATE_BASELINE") == "1":
+            baseline[key] = {
+                name: {"p95_ms": result["p95_ms"]} for name, result in results.items()
+            }
+            harness.save_baseline(BASELINE_PATH, baseline)
+            return
+
+        regressions = harness.find_regressions(
+            results, baseline.get(key, {}), TOLERANCE, SLACK_MS
+        )
+        self.assertFalse(
+            regressions,
+            "\n".join(regressions)
+            + f"\n(record {key} with BENCHMARK_UPDATE_BASELINE=1 if intended)",
+        )
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class QueryBudgetTests(EndpointClientMixin, TestCase):
+    """
+    Runs every endpoint against a small and a larger dataset and fails if
+    the number of queries grows with row count (an N+1) or exceeds the
+    budget checked in at query_budgets.json. Regenerate the budgets with
+    UPDATE_QUERY_BUDGETS=1 after an intentional change.
+    """
+
+    SMALL = {
+        "users": 20,
+        "workspaces": 2,
+        "members_per_workspace": 3,
+        "events_per_workspace": 5,
+        "tasks_per_workspace": 5,
+        "unavailability_per_user": 2,
+    }
+    LARGE = {
+        "users": 80,
+        "workspaces": 4,
+        "members_per_workspace": 15,
+        "events_per_workspace": 40,
+        "tasks_per_workspace": 40,
+        "unavailability_per_user": 8,
+    }
+
+    def count_queries(self, dataset):
+        counts = {}
+        for name, call in self.endpoints(dataset).items():
+            # Warm up so one-off work (e.g. creating the stub user) is excluded
+            call()
+            with CaptureQueriesContext(connection) as queries:
+                response = call()
+            self.assertLess(response.status_code, 400, name)
+            counts[name] = len(queries)
+        return counts
+
+    def test_query_counts_are_constant_and_within_budget(self):
+        small = self.count_queries(seed.seed(self.SMALL, random.Random(1), "qsmall"))
+        large = self.count_queries(seed.seed(self.LARGE, random.Random(2), "qlarge"))
+
+        if os.getenv("UPDATE_QUERY_BUDGETS") == "1":
+            harness.save_baseline(QUERY_BUDGETS_PATH, large)
+
+        budgets = harness.load_baseline(QUERY_BUDGETS_PATH)
+        for name in small:
+            with self.subTest(endpoint=name):
+                self.assertEqual(
+                    large[name],
+                    small[name],
+                    f"{name} issues more queries on more rows (N+1?)",
+                )
+                self.assertIn(name, budgets, f"add {name} to query_budgets.json")
+                self.assertLessEqual(large[name], budgets[name])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class MemoryBudgetTests(EndpointClientMixin, TestCase):
+    """
+    Tracks each endpoint's peak allocation with the memory middleware and
+    fails when it exceeds memory_budgets.json. Regenerate the budgets with
+    UPDATE_MEMORY_BUDGETS=1 after an intentional change.
+    """
+
+    VOLUMES = {
+        "users": 100,
+        "workspaces": 5,
+        "members_per_workspace": 20,
+        "events_per_workspace": 100,
+        "tasks_per_workspace": 100,
+        "unavailability_per_user": 4,
+    }
+
+    def test_peak_memory_within_budget(self):
+        dataset = seed.seed(self.VOLUMES, random.Random(3), "membudget")
+        self.auth[MEMORY_HEADER] = profiling.make_token(memory.TOKEN_MODE)
+        peaks = {}
+        for name, call in self.endpoints(dataset).items():
+            call()
+            peaks[name] = int(call()[memory.PEAK_HEADER])
+
+        if os.getenv("UPDATE_MEMORY_BUDGETS") == "1":
+            harness.save_baseline(
+                MEMORY_BUDGETS_PATH,
+                {
+                    name: harness.round_budget(peak * MEMORY_BUDGET_HEADROOM)
+                    for name, peak in peaks.items()
+                },
+            )
+
+        budgets = harness.load_baseline(MEMORY_BUDGETS_PATH)
+        for name, peak in peaks.items():
+            with self.subTest(endpoint=name):
+                self.assertIn(name, budgets, f"add {name} to memory_budgets.json")
+                self.assertLessEqual(peak, budgets[name])
+
+
+@unittest.skipUnless(RUN_BENCHMARKS, "set RUN_BENCHMARKS=1 to run benchmarks")
+class VisibilityBenchmarkTests(TestCase):
+    """
+    A page of the events one user may see, across a synthetic dataset of 1M
+    events in 10k workspaces (BENCHMARK_VISIBILITY_EVENTS and
+    BENCHMARK_VISIBILITY_WORKSPACES scale it down). The p95 must stay under
+    BENCHMARK_VISIBILITY_MAX_MS. Loading takes minutes; use Postgres.
+    """
+
+    EVENTS = int(os.getenv("BENCHMARK_VISIBILITY_EVENTS", "1000000"))
+    WORKSPACES = int(os.getenv("BENCHMARK_VISIBILITY_WORKSPACES", "10000"))
+    MAX_MS = float(os.getenv("BENCHMARK_VISIBILITY_MAX_MS", "20"))
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            "generate_synthetic_data",
+            prefix="visibility",
+            users=10000,
+            workspaces=cls.WORKSPACES,
+            events=cls.EVENTS,
+            stdout=io.StringIO(),
+        )
+        # The busiest member sees the most candidate rows
+        cls.user_id = (
+            WorkspaceMember.objects.values("user_id")
+            .annotate(workspaces=Count("workspace"))
+            .order_by("-workspaces")
+            .values_list("user_id", flat=True)
+            .first()
+        )
+
+    def visible_page(self, private):
+        queryset = visibility.visible_events(self.user_id).filter(**private)
+        return list(queryset.order_by("start_time", "event_id")[:50])
+
+    def test_visible_events_page(self):
+        rows = {}
+        for label, private in (
+            ("all visible", {}),
+            ("private visible", {"is_private": True}),
+        ):
+            self.assertTrue(self.visible_page(private))
+            timings = harness.time_calls(lambda: self.visible_page(private), ITERATIONS)
+            rows[label] = (
+                round(harness.percentile(timings, 50), 3),
+                round(harness.percentile(timings, 95), 3),
+            )
+        report = harness.format_table("visibility", ("p50 ms", "p95 ms"), rows)
+        print(f"\n[{self.EVENTS} events on {connection.vendor}]\n{report}")
+        for label, (_, p95) in rows.items():
+            with self.subTest(query=label):
+                self.assertLess(p95, self.MAX_MS)
+
+
+@unittest.skipUnless(RUN_BENCHMARKS, "set RUN_BENCHMARKS=1 to run benchmarks")
+class EncodingBenchmarkTests(unittest.TestCase):
+    """
+    Encode time and bytes on the wire for a 10k-event list response, for
+    DRF's JSONRenderer against ORJSONRenderer and each content coding.
+    """
+
+    EVENTS = int(os.getenv("BENCHMARK_ENCODING_EVENTS", "10000"))
+
+    def event_data(self):
+        generator = synthetic.Generator(
+            synthetic.Options(events=self.EVENTS), random.Random(5)
+        )
+        events = list(generator.events({1: [synthetic.random_uuid(generator.rng)]}))
+        return EventSerializer(events, many=True).data
+
+    def test_encoding(self):
+        data = self.event_data()
+        body = ORJSONRenderer().render(data)
+        self.assertEqual(body, JSONRenderer().render(data))
+
+        rows = {}
+        for name, renderer in (("drf", JSONRenderer()), ("orjson", ORJSONRenderer())):
+            timings = harness.time_calls(lambda: renderer.render(data), 10)
+            rows[f"render {name}"] = (
+                round(harness.percentile(timings, 50), 3),
+                len(body) // 1024,
+            )
+        for coding, encode in compression.ENCODERS.items():
+            timings = harness.time_calls(lambda: encode(body), 10)
+            rows[f"compress {coding}"] = (
+                round(harness.percentile(timings, 50), 3),
+                len(encode(body)) // 1024,
+            )
+        report = harness.format_table("encoding", ("p50 ms", "KiB"), rows)
+        print(f"\n[{self.EVENTS} events]\n{report}")
+
+
+@unittest.skipUnless(RUN_BENCHMARKS, "set RUN_BENCHMARKS=1 to run benchmarks")
+class ConnectionStrategyBenchmarkTests(unittest.TestCase):
+    """
+    Per-request connection cost of each DB_CONNECTION_STRATEGY against the
+    test database. Needs TEST_DB_ENGINE=postgresql; add
+    BENCHMARK_PGBOUNCER_PORT to route the pgbouncer strategy through one.
+    """
+
+    def setUp(self):
+        if connection.vendor != "postgresql":
+            self.skipTest("connection strategies need TEST_DB_ENGINE=postgresql")
+
+    def add_alias(self, strategy):
+        alias = f"bench_{strategy}"
+        base = {
+            key: connection.settings_dict[key]
+            for key in ("ENGINE", "NAME", "USER", "PASSWORD", "HOST", "PORT")
+        }
+        if strategy == "pgbouncer" and os.getenv("BENCHMARK_PGBOUNCER_PORT"):
+            base["PORT"] = os.getenv("BENCHMARK_PGBOUNCER_PORT")
+        connections.settings[alias] = connections.configure_settings(
+            {alias: database.configure(base, strategy, env={})}
+        )[alias]
+
+        def remove():
+            connections[alias].close()
+            connections[alias].close_pool()
+            del connections[alias]
+            del connections.settings[alias]
+
+        self.addCleanup(remove)
+        return alias
+
+    def request_cycle(self, alias):
+        # What the handler does around each request: close_old_connections()
+        # on start and finish, with one query in between
+        signals.request_started.send(sender=None)
+        with connections[alias].cursor() as cursor:
+            cursor.execute("SELECT 1")
+        signals.request_finished.send(sender=None)
+
+    def test_connection_strategies(self):
+        rows = {}
+        for strategy in database.STRATEGIES:
+            alias = self.add_alias(strategy)
+            timings = harness.time_calls(lambda: self.request_cycle(alias), ITERATIONS)
+            rows[strategy] = (
+                round(harness.percentile(timings, 50), 3),
+                round(harness.percentile(timings, 95), 3),
+            )
+        report = harness.format_table("strategy", ("p50 ms", "p95 ms"), rows)
+        print(f"\n[connection strategies]\n{report}")
+
+
+class HarnessTests(unittest.TestCase):
+    def test_percentile_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(harness.percentile(values, 50), 50)
+        self.assertEqual(harness.percentile(values, 99), 99)
+        self.assertEqual(harness.percentile([], 95), 0.0)
+
+    def test_find_regressions(self):
+        baseline = {"a": {"p95_ms": 10.0}, "b": {"p95_ms": 10.0}}
+        results = {"a": {"p95_ms": 14.0}, "b": {"p95_ms": 30.0}, "new": {"p95_ms": 1}}
+        regressions = harness.find_regressions(results, baseline, 0.5, 1)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith("b:"))
+        self.assertEqual(regressions[1], "new: no baseline")
+
+
+class SyntheticDataTests(TestCase):
+    def make_generator(self, seed):
+        options = synthetic.Options(seed=seed, users=50, workspaces=5, events=300)
+        anchor = datetime.datetime(2026, 1, 5, tzinfo=datetime.timezone.utc)
+        return synthetic.Generator(options, random.Random(seed), anchor)
+
+    def event_rows(self, generator, by_user):
+        return [
+            (e.event_id, e.start_time, e.end_time, e.created_by_id, e.workspace_id_id)
+            for e in generator.events(by_user)
+        ]
+
+    def test_same_seed_generates_identical_rows(self):
+        user_ids = list(range(1, 51))
+        first, second = self.make_generator(7), self.make_generator(7)
+        workspaces = list(first.workspaces(user_ids))
+        self.assertEqual(
+            [w.workspace_id for w in workspaces],
+            [w.workspace_id for w in second.workspaces(user_ids)],
+        )
+        _, by_user = first.memberships(workspaces, user_ids)
+        _, by_user_again = second.memberships(workspaces, user_ids)
+        self.assertEqual(by_user, by_user_again)
+        self.assertEqual(
+            self.event_rows(first, by_user), self.event_rows(second, by_user)
+        )
+
+    def test_events_follow_configured_durations(self):
+        generator = self.make_generator(3)
+        user_ids = list(range(1, 51))
+        _, by_user = generator.memberships(
+            list(generator.workspaces(user_ids)), user_ids
+        )
+        durations = {
+            (e.end_time - e.start_time).total_seconds() / 60
+            for e in generator.events(by_user)
+        }
+        self.assertTrue(durations <= {15, 30, 45, 60, 90, 120})
+
+    def test_individual_events_never_overlap_their_creators_others(self):
+        generator = self.make_generator(4)
+        user_ids = list(range(1, 6))
+        _, by_user = generator.memberships(
+            list(generator.workspaces(user_ids)), user_ids
+        )
+        generator.options.events = 2000
+        generator.options.individual_ratio = 0.9
+        by_creator = {}
+        for event in generator.events(by_user):
+            if event.event_type == Event.EventType.INDIVIDUAL:
+                by_creator.setdefault(event.created_by_id, []).append(event)
+
+        for events in by_creator.values():
+            events.sort(key=lambda e: e.start_time)
+            for earlier, later in zip(events, events[1:]):
+                self.assertLessEqual(earlier.end_time, later.start_time)
+
+    def test_working_hours_are_local(self):
+        generator = self.make_generator(5)
+        _, by_user = generator.memberships(list(generator.workspaces([1])), [1])
+        hours = {
+            timezone.localtime(e.start_time).hour for e in generator.events(by_user)
+        }
+        self.assertTrue(hours <= set(synthetic.HOUR_WEIGHTS))
+
+    def test_command_loads_all_tables(self):
+        out = io.StringIO()
+        call_command(
+            "generate_synthetic_data",
+            users=40,
+            workspaces=4,
+            events=250,
+            members_median=5,
+            batch_size=100,
+            stdout=out,
+        )
+
+        User = get_user_model()
+        self.assertEqual(
+            User.objects.filter(username__startswith="synthetic-").count(), 40
+        )
+        self.assertEqual(Profile.objects.count(), 40)
+        self.assertEqual(Workspace.objects.count(), 4)
+        self.assertEqual(Event.objects.count(), 250)
+        members = WorkspaceMember.objects.values_list("workspace_id", "user_id")
+        for event in Event.objects.all():
+            self.assertIn((event.workspace_id_id, event.created_by_id), members)
+        self.assertIn("events: 250 rows", out.getvalue())
+        for participant in EventParticipant.objects.select_related("event"):
+            self.assertTrue(participant.event.is_private)
+            self.assertIn(
+                (participant.event.workspace_id_id, participant.user_id), members
+            )
+
+    def test_command_refuses_existing_prefix(self):
+        get_user_model().objects.create(username="synthetic-0")
+        with self.assertRaises(CommandError):
+            call_command("generate_synthetic_data", users=1, stdout=io.StringIO())
@@ -3,6 +3,14 @@ ASGI config for collabdesk project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it with an ASGI worker, e.g.
+
+    gunicorn collabdesk.asgi:application -k uvicorn.workers.UvicornWorker
+
+and set ASYNC_READ_VIEWS=true to route the hot read endpoints to their async
+views. Every middleware in settings.MIDDLEWARE is async-capable, so those
+requests never occupy a thread while waiting on slow clients.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
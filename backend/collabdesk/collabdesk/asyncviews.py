@@ -0,0 +1,83 @@
+"""
+Async views for hot read endpoints served under ASGI.
+
+DRF 3.15 dispatches synchronously, so an ``APIView`` always holds a thread
+for the whole request. ``AsyncAPIView`` is a plain Django view with async
+handlers that keeps the DRF surface the rest of the code relies on: the
+request is wrapped in a DRF ``Request`` (``query_params``, ``data``,
+``user``), authentication goes through ``Auth0Authentication.aauthenticate``,
+errors use DRF's exception handler and handlers return DRF ``Response``
+objects, rendered here with ``ORJSONRenderer``.
+
+Handlers must load everything they serialize up front with the async ORM
+(``aget``, ``async for``, ``select_related``/``prefetch_related``); a lazy
+relation access inside a serializer raises SynchronousOnlyOperation.
+"""
+
+from django.contrib.auth.models import AnonymousUser
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.views import exception_handler
+
+from .parsers import ORJSONParser
+from .permissions import Auth0Authentication
+from .renderers import ORJSONRenderer
+
+
+class AsyncAPIView(View):
+    authentication_class = Auth0Authentication
+    # Equivalent of permission_classes = [IsAuthenticated]
+    require_authentication = True
+    parser_classes = (ORJSONParser,)
+    renderer_class = ORJSONRenderer
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Bearer-token API: exempt from CSRF like DRF's views
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.request = Request(
+            request, parsers=[parser() for parser in self.parser_classes]
+        )
+        try:
+            await self.authenticate(self.request)
+            response = await super().dispatch(self.request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        return self.finalize_response(self.request, response)
+
+    async def authenticate(self, request):
+        user_auth = await self.authentication_class().aauthenticate(request)
+        if user_auth is None:
+            request.user, request.auth = AnonymousUser(), None
+            if self.require_authentication:
+                raise NotAuthenticated()
+        else:
+            request.user, request.auth = user_auth
+
+    def handle_exception(self, exc):
+        if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+            # No WWW-Authenticate challenge for bearer tokens, so DRF answers 403
+            exc.status_code = status.HTTP_403_FORBIDDEN
+        response = exception_handler(exc, {"view": self, "request": self.request})
+        if response is None:
+            raise exc
+        return response
+
+    def finalize_response(self, request, response):
+        if isinstance(response, Response):
+            response.accepted_renderer = self.renderer_class()
+            response.accepted_media_type = response.accepted_renderer.media_type
+            response.renderer_context = {
+                "view": self,
+                "request": request,
+                "response": response,
+            }
+            # Render here; Django would otherwise render on a worker thread
+            response.render()
+        return response
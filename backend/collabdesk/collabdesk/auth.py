@@ -6,6 +6,7 @@ Fetches public keys from Auth0 and validates JWT tokens.
 import json
 import jwt
 import requests
+from asgiref.sync import sync_to_async
 from functools import lru_cache
 from typing import Dict, Optional
 from django.conf import settings
@@ -82,6 +83,18 @@ class Auth0TokenValidator:
         except Exception as e:
             raise ValueError(f"Token validation failed: {str(e)}")
 
+    async def avalidate_token(self, token: str) -> Optional[Dict]:
+        """
+        Async variant of validate_token. Once the JWKS is cached validation
+        is pure CPU work and runs inline; until then the blocking fetch runs
+        on a worker thread.
+        """
+        if not self.get_jwks.cache_info().currsize:
+            return await sync_to_async(self.validate_token, thread_sensitive=False)(
+                token
+            )
+        return self.validate_token(token)
+
 
 # Singleton instance
 _validator = None
@@ -0,0 +1,313 @@
+"""
+Versioned response cache for read endpoints.
+
+Cached entries are keyed by endpoint, the normalized query string and the
+current version of every scope the response depends on (for example
+``workspace:<id>`` or ``user:<id>``). Writes never delete entries; model
+signals bump the affected versions so stale keys are simply never read again
+and age out of the backend.
+
+The backend is the ``RESPONSE_CACHE_ALIAS`` entry of ``CACHES``. A version
+bump only reaches the workers sharing that backend, so responses are not
+cached at all when it is process-local (see ``is_shared``). Concurrent
+misses for the same key are coalesced so only one request computes it; set
+``RESPONSE_CACHE_CROSS_PROCESS_LOCK`` to coalesce across workers as well.
+``acache_response`` is the counterpart for async views; it uses the cache
+backend's async API and coalesces per event loop only.
+
+A response that depends on more than its query string, such as the caller
+or a default filled in from the clock, names those inputs through ``vary``
+so they become part of the key.
+"""
+
+import hashlib
+import threading
+import time
+from collections import defaultdict
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+from .routers import use_primary
+from .singleflight import AsyncSingleFlight, SingleFlight, cache_lock_flight, is_shared
+
+VERSION_PREFIX = "v"
+ENTRY_PREFIX = "r"
+
+
+def get_cache():
+    return caches[getattr(settings, "RESPONSE_CACHE_ALIAS", "default")]
+
+
+def _version_key(scope):
+    return f"{VERSION_PREFIX}:{scope}"
+
+
+def get_versions(scopes):
+    """
+    Return {scope: version} in one round trip. Missing versions are seeded
+    with the current time so an evicted counter never rewinds onto old keys.
+    """
+    cache = get_cache()
+    keys = {_version_key(scope): scope for scope in scopes}
+    found = cache.get_many(list(keys))
+    versions = {}
+    for key, scope in keys.items():
+        version = found.get(key)
+        if version is None:
+            cache.add(key, time.time_ns(), timeout=None)
+            version = cache.get(key)
+        versions[scope] = version
+    return versions
+
+
+async def aget_versions(scopes):
+    """Async get_versions()"""
+    cache = get_cache()
+    keys = {_version_key(scope): scope for scope in scopes}
+    found = await cache.aget_many(list(keys))
+    versions = {}
+    for key, scope in keys.items():
+        version = found.get(key)
+        if version is None:
+            await cache.aadd(key, time.time_ns(), timeout=None)
+            version = await cache.aget(key)
+        versions[scope] = version
+    return versions
+
+
+def incr_version(scope):
+    """Bump one scope's version and return the new one (None without a cache)"""
+    cache = get_cache()
+    key = _version_key(scope)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+        return cache.get(key)
+
+
+def _incr_versions(scopes):
+    for scope in scopes:
+        incr_version(scope)
+
+
+def bump(*scopes):
+    """
+    Invalidate every cached response depending on any of ``scopes``.
+    Inside a transaction the versions are bumped again on commit, so a
+    reader that cached pre-commit rows under the new version is discarded.
+    """
+    _incr_versions(scopes)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: _incr_versions(scopes))
+
+
+def normalize_params(query_params):
+    """Order-independent encoding of a QueryDict"""
+    items = sorted(
+        (name, value) for name, values in query_params.lists() for value in values
+    )
+    return urlencode(items)
+
+
+def build_key(endpoint, query_params, scopes, varies=None):
+    return _entry_key(endpoint, query_params, get_versions(scopes), varies)
+
+
+async def abuild_key(endpoint, query_params, scopes, varies=None):
+    return _entry_key(endpoint, query_params, await aget_versions(scopes), varies)
+
+
+def _entry_key(endpoint, query_params, versions, varies=None):
+    parts = [normalize_params(query_params)]
+    parts.extend(f"{scope}={versions[scope]}" for scope in sorted(versions))
+    varies = varies or {}
+    parts.extend(f"{name}~{varies[name]}" for name in sorted(varies))
+    digest = hashlib.sha1("&".join(parts).encode()).hexdigest()
+    return f"{ENTRY_PREFIX}:{endpoint}:{digest}"
+
+
+class CacheStats:
+    """Thread-safe per-endpoint hit/miss counters for this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = defaultdict(lambda: {"hits": 0, "misses": 0, "coalesced": 0})
+
+    def record(self, endpoint, outcome):
+        """Count one request as a cache hit, miss or coalesced wait"""
+        with self._lock:
+            self._counts[endpoint][outcome] += 1
+
+    def snapshot(self):
+        with self._lock:
+            result = {}
+            for endpoint, counts in self._counts.items():
+                total = sum(counts.values())
+                result[endpoint] = {
+                    **counts,
+                    "hit_ratio": counts["hits"] / total if total else 0.0,
+                }
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+stats = CacheStats()
+flights = SingleFlight()
+aflights = AsyncSingleFlight()
+
+
+def _entry(response):
+    """Cached form of a 200 response: its data and the headers the view set"""
+    headers = {
+        name: value
+        for name, value in response.items()
+        if name.lower() != "content-type"
+    }
+    return {"data": response.data, "headers": headers}
+
+
+def _from_entry(entry):
+    return Response(entry["data"], headers=entry["headers"])
+
+
+def _compute_coalesced(cache, key, compute):
+    """
+    Run ``compute`` once per key across threads and, when enabled, across
+    processes. Returns ((entry, response), shared); ``response`` is None
+    when another process computed the entry.
+    """
+
+    def leader():
+        if not getattr(settings, "RESPONSE_CACHE_CROSS_PROCESS_LOCK", False):
+            return compute()
+        result, shared = cache_lock_flight(cache, key, compute)
+        return (result, None) if shared else result
+
+    return flights.do(key, leader)
+
+
+def _coalesced_response(endpoint, entry, response, shared):
+    """
+    The response for a caller of a coalesced miss, or None when it has to
+    run the handler itself: only 200 responses are shared with waiters.
+    """
+    if response is not None and not shared:
+        stats.record(endpoint, "misses")
+        return response
+    if entry is None:
+        stats.record(endpoint, "misses")
+        return None
+    stats.record(endpoint, "coalesced")
+    return _from_entry(entry)
+
+
+def cache_response(endpoint, scopes, timeout=None, vary=None):
+    """
+    Decorator for APIView handlers caching successful response data.
+
+    ``scopes(request, *args, **kwargs)`` returns the version scopes the
+    response depends on, or None to bypass the cache for that request. The
+    cache is bypassed as well while its backend is process-local.
+    ``vary(request, *args, **kwargs)``, when given, returns a dict of any
+    other inputs of the response, which are added to the key.
+    """
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            cache = get_cache()
+            request_scopes = scopes(request, *args, **kwargs)
+            if request_scopes is None or not is_shared(cache):
+                return method(view, request, *args, **kwargs)
+
+            key = build_key(
+                endpoint,
+                request.query_params,
+                request_scopes,
+                vary and vary(request, *args, **kwargs),
+            )
+            entry = cache.get(key)
+            if entry is not None:
+                stats.record(endpoint, "hits")
+                return _from_entry(entry)
+
+            def compute():
+                # Never cache replica lag under the fresh versions
+                with use_primary():
+                    response = method(view, request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return None, response
+                entry = _entry(response)
+                cache.set(
+                    key,
+                    entry,
+                    timeout or getattr(settings, "RESPONSE_CACHE_TIMEOUT", 300),
+                )
+                return entry, response
+
+            (entry, response), shared = _compute_coalesced(cache, key, compute)
+            response = _coalesced_response(endpoint, entry, response, shared)
+            if response is None:
+                # The leader's error is not shared; this request runs as well
+                return method(view, request, *args, **kwargs)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def acache_response(endpoint, scopes, timeout=None, vary=None):
+    """cache_response() for the async handlers of an AsyncAPIView"""
+
+    def decorator(method):
+        @wraps(method)
+        async def wrapper(view, request, *args, **kwargs):
+            cache = get_cache()
+            request_scopes = scopes(request, *args, **kwargs)
+            if request_scopes is None or not is_shared(cache):
+                return await method(view, request, *args, **kwargs)
+
+            key = await abuild_key(
+                endpoint,
+                request.query_params,
+                request_scopes,
+                vary and vary(request, *args, **kwargs),
+            )
+            entry = await cache.aget(key)
+            if entry is not None:
+                stats.record(endpoint, "hits")
+                return _from_entry(entry)
+
+            async def compute():
+                with use_primary():
+                    response = await method(view, request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return None, response
+                entry = _entry(response)
+                await cache.aset(
+                    key,
+                    entry,
+                    timeout or getattr(settings, "RESPONSE_CACHE_TIMEOUT", 300),
+                )
+                return entry, response
+
+            (entry, response), shared = await aflights.do(key, compute)
+            response = _coalesced_response(endpoint, entry, response, shared)
+            if response is None:
+                return await method(view, request, *args, **kwargs)
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,105 @@
+"""
+Response compression negotiated from ``Accept-Encoding``.
+
+Brotli (when the ``brotli`` package is installed) and gzip are offered; the
+client's q-values pick between them and ties go to brotli. Only responses
+of a COMPRESSION_CONTENT_TYPES type that are at least COMPRESSION_MIN_SIZE
+bytes are compressed, which keeps HTML pages that embed CSRF tokens out of
+reach of BREACH-style attacks. Streaming responses, responses that already
+carry a Content-Encoding and ``Cache-Control: no-transform`` are left alone.
+"""
+
+import gzip
+import re
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from .middleware import ContextMiddleware
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+DEFAULT_CONTENT_TYPES = ("application/json", "text/plain")
+_strong_etag_re = re.compile(r'^"')
+
+
+def _gzip(content):
+    level = getattr(settings, "COMPRESSION_GZIP_LEVEL", 6)
+    return gzip.compress(content, compresslevel=level, mtime=0)
+
+
+def _brotli(content):
+    quality = getattr(settings, "COMPRESSION_BROTLI_QUALITY", 5)
+    return brotli.compress(content, quality=quality)
+
+
+# Server preference order, used to break q-value ties
+ENCODERS = {"br": _brotli, "gzip": _gzip} if brotli else {"gzip": _gzip}
+
+
+def parse_accept_encoding(header):
+    """Map each coding in an Accept-Encoding header to its q-value"""
+    weights = {}
+    for part in header.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        params = params.replace(" ", "")
+        try:
+            weights[coding] = float(params[2:]) if params.startswith("q=") else 1.0
+        except ValueError:
+            weights[coding] = 0.0
+    return weights
+
+
+def choose_encoding(header, available=tuple(ENCODERS)):
+    """The acceptable coding with the highest q-value, or None for identity"""
+    weights = parse_accept_encoding(header)
+    default = weights.get("*", 0.0)
+    best, best_q = None, 0.0
+    for coding in available:
+        q = weights.get(coding, default)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def is_compressible(response):
+    if getattr(response, "streaming", False) or response.has_header("Content-Encoding"):
+        return False
+    if "no-transform" in response.get("Cache-Control", ""):
+        return False
+    content_type = response.get("Content-Type", "").split(";")[0].strip()
+    content_types = getattr(
+        settings, "COMPRESSION_CONTENT_TYPES", DEFAULT_CONTENT_TYPES
+    )
+    if content_type not in content_types:
+        return False
+    return len(response.content) >= getattr(settings, "COMPRESSION_MIN_SIZE", 1024)
+
+
+class CompressionMiddleware(ContextMiddleware):
+    def finish(self, request, response, state):
+        if not is_compressible(response):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        coding = choose_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if coding is None:
+            return response
+
+        compressed = ENCODERS[coding](response.content)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response.headers["Content-Length"] = str(len(compressed))
+        response.headers["Content-Encoding"] = coding
+        # The bytes changed, so a strong validator no longer applies
+        if etag := response.get("ETag"):
+            response.headers["ETag"] = _strong_etag_re.sub('W/"', etag)
+        return response
@@ -0,0 +1,80 @@
+"""
+PostgreSQL connection strategies, selected with DB_CONNECTION_STRATEGY.
+
+* ``direct`` - a new connection per request (Django's default).
+* ``persistent`` - connections are kept for DB_CONN_MAX_AGE seconds and
+  checked with CONN_HEALTH_CHECKS before reuse. Connections belong to a
+  thread, so under ASGI (a fresh thread per request) prefer ``pool``.
+* ``pool`` - Django's native psycopg 3 pool: DB_POOL_MIN_SIZE to
+  DB_POOL_MAX_SIZE connections per worker process, checked on checkout,
+  waiting at most DB_POOL_TIMEOUT seconds for a free one. Size it so that
+  ``workers * DB_POOL_MAX_SIZE`` stays below the server's connection limit.
+* ``pgbouncer`` - for a pgbouncer (or Supabase pooler) in transaction mode:
+  persistent client connections, no server-side cursors (a cursor cannot
+  outlive the transaction that owns the server connection) and no prepared
+  statements (the next statement may run on another server connection).
+  Session state does not survive either, so give the database role a UTC
+  time zone (``ALTER ROLE ... SET timezone TO 'UTC'``) so Django never has to
+  SET it per connection.
+"""
+
+import importlib.util
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+STRATEGIES = ("direct", "persistent", "pool", "pgbouncer")
+DEFAULT_STRATEGY = "direct"
+
+
+def _env_int(env, name, default):
+    return int(env.get(name, default))
+
+
+def configure(database, strategy=None, env=None):
+    """
+    Return a copy of the ``database`` settings dict with the connection
+    strategy applied. ``strategy`` and tuning values default to the
+    environment.
+    """
+    env = os.environ if env is None else env
+    strategy = strategy or env.get("DB_CONNECTION_STRATEGY", DEFAULT_STRATEGY)
+    if strategy not in STRATEGIES:
+        raise ImproperlyConfigured(
+            f"DB_CONNECTION_STRATEGY must be one of {', '.join(STRATEGIES)}"
+        )
+
+    database = {**database, "OPTIONS": dict(database.get("OPTIONS", {}))}
+    if strategy in ("persistent", "pgbouncer"):
+        database["CONN_MAX_AGE"] = _env_int(env, "DB_CONN_MAX_AGE", 600)
+        database["CONN_HEALTH_CHECKS"] = True
+    if strategy == "pool":
+        database["CONN_MAX_AGE"] = 0
+        # Django passes psycopg_pool's check_connection for checkouts
+        database["CONN_HEALTH_CHECKS"] = True
+        database["OPTIONS"]["pool"] = pool_options(env)
+    if strategy == "pgbouncer":
+        database["DISABLE_SERVER_SIDE_CURSORS"] = True
+        if _psycopg3_available():
+            # psycopg 3 prepares statements run 5+ times; psycopg2 never does
+            database["OPTIONS"]["prepare_threshold"] = None
+    return database
+
+
+def pool_options(env):
+    if not importlib.util.find_spec("psycopg_pool"):
+        raise ImproperlyConfigured(
+            "DB_CONNECTION_STRATEGY=pool requires psycopg 3 with the pool extra"
+        )
+    return {
+        "min_size": _env_int(env, "DB_POOL_MIN_SIZE", 2),
+        "max_size": _env_int(env, "DB_POOL_MAX_SIZE", 10),
+        "timeout": _env_int(env, "DB_POOL_TIMEOUT", 10),
+        # Drop connections idle this long, recycle all after max_lifetime
+        "max_idle": _env_int(env, "DB_POOL_MAX_IDLE", 300),
+        "max_lifetime": _env_int(env, "DB_POOL_MAX_LIFETIME", 1800),
+    }
+
+
+def _psycopg3_available():
+    return importlib.util.find_spec("psycopg") is not None
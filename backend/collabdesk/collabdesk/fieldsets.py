@@ -0,0 +1,134 @@
+"""
+Sparse fieldsets and opt-in expansion for DRF serializers and views.
+
+Clients may ask for a subset of fields with ``?fields=a,b`` and turn on
+expensive nested fields with ``?expand=x,y``. The serializer mixin prunes the
+rendered fields while the view mixin trims the queryset to match, so columns
+and relations that were not requested are neither fetched nor serialized.
+"""
+
+from django.db.models import QuerySet
+from rest_framework.serializers import ListSerializer
+
+FIELDS_PARAM = "fields"
+EXPAND_PARAM = "expand"
+
+
+def parse_list_param(request, name):
+    """
+    Return the comma separated query parameter ``name`` as a set, or None
+    when the parameter is absent. Only safe methods honour these parameters
+    so writes never silently drop input fields.
+    """
+    if request is None or request.method not in ("GET", "HEAD"):
+        return None
+    raw = request.query_params.get(name)
+    if raw is None:
+        return None
+    return {part.strip() for part in raw.split(",") if part.strip()}
+
+
+class SparseFieldsetMixin:
+    """
+    ModelSerializer mixin implementing ``?fields=`` and ``?expand=``.
+
+    ``Meta.expandable_fields`` maps field names that are only rendered when
+    expanded to the relations they need, e.g.::
+
+        expandable_fields = {
+            "members": {"prefetch_related": ["members__user", "members__role"]},
+            "owner": {"select_related": ["created_by"]},
+        }
+
+    Views may expand fields by default through the ``default_expand`` entry
+    of the serializer context; an explicit ``?expand=`` replaces it.
+    """
+
+    @classmethod
+    def get_expandable_fields(cls):
+        return getattr(cls.Meta, "expandable_fields", {})
+
+    @classmethod
+    def requested_fieldset(cls, request, default_expand=()):
+        """Return (fields, expand) where fields is None when not restricted."""
+        fields = parse_list_param(request, FIELDS_PARAM)
+        expand = parse_list_param(request, EXPAND_PARAM)
+        if expand is None:
+            expand = set(default_expand)
+        expand &= set(cls.get_expandable_fields())
+        return fields, expand
+
+    @classmethod
+    def optimize_queryset(cls, queryset, request, default_expand=()):
+        """
+        Apply only() and conditional select/prefetch_related so the queryset
+        loads exactly what the requested fieldset renders.
+        """
+        fields, expand = cls.requested_fieldset(request, default_expand)
+        model = queryset.model
+        select, prefetch = [], []
+        for name in expand:
+            if fields is not None and name not in fields:
+                continue
+            related = cls.get_expandable_fields()[name]
+            select.extend(related.get("select_related", []))
+            prefetch.extend(related.get("prefetch_related", []))
+
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        if fields is not None:
+            concrete = {f.name for f in model._meta.concrete_fields}
+            columns = {name for name in fields if name in concrete}
+            columns |= {path.split("__")[0] for path in select}
+            columns.add(model._meta.pk.name)
+            columns |= set(getattr(cls.Meta, "required_columns", ()))
+            queryset = queryset.only(*columns)
+        return queryset
+
+    def _is_root(self):
+        parent = self.parent
+        if isinstance(parent, ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self._is_root():
+            return fields
+
+        requested, expand = self.requested_fieldset(
+            self.context.get("request"), self.context.get("default_expand", ())
+        )
+        for name in set(self.get_expandable_fields()) - expand:
+            fields.pop(name, None)
+        if requested is not None:
+            for name in set(fields) - requested:
+                fields.pop(name)
+        return fields
+
+
+class SparseFieldsetViewMixin:
+    """
+    Generic view mixin that trims the queryset to the requested fieldset and
+    forwards ``default_expand`` to the serializer.
+    """
+
+    default_expand = ()
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["default_expand"] = self.default_expand
+        return context
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        serializer_class = self.get_serializer_class()
+        if isinstance(queryset, QuerySet) and issubclass(
+            serializer_class, SparseFieldsetMixin
+        ):
+            queryset = serializer_class.optimize_queryset(
+                queryset, self.request, self.default_expand
+            )
+        return queryset
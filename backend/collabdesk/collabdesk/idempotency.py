@@ -0,0 +1,185 @@
+"""
+``Idempotency-Key`` support for POST endpoints.
+
+A client that retries a POST with the same ``Idempotency-Key`` header gets
+the response of the first attempt back. The retry does not run validation
+or the write again. Responses (anything below 500) are stored in the
+``IDEMPOTENCY_CACHE_ALIAS`` cache for ``IDEMPOTENCY_TTL`` seconds, keyed by
+endpoint, user and key. A replayed response carries
+``Idempotent-Replayed: true``. Reusing a key with a different body is
+refused with 422, so a key cannot silently return someone else's result.
+
+The first attempt claims the key with an ``add`` of an in-progress
+marker, so concurrent attempts never run the write in parallel: they poll
+for its response and replay it, as ``cache_lock_flight`` does. One still
+running after ``IDEMPOTENCY_LOCK_TIMEOUT`` seconds answers them with 409.
+The marker expires after that long too, in case its process dies. If the
+first attempt fails with a server error, its marker is removed and the
+next attempt runs the write again.
+
+A retry may reach any worker, so this needs a cache shared by all of them
+(see ``is_shared``). With a process-local cache the header is ignored and
+every request runs, as without it; ``check_cache`` warns about that at
+startup.
+"""
+
+import hashlib
+import json
+import logging
+import time
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core import checks
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+from .singleflight import is_shared
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+KEY_PREFIX = "idempotency"
+MAX_KEY_LENGTH = 255
+# Seconds between reads of a running first attempt's entry
+POLL_INTERVAL = 0.05
+
+logger = logging.getLogger(__name__)
+
+
+def _alias():
+    return getattr(settings, "IDEMPOTENCY_CACHE_ALIAS", "default")
+
+
+def get_cache():
+    """The idempotency cache, or None when it is not shared by every worker"""
+    cache = caches[_alias()]
+    return cache if is_shared(cache) else None
+
+
+def check_cache(app_configs, **kwargs):
+    """System check: Idempotency-Key is ignored without a shared cache"""
+    if is_shared(caches[_alias()]):
+        return []
+    return [
+        checks.Warning(
+            f'The "{_alias()}" cache is local to each process, so '
+            f"{HEADER} headers are ignored.",
+            hint="Point IDEMPOTENCY_CACHE_ALIAS at a shared backend.",
+            id="collabdesk.W001",
+        )
+    ]
+
+
+def _ttl():
+    return getattr(settings, "IDEMPOTENCY_TTL", 24 * 60 * 60)
+
+
+def _lock_timeout():
+    return getattr(settings, "IDEMPOTENCY_LOCK_TIMEOUT", 30)
+
+
+def build_key(endpoint, user_id, key):
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return f"{KEY_PREFIX}:{endpoint}:{user_id}:{digest}"
+
+
+def fingerprint(request):
+    """Hash of the parsed request body, insensitive to key order and spacing"""
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def _first_attempt(cache, cache_key, attempt, handler):
+    """
+    The entry under ``cache_key``: this attempt's once ``handler()`` ran if
+    it is the first, otherwise the first attempt's. A running first attempt
+    with the same body is waited for up to the lock timeout; its entry still
+    has a None status if it did not finish by then.
+    """
+    deadline = time.monotonic() + _lock_timeout()
+    while not cache.add(cache_key, {**attempt, "status": None}, _lock_timeout()):
+        entry = cache.get(cache_key)
+        if entry is None:
+            # The first attempt failed or expired just now: claim the key
+            continue
+        if (
+            entry["status"] is not None
+            or entry["fingerprint"] != attempt["fingerprint"]
+            or time.monotonic() >= deadline
+        ):
+            return entry
+        time.sleep(POLL_INTERVAL)
+
+    try:
+        response = handler()
+    except BaseException:
+        cache.delete(cache_key)
+        raise
+    entry = {**attempt, "status": response.status_code, "data": response.data}
+    if response.status_code < 500:
+        cache.set(cache_key, entry, _ttl())
+    else:
+        cache.delete(cache_key)
+    return entry
+
+
+def _respond(entry, attempt):
+    if entry["token"] == attempt["token"]:
+        return Response(entry["data"], status=entry["status"])
+    if entry["fingerprint"] != attempt["fingerprint"]:
+        return Response(
+            {"Error": f"{HEADER} was already used with a different request"},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    if entry["status"] is None:
+        return Response(
+            {"Error": f"A request with this {HEADER} is still in progress"},
+            status=status.HTTP_409_CONFLICT,
+        )
+    response = Response(entry["data"], status=entry["status"])
+    response[REPLAYED_HEADER] = "true"
+    return response
+
+
+def idempotent(endpoint):
+    """
+    Decorator for APIView POST handlers honouring ``Idempotency-Key``.
+    Requests without the header run as before.
+    """
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            key = request.headers.get(HEADER)
+            if key is None:
+                return method(view, request, *args, **kwargs)
+            if not key or len(key) > MAX_KEY_LENGTH:
+                return Response(
+                    {"Error": f"{HEADER} must be 1 to {MAX_KEY_LENGTH} characters"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            def handler():
+                # Store error responses such as a 409 conflict as well
+                try:
+                    return method(view, request, *args, **kwargs)
+                except APIException as e:
+                    return view.handle_exception(e)
+
+            cache = get_cache()
+            if cache is None:
+                logger.warning("Ignoring %s without a shared cache", HEADER)
+                return method(view, request, *args, **kwargs)
+
+            attempt = {"token": uuid.uuid4().hex, "fingerprint": fingerprint(request)}
+            entry = _first_attempt(
+                cache, build_key(endpoint, request.user.pk, key), attempt, handler
+            )
+            return _respond(entry, attempt)
+
+        return wrapper
+
+    return decorator
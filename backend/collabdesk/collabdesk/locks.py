@@ -0,0 +1,80 @@
+"""
+Named write locks held until the enclosing transaction ends.
+
+``xact_lock(namespace, key)`` opens a transaction and serializes it
+against every other holder of the same (namespace, key). The lock never
+touches anyone else, so a check-then-write such as an overlap check
+followed by an insert cannot race itself, while other keys keep running
+in parallel.
+
+On PostgreSQL this is ``pg_advisory_xact_lock`` on a 64-bit hash of the
+name. The server releases it at commit or rollback, however deeply the
+block is nested, and it works across processes. Other databases fall back
+to an in-process lock per name taken around the transaction. That covers
+SQLite, where local and test runs use a single process anyway. Nested in
+an outer transaction, the fallback lock is released when the block exits,
+not when the outer transaction commits.
+"""
+
+import hashlib
+import threading
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+
+def lock_id(namespace, key):
+    """Signed 64-bit advisory lock id for ``namespace:key``"""
+    digest = hashlib.blake2b(f"{namespace}:{key}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+class KeyedLocks:
+    """One lock per name, dropped once nobody holds or waits for it"""
+
+    def __init__(self):
+        self._guard = threading.Lock()
+        self._locks = {}
+
+    @contextmanager
+    def hold(self, name):
+        with self._guard:
+            lock, users = self._locks.get(name, (None, 0))
+            if lock is None:
+                lock = threading.Lock()
+            self._locks[name] = (lock, users + 1)
+        try:
+            with lock:
+                yield
+        finally:
+            with self._guard:
+                users = self._locks[name][1] - 1
+                if users:
+                    self._locks[name] = (lock, users)
+                else:
+                    del self._locks[name]
+
+    def __len__(self):
+        with self._guard:
+            return len(self._locks)
+
+
+local_locks = KeyedLocks()
+
+
+@contextmanager
+def xact_lock(namespace, key, using=DEFAULT_DB_ALIAS):
+    """A transaction on ``using`` holding the (namespace, key) lock"""
+    if connections[using].vendor == "postgresql":
+        with transaction.atomic(using=using):
+            with connections[using].cursor() as cursor:
+                cursor.execute(
+                    "SELECT pg_advisory_xact_lock(%s)", [lock_id(namespace, key)]
+                )
+            yield
+        return
+
+    # Held around the transaction so it is released only after the commit
+    with local_locks.hold((using, namespace, str(key))):
+        with transaction.atomic(using=using):
+            yield
@@ -0,0 +1,106 @@
+"""
+Opt-in tracemalloc instrumentation of individual requests.
+
+Send ``X-Collabdesk-Memory: <profiling.make_token("memory")>`` and the
+response carries the request's peak traced allocation in
+``X-Memory-Peak-Bytes`` plus its top allocating call sites (by memory still
+held when the response is returned) in ``X-Memory-Top-Sites``. The peak is
+also recorded in the ``collabdesk_http_request_peak_memory_bytes`` metric.
+
+tracemalloc traces the whole interpreter, so only one request is tracked at
+a time; concurrent requests asking for it are served untracked.
+"""
+
+import logging
+import os
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+from . import metrics, profiling
+from .middleware import ContextMiddleware
+
+MEMORY_HEADER = "HTTP_X_COLLABDESK_MEMORY"
+PEAK_HEADER = "X-Memory-Peak-Bytes"
+TOP_SITES_HEADER = "X-Memory-Top-Sites"
+TOKEN_MODE = "memory"
+TRACE_FRAMES = 1
+TOP_SITES = 5
+
+logger = logging.getLogger(__name__)
+_trace_lock = threading.Lock()
+
+
+class MemoryReport:
+    def __init__(self):
+        self.peak_bytes = 0
+        self.top_sites = []
+
+    def format_top_sites(self):
+        return ", ".join(f"{site}={size}" for site, size in self.top_sites)
+
+
+def _top_sites(before, after, limit):
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    stats = after.filter_traces(ignore).compare_to(
+        before.filter_traces(ignore), "lineno"
+    )
+    sites = []
+    for stat in stats[:limit]:
+        frame = stat.traceback[0]
+        sites.append(
+            (f"{os.path.basename(frame.filename)}:{frame.lineno}", stat.size_diff)
+        )
+    return sites
+
+
+@contextmanager
+def track(top=TOP_SITES):
+    """
+    Measure peak allocation inside the block. Yields a MemoryReport that is
+    filled in on exit, or None when another block is already tracking.
+    """
+    if not _trace_lock.acquire(blocking=False):
+        yield None
+        return
+
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start(TRACE_FRAMES)
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        report = MemoryReport()
+        yield report
+        _, peak = tracemalloc.get_traced_memory()
+        report.peak_bytes = max(0, peak - baseline)
+        report.top_sites = _top_sites(before, tracemalloc.take_snapshot(), top)
+    finally:
+        if started:
+            tracemalloc.stop()
+        _trace_lock.release()
+
+
+class MemoryTrackingMiddleware(ContextMiddleware):
+    def enter(self, request, stack):
+        header = request.META.get(MEMORY_HEADER)
+        if not header or profiling.read_token(header, (TOKEN_MODE,)) is None:
+            return None
+        return stack.enter_context(track())
+
+    def finish(self, request, response, report):
+        if report is None:
+            return response
+
+        view = metrics.view_label(request)
+        metrics.PEAK_MEMORY.observe(report.peak_bytes, view=view)
+        logger.info(
+            "memory %s peak=%d top=%s",
+            view,
+            report.peak_bytes,
+            report.format_top_sites(),
+        )
+        response[PEAK_HEADER] = str(report.peak_bytes)
+        response[TOP_SITES_HEADER] = report.format_top_sites()
+        return response
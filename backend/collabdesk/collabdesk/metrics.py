@@ -0,0 +1,320 @@
+"""
+Per-request instrumentation exposed in the Prometheus text format.
+
+``MetricsMiddleware`` records, per resolved URL name, request latency, SQL
+query count and time (through an execute wrapper on every connection), time spent
+authenticating and response size. ``metrics_view`` renders the registry at
+``/metrics``. Labels come from a bounded vocabulary (URL names, HTTP methods
+and status classes) so series counts cannot grow with traffic.
+
+Metrics are held per process; scrape every worker or run a single worker
+per container.
+"""
+
+import hmac
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+
+from . import cache
+from .middleware import ContextMiddleware, install_sql_wrapper
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+MEMORY_BUCKETS = tuple(2**n for n in range(16, 30, 2))
+
+KNOWN_METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+# Hard ceiling on label sets per metric; anything beyond folds into "other"
+MAX_LABEL_SETS = 500
+UNMATCHED_VIEW = "unmatched"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def _key(self, labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        if key not in self._series and len(self._series) >= MAX_LABEL_SETS:
+            key = tuple("other" for _ in self.labelnames)
+        return key
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        with self._lock:
+            for key, value in sorted(self._series.items()):
+                lines.extend(self._render_series(key, value))
+        return lines
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        with self._lock:
+            key = self._key(labels)
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._series.get(tuple(str(labels[n]) for n in self.labelnames), 0)
+
+    def _render_series(self, key, value):
+        labels = _format_labels(self.labelnames, key)
+        return [f"{self.name}{labels} {_format_number(value)}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets) + (float("inf"),)
+
+    def observe(self, amount, **labels):
+        with self._lock:
+            key = self._key(labels)
+            series = self._series.setdefault(
+                key, {"buckets": [0] * len(self.buckets), "sum": 0, "count": 0}
+            )
+            for i, bound in enumerate(self.buckets):
+                if amount <= bound:
+                    series["buckets"][i] += 1
+            series["sum"] += amount
+            series["count"] += 1
+
+    def count(self, **labels):
+        series = self._series.get(tuple(str(labels[n]) for n in self.labelnames))
+        return series["count"] if series else 0
+
+    def _render_series(self, key, series):
+        lines = []
+        for bound, count in zip(self.buckets, series["buckets"]):
+            labels = _format_labels(
+                self.labelnames, key, [("le", _format_number(bound))]
+            )
+            lines.append(f"{self.name}_bucket{labels} {count}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_number(series['sum'])}")
+        lines.append(f"{self.name}_count{labels} {series['count']}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        lines.extend(_render_cache_stats())
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        for metric in self.metrics:
+            metric.reset()
+
+
+def _render_cache_stats():
+    """Expose the response cache counters (collabdesk.cache) alongside"""
+    name = "collabdesk_response_cache_requests_total"
+    lines = [
+        f"# HELP {name} Response cache lookups by outcome.",
+        f"# TYPE {name} counter",
+    ]
+    for endpoint, counts in sorted(cache.stats.snapshot().items()):
+        for outcome in ("hits", "misses", "coalesced"):
+            labels = _format_labels(("endpoint", "outcome"), (endpoint, outcome))
+            lines.append(f"{name}{labels} {counts[outcome]}")
+    return lines
+
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.register(
+    Histogram(
+        "collabdesk_http_request_duration_seconds",
+        "Request latency by URL name.",
+        ("view", "method"),
+    )
+)
+REQUESTS = registry.register(
+    Counter(
+        "collabdesk_http_requests_total",
+        "Requests by URL name and status class.",
+        ("view", "method", "status"),
+    )
+)
+DB_QUERIES = registry.register(
+    Histogram(
+        "collabdesk_http_request_db_queries",
+        "SQL queries issued per request.",
+        ("view",),
+        QUERY_COUNT_BUCKETS,
+    )
+)
+DB_SECONDS = registry.register(
+    Counter(
+        "collabdesk_http_request_db_seconds_total",
+        "Time spent executing SQL.",
+        ("view",),
+    )
+)
+AUTH_SECONDS = registry.register(
+    Counter(
+        "collabdesk_http_request_auth_seconds_total",
+        "Time spent in Auth0Authentication.",
+        ("view",),
+    )
+)
+RESPONSE_SIZE = registry.register(
+    Histogram(
+        "collabdesk_http_response_size_bytes",
+        "Response body size as sent, after compression.",
+        ("view",),
+        SIZE_BUCKETS,
+    )
+)
+PEAK_MEMORY = registry.register(
+    Histogram(
+        "collabdesk_http_request_peak_memory_bytes",
+        "Peak traced allocation of memory-tracked requests.",
+        ("view",),
+        MEMORY_BUCKETS,
+    )
+)
+
+
+class RequestMetrics:
+    """Mutable per-request accumulator, reachable through ``current()``"""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.auth_seconds = 0.0
+
+    def sql_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_seconds += time.perf_counter() - start
+            self.queries += 1
+
+
+_current = ContextVar("collabdesk_request_metrics", default=None)
+
+
+def current():
+    return _current.get()
+
+
+def sql_wrapper(execute, sql, params, many, context):
+    request_metrics = _current.get()
+    if request_metrics is None:
+        return execute(sql, params, many, context)
+    return request_metrics.sql_wrapper(execute, sql, params, many, context)
+
+
+install_sql_wrapper(sql_wrapper)
+
+
+def record_auth_time(seconds):
+    request_metrics = current()
+    if request_metrics is not None:
+        request_metrics.auth_seconds += seconds
+
+
+def view_label(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None or not match.url_name:
+        return UNMATCHED_VIEW
+    return match.view_name
+
+
+def _response_size(response):
+    if getattr(response, "streaming", False):
+        return None
+    return len(response.content)
+
+
+class MetricsMiddleware(ContextMiddleware):
+    def enter(self, request, stack):
+        request_metrics = RequestMetrics()
+        stack.callback(_current.reset, _current.set(request_metrics))
+        return request_metrics, time.perf_counter()
+
+    def finish(self, request, response, state):
+        request_metrics, start = state
+        self.observe(request, response, request_metrics, time.perf_counter() - start)
+        return response
+
+    def observe(self, request, response, request_metrics, elapsed):
+        view = view_label(request)
+        method = request.method if request.method in KNOWN_METHODS else "other"
+        REQUEST_LATENCY.observe(elapsed, view=view, method=method)
+        REQUESTS.inc(
+            view=view, method=method, status=f"{response.status_code // 100}xx"
+        )
+        DB_QUERIES.observe(request_metrics.queries, view=view)
+        DB_SECONDS.inc(request_metrics.sql_seconds, view=view)
+        AUTH_SECONDS.inc(request_metrics.auth_seconds, view=view)
+        size = _response_size(response)
+        if size is not None:
+            RESPONSE_SIZE.observe(size, view=view)
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint. Scrapers must send METRICS_TOKEN as a bearer
+    token. Without one configured the endpoint only exists under DEBUG.
+    """
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if not token:
+        if not settings.DEBUG:
+            raise Http404()
+    elif not hmac.compare_digest(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,78 @@
+"""
+Plumbing shared by the collabdesk middleware.
+
+``ContextMiddleware`` runs in both sync and async handler chains, so an
+async view behind it is awaited on the event loop instead of being pushed
+onto a thread. ``install_sql_wrapper`` attaches a request-agnostic
+``execute_wrapper`` to every connection: the async ORM runs queries on a
+worker thread whose connections a per-request ``connection.execute_wrapper``
+block on the event loop thread would never see, so wrappers instead find
+their request state through a ContextVar (which ``sync_to_async`` carries
+across).
+"""
+
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+
+def _add_wrapper(connection, wrapper):
+    # Front of the list, so connection.execute_wrapper() blocks that pop
+    # their own wrapper off the end are unaffected
+    if wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, wrapper)
+
+
+def install_sql_wrapper(wrapper):
+    """
+    Attach ``wrapper`` to this thread's connections and to every connection
+    opened from now on in any thread. It must pass straight through when
+    there is no current request.
+    """
+
+    def on_connection_created(sender, connection, **kwargs):
+        _add_wrapper(connection, wrapper)
+
+    connection_created.connect(on_connection_created, weak=False)
+    for connection in connections.all():
+        _add_wrapper(connection, wrapper)
+
+
+class ContextMiddleware:
+    """
+    Middleware that calls the rest of the chain inside the contexts
+    ``enter(request, stack)`` pushes onto ``stack``, then post-processes the
+    response with ``finish(request, response, state)`` where ``state`` is
+    whatever ``enter`` returned.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        with ExitStack() as stack:
+            state = self.enter(request, stack)
+            response = self.get_response(request)
+        return self.finish(request, response, state)
+
+    async def __acall__(self, request):
+        with ExitStack() as stack:
+            state = self.enter(request, stack)
+            response = await self.get_response(request)
+        return self.finish(request, response, state)
+
+    def enter(self, request, stack):
+        return None
+
+    def finish(self, request, response, state):
+        return response
@@ -0,0 +1,26 @@
+"""
+orjson-backed JSON request parsing, paired with ``renderers.ORJSONRenderer``.
+"""
+
+import orjson
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+from .renderers import ORJSONRenderer
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        try:
+            body = stream.read()
+            if encoding.lower().replace("-", "") != "utf8":
+                body = body.decode(encoding)
+            # orjson rejects NaN and Infinity, matching STRICT_JSON
+            return orjson.loads(body)
+        except (ValueError, LookupError) as exc:
+            raise ParseError("JSON parse error - %s" % str(exc))
@@ -6,6 +6,8 @@ from rest_framework import authentication, permissions
 from rest_framework.exceptions import AuthenticationFailed
 from django.contrib.auth import get_user_model
 from .auth import get_token_validator
+from . import metrics, profiling
+import time
 
 
 User = get_user_model()
@@ -20,7 +22,58 @@ class Auth0Authentication(authentication.BaseAuthentication):
         """
         Authenticate the request and return a tuple of (user, token) or None
         """
-        # Extract token from Authorization header
+        start = time.perf_counter()
+        try:
+            return self._authenticate(request)
+        finally:
+            metrics.record_auth_time(time.perf_counter() - start)
+
+    async def aauthenticate(self, request):
+        """
+        Async counterpart of authenticate() for async views: the token is
+        validated inline and the user is loaded with the async ORM.
+        """
+        start = time.perf_counter()
+        try:
+            token = self.get_token(request)
+            if token is None:
+                return None
+            try:
+                payload = await get_token_validator().avalidate_token(token)
+            except ValueError as e:
+                raise AuthenticationFailed(str(e))
+            auth0_user_id, email = self.get_identity(payload)
+            user, created = await User.objects.aget_or_create(
+                username=auth0_user_id, defaults={"email": email or ""}
+            )
+            return self.finish(user, payload, token)
+        finally:
+            metrics.record_auth_time(time.perf_counter() - start)
+
+    def _authenticate(self, request):
+        token = self.get_token(request)
+        if token is None:
+            return None
+
+        # Validate the token
+        try:
+            validator = get_token_validator()
+            payload = validator.validate_token(token)
+        except ValueError as e:
+            raise AuthenticationFailed(str(e))
+
+        auth0_user_id, email = self.get_identity(payload)
+
+        # Get or create user based on Auth0 ID
+        # You can customize this logic based on your user model
+        user, created = User.objects.get_or_create(
+            username=auth0_user_id, defaults={"email": email or ""}
+        )
+
+        return self.finish(user, payload, token)
+
+    def get_token(self, request):
+        """Return the bearer token from the Authorization header, if any"""
         auth_header = request.META.get("HTTP_AUTHORIZATION", "")
 
         if not auth_header:
@@ -33,31 +86,24 @@ class Auth0Authentication(authentication.BaseAuthentication):
                 "Invalid authorization header format. Expected: Bearer <token>"
             )
 
-        token = parts[1]
-
-        # Validate the token
-        try:
-            validator = get_token_validator()
-            payload = validator.validate_token(token)
-        except ValueError as e:
-            raise AuthenticationFailed(str(e))
+        return parts[1]
 
-        # Extract user info from token
+    def get_identity(self, payload):
+        """Extract (auth0 user id, email) from a validated token payload"""
         auth0_user_id = payload.get("sub")
-        email = payload.get("email")
 
         if not auth0_user_id:
             raise AuthenticationFailed("Token missing user identifier (sub)")
 
-        # Get or create user based on Auth0 ID
-        # You can customize this logic based on your user model
-        user, created = User.objects.get_or_create(
-            username=auth0_user_id, defaults={"email": email or ""}
-        )
+        return auth0_user_id, payload.get("email")
 
+    def finish(self, user, payload, token):
         # Store the full token payload on the user object for access in views
         user.auth0_payload = payload
 
+        # Allow-listed users may profile their own requests
+        profiling.start_for_user(user)
+
         return (user, token)
 
 
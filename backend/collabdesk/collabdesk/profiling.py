@@ -0,0 +1,206 @@
+"""
+Opt-in profiling of individual requests.
+
+A request is profiled when it carries the ``X-Collabdesk-Profile`` header and
+either the header holds a token from ``make_token()`` (signed with
+SECRET_KEY, valid for PROFILING_TOKEN_MAX_AGE seconds) or the authenticated
+user is listed in PROFILING_ALLOWED_USERS, in which case the header holds just
+the mode. Modes:
+
+* ``sample`` - a background thread samples the request thread's stack and
+  writes collapsed stacks (``.collapsed``; open with speedscope or
+  flamegraph.pl)
+* ``cprofile`` - deterministic cProfile, written as a pstats dump (``.prof``)
+
+The SQL issued while profiling is written next to it as ``.sql.json`` and the
+response carries ``X-Profile-Id`` naming the files. Requests without the
+header only pay for one META lookup.
+"""
+
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core import signing
+
+from .metrics import view_label
+from .middleware import ContextMiddleware, install_sql_wrapper
+
+PROFILE_HEADER = "HTTP_X_COLLABDESK_PROFILE"
+PROFILE_ID_HEADER = "X-Profile-Id"
+TOKEN_SALT = "collabdesk.profiling"
+MODES = ("sample", "cprofile")
+DEFAULT_MODE = "sample"
+
+_current = ContextVar("collabdesk_profiling_session", default=None)
+
+
+def make_token(mode=DEFAULT_MODE):
+    """Mint a header value that enables profiling for any user"""
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign(mode)
+
+
+def read_token(value, modes=MODES):
+    """Return the mode of a valid signed token if it is one of ``modes``"""
+    max_age = getattr(settings, "PROFILING_TOKEN_MAX_AGE", 3600)
+    try:
+        mode = signing.TimestampSigner(salt=TOKEN_SALT).unsign(value, max_age=max_age)
+    except signing.BadSignature:
+        return None
+    return mode if mode in modes else None
+
+
+class StackSampler:
+    """Samples one thread's Python stack at a fixed interval"""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+                )
+                frame = frame.f_back
+            key = ";".join(reversed(stack))
+            self.samples[key] = self.samples.get(key, 0) + 1
+
+    def write(self, path):
+        with open(path, "w") as f:
+            for stack, count in sorted(self.samples.items()):
+                f.write(f"{stack} {count}\n")
+
+
+class ProfilingSession:
+    def __init__(self, requested_mode):
+        self.requested_mode = requested_mode
+        self.mode = None
+        self.profiler = None
+        self.queries = []
+
+    @property
+    def active(self):
+        return self.mode is not None
+
+    def start(self, mode):
+        if self.active:
+            return
+        if mode == "cprofile":
+            self.profiler = cProfile.Profile()
+            try:
+                self.profiler.enable()
+            except ValueError:
+                # Another profiler already owns this interpreter
+                self.profiler = None
+                return
+        else:
+            interval = getattr(settings, "PROFILING_SAMPLE_INTERVAL", 0.005)
+            self.profiler = StackSampler(threading.get_ident(), interval)
+            self.profiler.start()
+        self.mode = mode
+
+    def stop(self):
+        if isinstance(self.profiler, StackSampler):
+            self.profiler.stop()
+        elif self.profiler is not None:
+            self.profiler.disable()
+
+    def sql_wrapper(self, execute, sql, params, many, context):
+        if not self.active:
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(
+                {
+                    "alias": context["connection"].alias,
+                    "sql": sql,
+                    "many": many,
+                    "seconds": time.perf_counter() - start,
+                }
+            )
+
+    def write(self, label):
+        directory = settings.PROFILING_OUTPUT_DIR
+        os.makedirs(directory, exist_ok=True)
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{label}-{uuid.uuid4().hex[:8]}"
+        base = os.path.join(directory, profile_id)
+        if isinstance(self.profiler, StackSampler):
+            self.profiler.write(f"{base}.collapsed")
+        else:
+            self.profiler.dump_stats(f"{base}.prof")
+        with open(f"{base}.sql.json", "w") as f:
+            json.dump(self.queries, f, indent=2)
+        return profile_id
+
+
+def sql_wrapper(execute, sql, params, many, context):
+    session = _current.get()
+    if session is None:
+        return execute(sql, params, many, context)
+    return session.sql_wrapper(execute, sql, params, many, context)
+
+
+install_sql_wrapper(sql_wrapper)
+
+
+def start_for_user(user):
+    """
+    Called once the request's user is known. Starts profiling when the
+    request asked for it and the user is allow-listed.
+    """
+    session = _current.get()
+    if session is None or session.active:
+        return
+    if user.username in getattr(settings, "PROFILING_ALLOWED_USERS", ()):
+        mode = session.requested_mode
+        session.start(mode if mode in MODES else DEFAULT_MODE)
+
+
+class ProfilingMiddleware(ContextMiddleware):
+    """
+    Under ASGI the profilers follow the event loop thread, so a profile also
+    covers whatever other coroutines ran while the request was awaiting.
+    """
+
+    def enter(self, request, stack):
+        header = request.META.get(PROFILE_HEADER)
+        if not header:
+            return None
+        session = ProfilingSession(header)
+        stack.callback(session.stop)
+        stack.callback(_current.reset, _current.set(session))
+        mode = read_token(header)
+        if mode is not None:
+            session.start(mode)
+        return session
+
+    def finish(self, request, response, session):
+        if session is not None and session.active:
+            label = view_label(request).replace(":", "-")
+            response[PROFILE_ID_HEADER] = session.write(label)
+        return response
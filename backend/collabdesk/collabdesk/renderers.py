@@ -0,0 +1,41 @@
+"""
+orjson-backed JSON rendering.
+
+``ORJSONRenderer`` produces the same bytes as DRF's ``JSONRenderer`` with the
+default settings (compact separators, UTF-8 output, ``\\u2028``/``\\u2029``
+escaped). Types orjson has no native encoding for, and datetimes, whose
+format differs (DRF trims to milliseconds and writes UTC as ``Z``), are
+handed to DRF's encoder so their representation does not change. Floats
+in exponent notation are the one difference (``1e-05`` vs ``0.00001``);
+the API does not return any.
+
+Indented output (the browsable API, ``Accept: application/json; indent=4``)
+and non-default UNICODE_JSON/COMPACT_JSON settings fall back to DRF.
+"""
+
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+_encoder = JSONEncoder()
+
+
+def encode(data):
+    ret = orjson.dumps(data, default=_encoder.default, option=OPTIONS)
+    # Keep the output a strict JavaScript subset, as DRF does
+    if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+        ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028")
+        ret = ret.replace(b"\xe2\x80\xa9", b"\\u2029")
+    return ret
+
+
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        return encode(data)
@@ -0,0 +1,225 @@
+"""
+Read-replica routing with read-your-writes stickiness.
+
+``ReplicaRouter`` sends reads of the REPLICA_APPS models to one of
+DATABASE_REPLICAS and everything else to ``default`` (the primary). Reads
+go to the primary whenever the data might not have replicated yet:
+
+* for the rest of a request once it has written anything, and for every
+  read of a POST/PUT/PATCH/DELETE (read-modify-write);
+* for REPLICA_PIN_SECONDS after a client's last write. The pin is kept in
+  a signed cookie or, with REPLICA_PIN_STORE = "cache", in the default
+  cache under a hash of the client's bearer token. That cache must be
+  shared by every worker, or the pin is lost when the next request lands
+  elsewhere;
+* inside a transaction on the primary;
+* in views or blocks marked with ``primary_reads``, and while the response
+  cache computes an entry, so no client caches replica lag under a fresh
+  version;
+* outside a request (management commands, shell) and when there are no
+  replicas.
+
+``ReplicaRoutingMiddleware`` carries this state per request in a ContextVar,
+which the async ORM's worker thread sees as well.
+"""
+
+import hashlib
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .middleware import ContextMiddleware, install_sql_wrapper
+from .singleflight import is_shared
+
+REPLICA_APPS = {"events", "workspaces", "profiles", "tasks"}
+PIN_COOKIE = "collabdesk_primary"
+PIN_SALT = "collabdesk.routers.pin"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+WRITE_STATEMENTS = ("INSERT", "UPDATE", "DELETE")
+
+_state = ContextVar("collabdesk_replica_routing", default=None)
+
+
+class RoutingState:
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+        self.overrides = 0
+
+
+def _replicas():
+    return getattr(settings, "DATABASE_REPLICAS", ())
+
+
+def _in_transaction():
+    connection = connections[DEFAULT_DB_ALIAS]
+    # An open connection with autocommit turned off is in a transaction too
+    return connection.in_atomic_block or (
+        connection.connection is not None and not connection.get_autocommit()
+    )
+
+
+def reads_use_primary():
+    state = _state.get()
+    return (
+        state is None
+        or state.pinned
+        or state.wrote
+        or state.overrides > 0
+        or not _replicas()
+        or _in_transaction()
+    )
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label not in REPLICA_APPS or reads_use_primary():
+            return DEFAULT_DB_ALIAS
+        return random.choice(_replicas())
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in _replicas():
+            return False
+        return None
+
+
+def sql_wrapper(execute, sql, params, many, context):
+    # Django routes get_or_create() and friends through db_for_write() even
+    # when they only read, so writes are detected from the SQL instead
+    state = _state.get()
+    if (
+        state is not None
+        and not state.wrote
+        and context["connection"].alias == DEFAULT_DB_ALIAS
+        and sql.lstrip()[:6].upper() in WRITE_STATEMENTS
+    ):
+        state.wrote = True
+    return execute(sql, params, many, context)
+
+
+install_sql_wrapper(sql_wrapper)
+
+
+@contextmanager
+def use_primary():
+    """Send this block's reads to the primary"""
+    state = _state.get()
+    if state is None:
+        yield
+        return
+    state.overrides += 1
+    try:
+        yield
+    finally:
+        state.overrides -= 1
+
+
+def primary_reads(func):
+    """
+    Per-view override: the decorated view or handler (sync or async) reads
+    from the primary, e.g. when it must see another client's latest write.
+    """
+    if iscoroutinefunction(func):
+
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            with use_primary():
+                return await func(*args, **kwargs)
+
+        return async_wrapper
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with use_primary():
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def _pin_seconds():
+    return getattr(settings, "REPLICA_PIN_SECONDS", 10)
+
+
+def _cache_key(request):
+    auth = request.META.get("HTTP_AUTHORIZATION")
+    if not auth:
+        return None
+    return "replica-pin:" + hashlib.sha256(auth.encode()).hexdigest()
+
+
+class CookiePinStore:
+    def is_pinned(self, request):
+        value = request.COOKIES.get(PIN_COOKIE)
+        if not value:
+            return False
+        try:
+            signing.TimestampSigner(salt=PIN_SALT).unsign(value, max_age=_pin_seconds())
+        except signing.BadSignature:
+            return False
+        return True
+
+    def pin(self, request, response):
+        response.set_cookie(
+            PIN_COOKIE,
+            signing.TimestampSigner(salt=PIN_SALT).sign(str(int(time.time()))),
+            max_age=_pin_seconds(),
+            httponly=True,
+            samesite="Lax",
+            secure=request.is_secure(),
+        )
+
+
+class CachePinStore:
+    def __init__(self):
+        if not is_shared(caches["default"]):
+            raise ImproperlyConfigured(
+                'REPLICA_PIN_STORE = "cache" needs a default cache shared by '
+                "every worker"
+            )
+
+    def is_pinned(self, request):
+        key = _cache_key(request)
+        return key is not None and caches["default"].get(key) is not None
+
+    def pin(self, request, response):
+        key = _cache_key(request)
+        if key is not None:
+            caches["default"].set(key, 1, timeout=_pin_seconds())
+
+
+PIN_STORES = {"cookie": CookiePinStore, "cache": CachePinStore}
+
+
+class ReplicaRoutingMiddleware(ContextMiddleware):
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.store = PIN_STORES[getattr(settings, "REPLICA_PIN_STORE", "cookie")]()
+
+    def enter(self, request, stack):
+        if not _replicas():
+            return None
+        pinned = request.method not in SAFE_METHODS or self.store.is_pinned(request)
+        state = RoutingState(pinned=pinned)
+        stack.callback(_state.reset, _state.set(state))
+        return state
+
+    def finish(self, request, response, state):
+        if state is not None and state.wrote:
+            self.store.pin(request, response)
+        return response
@@ -0,0 +1,160 @@
+"""
+Ranked full-text search over events and profiles.
+
+On PostgreSQL each searchable table gets a GIN index on a weighted
+``tsvector`` expression and a ``pg_trgm`` GIN index on its name column.
+Every word of the query matches as a prefix (``plan:*``) against the
+vector, while a misspelt name still matches through trigram similarity.
+The rank is ``ts_rank`` plus that similarity. The query repeats the exact
+expression the index was built on, so both conditions are index scans.
+
+SQLite (local and test runs) has no tsvector, so each table is mirrored
+into an FTS5 table kept in sync by triggers. Its rows carry the primary
+key, since the implicit rowid of a UUID-keyed table is not stable across
+VACUUM. Prefix matches are ranked by ``bm25`` with the same column weights.
+There is no fuzzy matching on SQLite.
+
+The indexes, FTS5 tables and triggers are created by events/0008 and
+profiles/0003, which spell out their DDL; ``vector_sql`` must keep matching
+it. Django remakes a SQLite table for most ALTERs, dropping its triggers,
+so a migration that does so must create them again (SearchTests checks
+they exist after migrating).
+
+Results are ordered by (rank descending, primary key) and paginated with a
+signed keyset cursor of the last (rank, primary key) sent.
+"""
+
+import re
+
+from django.core import signing
+from django.db import connections
+from django.db.models import BooleanField, ExpressionWrapper, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+CURSOR_SALT = "collabdesk.search"
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+# Most words of a query that are matched; the rest are ignored
+MAX_TERMS = 8
+# Weights of the A, B and C columns in SQLite's bm25()
+BM25_WEIGHTS = (10.0, 4.0, 2.0)
+
+
+class SearchSpec:
+    """
+    A searchable table: its primary key, weighted columns (A first) and
+    name column
+    """
+
+    def __init__(self, name, table, key, columns, trigram):
+        self.name = name
+        self.table = table
+        self.key = key
+        self.columns = columns
+        self.trigram = trigram
+
+    @property
+    def fts_table(self):
+        return f"{self.table}_fts"
+
+    def vector_sql(self, qualify=False):
+        prefix = f'"{self.table}".' if qualify else ""
+        return " || ".join(
+            f"setweight(to_tsvector('simple', coalesce({prefix}\"{column}\", '')), "
+            f"'{weight}')"
+            for column, weight in zip(self.columns, "ABC")
+        )
+
+
+EVENTS = SearchSpec(
+    "event", "events_event", "event_id", ("title", "description", "location"), "title"
+)
+PROFILES = SearchSpec(
+    "profile", "profiles_profile", "profile_id", ("full_name", "bio"), "full_name"
+)
+
+
+def terms(query):
+    """The words of ``query``, lowercased; raises ValueError if there are none"""
+    words = re.findall(r"\w+", query.lower())[:MAX_TERMS]
+    if not words:
+        raise ValueError("q must contain at least one word")
+    return words
+
+
+def _expressions(spec, words, vendor):
+    """(match, rank) SQL expressions for ``words``"""
+    if vendor == "postgresql":
+        tsquery = " & ".join(f"{word}:*" for word in words)
+        name = f'"{spec.table}"."{spec.trigram}"'
+        text = " ".join(words)
+        vector = spec.vector_sql(qualify=True)
+        match = RawSQL(
+            f"(({vector}) @@ to_tsquery('simple', %s) OR {name} %% %s)",
+            (tsquery, text),
+        )
+        rank = RawSQL(
+            f"(ts_rank(({vector}), to_tsquery('simple', %s)) "
+            f"+ similarity({name}, %s))::float8",
+            (tsquery, text),
+        )
+    elif vendor == "sqlite":
+        fts = f'"{spec.fts_table}"'
+        phrase = " AND ".join(f'"{word}"*' for word in words)
+        key = f'"{spec.table}"."{spec.key}"'
+        # The unindexed key column comes first and weighs nothing
+        weights = ", ".join(map(str, (0.0, *BM25_WEIGHTS[: len(spec.columns)])))
+        match = RawSQL(
+            f'{key} IN (SELECT "key" FROM {fts} WHERE {fts} MATCH %s)', (phrase,)
+        )
+        # bm25() is lower for better matches
+        rank = RawSQL(
+            f"(SELECT -bm25({fts}, {weights}) FROM {fts} "
+            f'WHERE {fts} MATCH %s AND "key" = {key})',
+            (phrase,),
+        )
+    else:
+        raise NotImplementedError(f"Search is not supported on {vendor}")
+    return ExpressionWrapper(match, BooleanField()), rank
+
+
+def search(queryset, spec, query, after=None):
+    """
+    ``queryset`` narrowed to rows matching ``query``, annotated with
+    ``search_rank`` and ordered best first, after the (rank, pk) ``after``.
+    Raises ValueError for a query without words.
+    """
+    words = terms(query)
+    vendor = connections[queryset.db].vendor
+    match, rank = _expressions(spec, words, vendor)
+    queryset = queryset.filter(match).annotate(
+        search_rank=ExpressionWrapper(rank, FloatField())
+    )
+    if after is not None:
+        last_rank, last_pk = after
+        queryset = queryset.filter(
+            Q(search_rank__lt=last_rank) | Q(search_rank=last_rank, pk__gt=last_pk)
+        )
+    return queryset.order_by("-search_rank", "pk")
+
+
+def encode_cursor(row):
+    return signing.dumps([row.search_rank, str(row.pk)], salt=CURSOR_SALT)
+
+
+def decode_cursor(value):
+    """(rank, pk) of the last row of the previous page"""
+    try:
+        rank, pk = signing.loads(value, salt=CURSOR_SALT)
+        return float(rank), pk
+    except (signing.BadSignature, TypeError, ValueError):
+        raise ValueError("cursor is invalid")
+
+
+def page(queryset, limit):
+    """(rows, next cursor or None) for the first ``limit`` rows"""
+    rows = list(queryset[: limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1])
@@ -14,6 +14,8 @@ from pathlib import Path
 import os
 import sys
 
+from collabdesk import database
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -39,6 +41,35 @@ SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
 
 SECURE_SSL_REDIRECT = True
 
+# Prometheus scrapes the plain-HTTP container port directly
+SECURE_REDIRECT_EXEMPT = [r"^metrics$"]
+
+# Bearer token required by the /metrics endpoint, which is not served
+# without one unless DEBUG is on
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# On-demand request profiling (collabdesk/profiling.py)
+PROFILING_OUTPUT_DIR = os.getenv(
+    "PROFILING_OUTPUT_DIR", os.path.join(BASE_DIR, "profiling")
+)
+PROFILING_ALLOWED_USERS = [
+    username
+    for username in os.getenv("PROFILING_ALLOWED_USERS", "").split(",")
+    if username
+]
+PROFILING_TOKEN_MAX_AGE = 3600
+PROFILING_SAMPLE_INTERVAL = 0.005
+
+# Response compression (collabdesk/compression.py)
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_CONTENT_TYPES = ("application/json", "text/plain")
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BROTLI_QUALITY = 5
+
+# Route the hot read endpoints to their async views (collabdesk/asyncviews.py).
+# Only worthwhile when serving collabdesk.asgi:application.
+ASYNC_READ_VIEWS = os.getenv("ASYNC_READ_VIEWS", "false").lower() == "true"
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -54,9 +85,16 @@ INSTALLED_APPS = [
     "rest_framework",
     "corsheaders",
     "profiles",
+    "tasks",
+    "benchmarks",
 ]
 
 MIDDLEWARE = [
+    "collabdesk.metrics.MetricsMiddleware",
+    "collabdesk.profiling.ProfilingMiddleware",
+    "collabdesk.memory.MemoryTrackingMiddleware",
+    "collabdesk.compression.CompressionMiddleware",
+    "collabdesk.routers.ReplicaRoutingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -104,19 +142,79 @@ WSGI_APPLICATION = "collabdesk.wsgi.application"
 #     }
 # }
 
+# Connection reuse is chosen with DB_CONNECTION_STRATEGY (direct, persistent,
+# pool or pgbouncer); see collabdesk/database.py for the tuning variables.
 DATABASES = {
+    "default": database.configure(
+        {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": "postgres",
+            "USER": "postgres.jxggktqrynstjmohwqns",
+            "PASSWORD": "collab@team2@1",
+            "HOST": "aws-1-us-east-2.pooler.supabase.com",
+            "PORT": "5432",
+            "OPTIONS": {
+                "sslmode": "require",
+            },
+        }
+    )
+}
+
+# Read replicas (collabdesk/routers.py): DB_REPLICA_HOSTS is a comma separated
+# list of hosts serving streaming replicas of the default database.
+DATABASE_REPLICAS = []
+for index, host in enumerate(
+    filter(None, os.getenv("DB_REPLICA_HOSTS", "").split(","))
+):
+    alias = f"replica_{index + 1}"
+    DATABASES[alias] = {**DATABASES["default"], "HOST": host.strip()}
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ["collabdesk.routers.ReplicaRouter"]
+# Reads stay on the primary this long after a client writes; keep it above
+# the usual replication lag. The pin lives in a "cookie" or the "cache"; the
+# latter needs a default cache shared by every worker.
+REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", "10"))
+REPLICA_PIN_STORE = os.getenv("REPLICA_PIN_STORE", "cookie")
+
+# Caches
+# The "responses" alias backs the versioned read-endpoint cache
+# (collabdesk/cache.py). Point it at a shared backend such as Redis or
+# Memcached in production so every worker sees the same versions. Features
+# that need a shared cache turn themselves off (or refuse to start) on a
+# per-process LocMemCache unless CACHE_ALLOW_PROCESS_LOCAL is set, which is
+# only safe when a single process serves every request.
+CACHE_ALLOW_PROCESS_LOCAL = (
+    os.getenv("CACHE_ALLOW_PROCESS_LOCAL", "false").lower() == "true"
+)
+CACHES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
-        "NAME": "postgres",
-        "USER": "postgres.jxggktqrynstjmohwqns",
-        "PASSWORD": "collab@team2@1",
-        "HOST": "aws-1-us-east-2.pooler.supabase.com",
-        "PORT": "5432",
-        "OPTIONS": {
-            "sslmode": "require",
-        },
-    }
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "responses": {
+        "BACKEND": os.getenv(
+            "RESPONSE_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("RESPONSE_CACHE_LOCATION", "collabdesk-responses"),
+    },
 }
+RESPONSE_CACHE_ALIAS = "responses"
+RESPONSE_CACHE_TIMEOUT = int(os.getenv("RESPONSE_CACHE_TIMEOUT", "300"))
+# Coalesce identical cache misses across workers with a lock in the shared
+# cache (requires a non-local backend to have any effect).
+RESPONSE_CACHE_CROSS_PROCESS_LOCK = (
+    os.getenv("RESPONSE_CACHE_CROSS_PROCESS_LOCK", "false").lower() == "true"
+)
+# Stored responses of POSTs sent with an Idempotency-Key
+# (collabdesk/idempotency.py). The alias must name a cache shared by every
+# worker; on a process-local one the header is ignored (check W001).
+IDEMPOTENCY_CACHE_ALIAS = os.getenv("IDEMPOTENCY_CACHE_ALIAS", "default")
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", str(24 * 60 * 60)))
+# How long duplicates wait on a first attempt, and how long it may run
+# before a retry can take over
+IDEMPOTENCY_LOCK_TIMEOUT = int(os.getenv("IDEMPOTENCY_LOCK_TIMEOUT", "30"))
+# Workspace event interval indexes kept per process for the layout view
+# (events/intervals.py); their versions live in the shared response cache.
+INTERVAL_INDEX_MAX_SCOPES = int(os.getenv("INTERVAL_INDEX_MAX_SCOPES", "512"))
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -155,6 +253,29 @@ USE_TZ = True
 STATIC_URL = "static/"
 STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
 
+# Uploaded media (avatars). Swap the "avatars" backend for shared storage
+# such as S3 in production; originals and variants use content-hashed names.
+MEDIA_URL = "media/"
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", os.path.join(BASE_DIR, "media"))
+
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+    "avatars": {
+        "BACKEND": os.getenv(
+            "AVATAR_STORAGE_BACKEND", "django.core.files.storage.FileSystemStorage"
+        ),
+        "OPTIONS": {"location": os.path.join(MEDIA_ROOT, "avatars")},
+    },
+}
+
+# Worker threads used to render resized avatar variants
+AVATAR_WORKERS = int(os.getenv("AVATAR_WORKERS", "2"))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -172,9 +293,33 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.AllowAny",  # Default to allow, protect specific views
     ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "collabdesk.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "collabdesk.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
 }
 
-if "test" in sys.argv:
+if "test" in sys.argv and os.getenv("TEST_DB_ENGINE") == "postgresql":
+    # Local Postgres for benchmarks: TEST_DB_ENGINE=postgresql TEST_DB_NAME=...
+    print("Using local PostgreSQL database for tests.")
+    DATABASES = {
+        "default": database.configure(
+            {
+                "ENGINE": "django.db.backends.postgresql",
+                "NAME": os.getenv("TEST_DB_NAME", "collabdesk"),
+                "USER": os.getenv("TEST_DB_USER", "postgres"),
+                "PASSWORD": os.getenv("TEST_DB_PASSWORD", ""),
+                "HOST": os.getenv("TEST_DB_HOST", "localhost"),
+                "PORT": os.getenv("TEST_DB_PORT", "5432"),
+            }
+        )
+    }
+elif "test" in sys.argv:
     print("Using in-memory SQLite database for tests.")
     DATABASES = {
         "default": {
@@ -182,3 +327,23 @@ if "test" in sys.argv:
             "NAME": ":memory:",
         }
     }
+
+if "test" in sys.argv:
+    # A second, independent database that routing tests opt into as a
+    # replica with override_settings(DATABASE_REPLICAS=["replica"]). Django
+    # gives each in-memory SQLite alias its own database.
+    DATABASE_REPLICAS = []
+    DATABASES["replica"] = {**DATABASES["default"]}
+    if not DATABASES["default"]["ENGINE"].endswith("sqlite3"):
+        DATABASES["replica"]["TEST"] = {
+            "NAME": f"test_{DATABASES['default']['NAME']}_replica"
+        }
+
+if "test" in sys.argv:
+    # Test databases roll back between tests but caches do not, so the
+    # response cache is disabled unless a test opts in with a locmem backend.
+    CACHES["responses"] = {
+        "BACKEND": "django.core.cache.backends.dummy.DummyCache",
+    }
+    # The test runner is a single process
+    CACHE_ALLOW_PROCESS_LOCAL = True
@@ -0,0 +1,153 @@
+"""
+Single-flight coalescing of identical computations.
+
+When many requests miss the cache for the same key at once, only one of them
+(the leader) runs the computation; the others wait for it and share its
+result. ``SingleFlight`` coalesces threads within a process,
+``AsyncSingleFlight`` coroutines on one event loop, and
+``cache_lock_flight`` optionally extends this across processes through an
+``add``-based lock in a shared Django cache; ``is_shared`` tells whether a
+cache is one.
+"""
+
+import asyncio
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Per-process registry of in-flight computations keyed by string"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, compute, timeout=None):
+        """
+        Run ``compute()`` once for concurrent callers sharing ``key``.
+        Returns (result, shared) where shared is True for callers that
+        waited on another thread. A waiter that times out computes itself.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if call.done.wait(timeout):
+                if call.error is not None:
+                    raise call.error
+                return call.result, True
+            return compute(), False
+
+        try:
+            call.result = compute()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """SingleFlight for coroutines; calls only coalesce within one event loop"""
+
+    def __init__(self):
+        self._calls = {}
+
+    async def do(self, key, compute):
+        """
+        Await ``compute()`` once for concurrent callers sharing ``key``.
+        Returns (result, shared). Waiters compute themselves if the leader
+        is cancelled.
+        """
+        loop = asyncio.get_running_loop()
+        call = self._calls.get((loop, key))
+        if call is not None:
+            try:
+                return await asyncio.shield(call), True
+            except asyncio.CancelledError:
+                if not call.cancelled():
+                    raise
+            return await compute(), False
+
+        call = self._calls[(loop, key)] = loop.create_future()
+        try:
+            result = await compute()
+        except asyncio.CancelledError:
+            call.cancel()
+            raise
+        except Exception as e:
+            call.set_exception(e)
+            # Waiters re-raise it; without any this avoids a "never retrieved" log
+            call.exception()
+            raise
+        else:
+            call.set_result(result)
+        finally:
+            del self._calls[(loop, key)]
+        return result, False
+
+    def in_flight(self):
+        return len(self._calls)
+
+
+def cache_lock_flight(cache, key, compute, lock_timeout=30, poll_interval=0.05):
+    """
+    Cross-process coalescing through ``cache``. The process that adds the
+    lock key computes and stores the result under ``key``; the others poll
+    for it until the lock disappears or ``lock_timeout`` passes, then fall
+    back to computing themselves. ``compute`` must store its own result.
+
+    Returns (result, shared); result is whatever ``compute`` returned or the
+    value found in the cache.
+    """
+    lock_key = f"lock:{key}"
+    if cache.add(lock_key, 1, timeout=lock_timeout):
+        try:
+            return compute(), False
+        finally:
+            cache.delete(lock_key)
+
+    deadline = time.monotonic() + lock_timeout
+    while time.monotonic() < deadline:
+        time.sleep(poll_interval)
+        value = cache.get(key)
+        if value is not None:
+            return value, True
+        if cache.get(lock_key) is None:
+            break
+    # The leader may have finished between the last two reads
+    value = cache.get(key)
+    if value is not None:
+        return value, True
+    return compute(), False
+
+
+def is_shared(cache):
+    """
+    Whether every worker process sees the same ``cache``. A LocMemCache is
+    private to its process and only counts with CACHE_ALLOW_PROCESS_LOCAL,
+    for single-process runs such as the test suite.
+    """
+    return not isinstance(cache, LocMemCache) or getattr(
+        settings, "CACHE_ALLOW_PROCESS_LOCAL", False
+    )
@@ -0,0 +1,1198 @@
+import asyncio
+import datetime
+import decimal
+import gzip
+import importlib
+import io
+import json
+import os
+import pstats
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+import uuid
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.views import APIView
+
+from collabdesk import (
+    cache,
+    compression,
+    database,
+    idempotency,
+    locks,
+    memory,
+    metrics,
+    profiling,
+    routers,
+    search,
+)
+from collabdesk.auth import Auth0TokenValidator
+from collabdesk.parsers import ORJSONParser
+from collabdesk.renderers import ORJSONRenderer
+from collabdesk.singleflight import (
+    AsyncSingleFlight,
+    SingleFlight,
+    cache_lock_flight,
+)
+from events.models import Event
+from events.serializers import EventSerializer
+from profiles.models import Profile
+from workspaces.models import Workspace, WorkspaceMember
+
+User = get_user_model()
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "responses": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "collabdesk-tests",
+    },
+}
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, CACHES=LOCMEM_CACHES)
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        caches["responses"].clear()
+        cache.stats.reset()
+        self.user = User.objects.create_user(username="cacheuser", password="x")
+        self.workspace = Workspace.objects.create(name="Cached", created_by=self.user)
+        WorkspaceMember.objects.create(workspace=self.workspace, user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def create_event(self, title="Meeting"):
+        start = timezone.now() + datetime.timedelta(hours=1)
+        return Event.objects.create(
+            title=title,
+            start_time=start,
+            end_time=start + datetime.timedelta(hours=1),
+            created_by=self.user,
+            workspace_id=self.workspace,
+        )
+
+    def test_normalize_params_ignores_order(self):
+        from django.http import QueryDict
+
+        self.assertEqual(
+            cache.normalize_params(QueryDict("b=2&a=1")),
+            cache.normalize_params(QueryDict("a=1&b=2")),
+        )
+
+    def test_events_list_served_from_cache_until_event_changes(self):
+        self.create_event("First")
+        url = reverse("events:event-list")
+        params = {"workspace_id": str(self.workspace.workspace_id)}
+
+        self.client.get(url, params)
+        with self.assertNumQueries(0):
+            response = self.client.get(url, params)
+        self.assertEqual(len(response.data), 1)
+
+        self.create_event("Second")
+        response = self.client.get(url, params)
+        self.assertEqual(len(response.data), 2)
+
+        snapshot = cache.stats.snapshot()["events-list"]
+        self.assertEqual(
+            snapshot, {"hits": 1, "misses": 2, "coalesced": 0, "hit_ratio": 1 / 3}
+        )
+
+    @override_settings(CACHE_ALLOW_PROCESS_LOCAL=False)
+    def test_process_local_backend_is_not_used(self):
+        # Other workers would never see this process's version bumps
+        self.create_event("First")
+        url = reverse("events:event-list")
+        params = {"workspace_id": str(self.workspace.workspace_id)}
+
+        self.client.get(url, params)
+        Event.objects.update(title="Changed")
+        self.assertEqual(self.client.get(url, params).data[0]["title"], "Changed")
+        self.assertEqual(cache.stats.snapshot(), {})
+
+    def test_workspace_information_invalidated_by_membership(self):
+        url = reverse("workspaces:workspace-information")
+        params = {
+            "workspace_id": str(self.workspace.workspace_id),
+            "user_id": str(self.user.id),
+        }
+        self.assertEqual(self.client.get(url, params).data["member_count"], 1)
+
+        other = User.objects.create_user(username="newmember", password="x")
+        WorkspaceMember.objects.create(workspace=self.workspace, user=other)
+        self.assertEqual(self.client.get(url, params).data["member_count"], 2)
+
+    def test_workspace_list_invalidated_by_new_workspace(self):
+        url = reverse("workspaces:workspace-name-list")
+        self.assertEqual(len(self.client.get(url).data), 1)
+        Workspace.objects.create(name="Another", created_by=self.user)
+        self.assertEqual(len(self.client.get(url).data), 2)
+
+    def test_profile_batch_invalidated_per_user(self):
+        Profile.objects.create(user_id=self.user, full_name="Before")
+        url = reverse("profiles:profile-list")
+        params = {"user_ids": str(self.user.id)}
+        self.client.get(url, params)
+
+        Profile.objects.filter(user_id=self.user).update(full_name="Ignored")
+        cached = self.client.get(url, params).data[str(self.user.id)]
+        self.assertEqual(cached["full_name"], "Before")
+
+        profile = Profile.objects.get(user_id=self.user)
+        profile.full_name = "After"
+        profile.save()
+        fresh = self.client.get(url, params).data[str(self.user.id)]
+        self.assertEqual(fresh["full_name"], "After")
+
+    def test_cache_stats_requires_staff(self):
+        url = reverse("cache-stats")
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save()
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class _SlowView(APIView):
+    """Counts how many times its handler actually runs"""
+
+    authentication_classes = []
+    permission_classes = []
+    calls = 0
+    calls_lock = threading.Lock()
+
+    @cache.cache_response("slow", lambda request, *args, **kwargs: ["slow"])
+    def get(self, request):
+        with self.calls_lock:
+            type(self).calls += 1
+        time.sleep(0.2)
+        return Response({"value": 42}, headers={"X-Answer": "42"})
+
+
+class _FlakyView(APIView):
+    """Fails its first call, slowly enough for others to wait on it"""
+
+    authentication_classes = []
+    permission_classes = []
+    calls = 0
+    calls_lock = threading.Lock()
+
+    @cache.cache_response("flaky", lambda request, *args, **kwargs: ["flaky"])
+    def get(self, request):
+        with self.calls_lock:
+            type(self).calls += 1
+            first = type(self).calls == 1
+        if first:
+            time.sleep(0.2)
+            return Response({"Error": "busy"}, status=503)
+        return Response({"value": 42})
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        caches["responses"].clear()
+        cache.stats.reset()
+        _SlowView.calls = 0
+        _FlakyView.calls = 0
+
+    def run_concurrently(self, func, count=20):
+        barrier = threading.Barrier(count)
+        results = [None] * count
+
+        def worker(i):
+            barrier.wait()
+            results[i] = func()
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_callers_share_one_computation(self):
+        flight = SingleFlight()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return "result"
+
+        results = self.run_concurrently(lambda: flight.do("key", compute))
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual({value for value, _ in results}, {"result"})
+        self.assertEqual(sum(shared for _, shared in results), 19)
+        self.assertEqual(flight.in_flight(), 0)
+
+    def test_leader_error_propagates_to_waiters(self):
+        flight = SingleFlight()
+
+        def compute():
+            time.sleep(0.1)
+            raise RuntimeError("boom")
+
+        def call():
+            try:
+                flight.do("key", compute)
+            except RuntimeError as e:
+                return str(e)
+
+        self.assertEqual(set(self.run_concurrently(call, count=5)), {"boom"})
+
+    def test_endpoint_stampede_runs_handler_once(self):
+        factory = APIRequestFactory()
+        view = _SlowView.as_view()
+
+        responses = self.run_concurrently(lambda: view(factory.get("/slow/")))
+
+        self.assertEqual(_SlowView.calls, 1)
+        self.assertTrue(all(r.status_code == 200 for r in responses))
+        self.assertTrue(all(r.data == {"value": 42} for r in responses))
+        self.assertTrue(all(r["X-Answer"] == "42" for r in responses))
+        snapshot = cache.stats.snapshot()["slow"]
+        self.assertEqual(snapshot["misses"] + snapshot["coalesced"], 20)
+        self.assertEqual(snapshot["misses"], 1)
+
+        cached = view(factory.get("/slow/"))
+        self.assertEqual(cached["X-Answer"], "42")
+        self.assertEqual(cache.stats.snapshot()["slow"]["hits"], 1)
+
+    def test_errors_are_not_shared_with_waiters(self):
+        factory = APIRequestFactory()
+        view = _FlakyView.as_view()
+
+        responses = self.run_concurrently(lambda: view(factory.get("/flaky/")), 5)
+
+        self.assertEqual(sorted(r.status_code for r in responses), [200] * 4 + [503])
+        self.assertEqual(_FlakyView.calls, 5)
+
+    def test_cache_lock_flight_waits_for_other_process(self):
+        shared_cache = caches["responses"]
+        shared_cache.add("lock:key", 1)
+
+        def other_process_finishes():
+            time.sleep(0.1)
+            shared_cache.set("key", "from-leader")
+            shared_cache.delete("lock:key")
+
+        threading.Thread(target=other_process_finishes).start()
+        result, shared = cache_lock_flight(
+            shared_cache, "key", lambda: "recomputed", poll_interval=0.01
+        )
+
+        self.assertEqual((result, shared), ("from-leader", True))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class MetricsTests(TestCase):
+    def setUp(self):
+        metrics.registry.reset()
+        self.user = User.objects.create_user(username="metricsuser", password="x")
+        self.workspace = Workspace.objects.create(name="Metered", created_by=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_middleware_records_latency_queries_and_size(self):
+        self.client.get(reverse("workspaces:workspace-name-list"))
+
+        view = "workspaces:workspace-name-list"
+        self.assertEqual(metrics.REQUEST_LATENCY.count(view=view, method="GET"), 1)
+        self.assertEqual(
+            metrics.REQUESTS.value(view=view, method="GET", status="2xx"), 1
+        )
+        self.assertEqual(metrics.DB_QUERIES.count(view=view), 1)
+        self.assertGreater(metrics.DB_SECONDS.value(view=view), 0)
+        self.assertEqual(metrics.RESPONSE_SIZE.count(view=view), 1)
+
+    def test_unresolved_paths_share_one_label(self):
+        self.client.get("/no/such/path/")
+        self.client.get("/another/missing/path/")
+        self.assertEqual(
+            metrics.REQUEST_LATENCY.count(view=metrics.UNMATCHED_VIEW, method="GET"), 2
+        )
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_metrics_endpoint_renders_prometheus_text(self):
+        self.client.get(reverse("workspaces:workspace-name-list"))
+        response = self.client.get(
+            reverse("metrics"), HTTP_AUTHORIZATION="Bearer secret"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn("# TYPE collabdesk_http_request_duration_seconds histogram", body)
+        self.assertIn(
+            'collabdesk_http_request_duration_seconds_bucket{view="workspaces:workspace-name-list",method="GET",le="+Inf"} 1',
+            body,
+        )
+        self.assertIn(
+            'collabdesk_http_requests_total{view="workspaces:workspace-name-list",method="GET",status="2xx"} 1',
+            body,
+        )
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_metrics_endpoint_token(self):
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+        response = self.client.get(
+            reverse("metrics"), HTTP_AUTHORIZATION="Bearer secret"
+        )
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(METRICS_TOKEN="")
+    def test_metrics_endpoint_closed_without_token(self):
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 404)
+        with override_settings(DEBUG=True):
+            self.assertEqual(self.client.get(reverse("metrics")).status_code, 200)
+
+    def test_label_sets_are_bounded(self):
+        counter = metrics.Counter("test_total", "Test.", ("view",))
+        for i in range(metrics.MAX_LABEL_SETS + 10):
+            counter.inc(view=f"view-{i}")
+        self.assertEqual(len(counter._series), metrics.MAX_LABEL_SETS + 1)
+        self.assertEqual(counter.value(view="other"), 10)
+
+    def test_auth_time_recorded_for_active_request(self):
+        request_metrics = metrics.RequestMetrics()
+        token = metrics._current.set(request_metrics)
+        try:
+            metrics.record_auth_time(0.25)
+        finally:
+            metrics._current.reset(token)
+        self.assertEqual(request_metrics.auth_seconds, 0.25)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ProfilingTests(TestCase):
+    def setUp(self):
+        self.output = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output, ignore_errors=True)
+        output_override = override_settings(
+            PROFILING_OUTPUT_DIR=self.output, PROFILING_SAMPLE_INTERVAL=0.001
+        )
+        output_override.enable()
+        self.addCleanup(output_override.disable)
+
+        self.user = User.objects.create_user(username="profiled", password="x")
+        Workspace.objects.create(name="Profiled", created_by=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("workspaces:workspace-name-list")
+
+    def test_requests_without_header_are_not_profiled(self):
+        response = self.client.get(self.url)
+        self.assertNotIn(profiling.PROFILE_ID_HEADER, response)
+        self.assertEqual(os.listdir(self.output), [])
+
+    def test_invalid_token_is_ignored(self):
+        response = self.client.get(self.url, HTTP_X_COLLABDESK_PROFILE="sample")
+        self.assertNotIn(profiling.PROFILE_ID_HEADER, response)
+
+    def test_signed_cprofile_request_writes_stats_and_queries(self):
+        token = profiling.make_token("cprofile")
+        response = self.client.get(self.url, HTTP_X_COLLABDESK_PROFILE=token)
+
+        profile_id = response[profiling.PROFILE_ID_HEADER]
+        base = os.path.join(self.output, profile_id)
+        pstats.Stats(f"{base}.prof")
+        with open(f"{base}.sql.json") as f:
+            queries = json.load(f)
+        self.assertEqual(len(queries), 1)
+        self.assertIn("workspaces_workspace", queries[0]["sql"])
+
+    def test_signed_sample_request_writes_collapsed_stacks(self):
+        sampler = profiling.StackSampler(threading.get_ident(), 0.001)
+        sampler.start()
+        time.sleep(0.05)
+        sampler.stop()
+        self.assertTrue(sampler.samples)
+        self.assertTrue(all(";" in stack for stack in sampler.samples))
+
+        token = profiling.make_token("sample")
+        response = self.client.get(self.url, HTTP_X_COLLABDESK_PROFILE=token)
+        profile_id = response[profiling.PROFILE_ID_HEADER]
+        self.assertTrue(
+            os.path.exists(os.path.join(self.output, f"{profile_id}.collapsed"))
+        )
+
+    def test_allow_listed_user_starts_profiling(self):
+        session = profiling.ProfilingSession("cprofile")
+        token = profiling._current.set(session)
+        try:
+            with override_settings(PROFILING_ALLOWED_USERS=["someone-else"]):
+                profiling.start_for_user(self.user)
+                self.assertFalse(session.active)
+            with override_settings(PROFILING_ALLOWED_USERS=["profiled"]):
+                profiling.start_for_user(self.user)
+                self.assertEqual(session.mode, "cprofile")
+        finally:
+            session.stop()
+            profiling._current.reset(token)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class MemoryTrackingTests(TestCase):
+    def setUp(self):
+        metrics.registry.reset()
+        self.user = User.objects.create_user(username="memoryuser", password="x")
+        Workspace.objects.create(name="Tracked", created_by=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("workspaces:workspace-name-list")
+
+    def test_track_reports_peak_and_top_sites(self):
+        with memory.track() as report:
+            blob = [bytearray(1024) for _ in range(1000)]
+            del blob
+            kept = [str(i) * 50 for i in range(2000)]
+
+        self.assertGreater(report.peak_bytes, 1000 * 1024)
+        self.assertTrue(report.top_sites)
+        self.assertTrue(report.top_sites[0][0].startswith("tests.py:"))
+        self.assertEqual(len(kept), 2000)
+
+    def test_nested_tracking_is_skipped(self):
+        with memory.track() as outer:
+            with memory.track() as inner:
+                self.assertIsNone(inner)
+        self.assertIsNotNone(outer)
+
+    def test_middleware_requires_signed_token(self):
+        response = self.client.get(self.url, HTTP_X_COLLABDESK_MEMORY="memory")
+        self.assertNotIn(memory.PEAK_HEADER, response)
+
+        token = profiling.make_token(memory.TOKEN_MODE)
+        response = self.client.get(self.url, HTTP_X_COLLABDESK_MEMORY=token)
+        self.assertGreater(int(response[memory.PEAK_HEADER]), 0)
+        self.assertIn(memory.TOP_SITES_HEADER, response)
+        self.assertEqual(
+            metrics.PEAK_MEMORY.count(view="workspaces:workspace-name-list"), 1
+        )
+
+
+class ORJSONTests(SimpleTestCase):
+    def payload(self):
+        moment = datetime.datetime(2025, 3, 4, 5, 6, 7, 891234, tzinfo=datetime.UTC)
+        return {
+            "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+            "created_at": moment,
+            "day": moment.date(),
+            "at": moment.time(),
+            "duration": datetime.timedelta(minutes=90),
+            "amount": decimal.Decimal("1.50"),
+            "label": gettext_lazy("Yes"),
+            "text": 'caf\u00e9 \u2028 \u2029 "quoted" <tag>',
+            "nested": [{"n": 1, "ok": True, "none": None}, (1, 2)],
+            1: "int key",
+        }
+
+    def test_output_matches_drf_json_renderer(self):
+        data = self.payload()
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_indent_falls_back_to_drf(self):
+        data = self.payload()
+        media_type = "application/json; indent=2"
+        self.assertEqual(
+            ORJSONRenderer().render(data, media_type),
+            JSONRenderer().render(data, media_type),
+        )
+
+    def test_none_renders_empty(self):
+        self.assertEqual(ORJSONRenderer().render(None), b"")
+
+    def test_parser_round_trip(self):
+        body = ORJSONRenderer().render({"title": "Stand-up", "n": [1, 2]})
+        self.assertEqual(
+            ORJSONParser().parse(io.BytesIO(body)), {"title": "Stand-up", "n": [1, 2]}
+        )
+
+    def test_parser_decodes_declared_charset(self):
+        body = '{"title": "caf\u00e9"}'.encode("latin-1")
+        data = ORJSONParser().parse(
+            io.BytesIO(body), parser_context={"encoding": "latin-1"}
+        )
+        self.assertEqual(data, {"title": "caf\u00e9"})
+
+    def test_parser_rejects_invalid_json(self):
+        for body in (b"{", b'{"x": NaN}'):
+            with self.subTest(body=body), self.assertRaises(ParseError):
+                ORJSONParser().parse(io.BytesIO(body))
+
+
+@override_settings(COMPRESSION_MIN_SIZE=100)
+class CompressionTests(SimpleTestCase):
+    BODY = json.dumps([{"title": f"Event {i}"} for i in range(50)]).encode()
+
+    def respond(self, accept_encoding, body=BODY, **headers):
+        def get_response(request):
+            return HttpResponse(body, content_type="application/json", headers=headers)
+
+        request = APIRequestFactory().get("/", HTTP_ACCEPT_ENCODING=accept_encoding)
+        return compression.CompressionMiddleware(get_response)(request)
+
+    def test_gzip_when_accepted(self):
+        response = self.respond("gzip", ETag='"abc"')
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), self.BODY)
+        self.assertEqual(response["Content-Length"], str(len(response.content)))
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(response["ETag"], 'W/"abc"')
+
+    @unittest.skipUnless(compression.brotli, "brotli is not installed")
+    def test_brotli_preferred_on_tie(self):
+        response = self.respond("gzip, br")
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(compression.brotli.decompress(response.content), self.BODY)
+
+    def test_identity_when_not_accepted(self):
+        for header in ("", "identity", "gzip;q=0", "deflate"):
+            with self.subTest(header=header):
+                response = self.respond(header)
+                self.assertFalse(response.has_header("Content-Encoding"))
+                self.assertEqual(response.content, self.BODY)
+                self.assertEqual(response["Vary"], "Accept-Encoding")
+
+    def test_small_and_encoded_responses_untouched(self):
+        small = self.respond("gzip", body=b"[]")
+        self.assertFalse(small.has_header("Content-Encoding"))
+        self.assertFalse(small.has_header("Vary"))
+        no_transform = self.respond("gzip", **{"Cache-Control": "no-transform"})
+        self.assertFalse(no_transform.has_header("Content-Encoding"))
+
+    def test_choose_encoding_honours_q_values(self):
+        self.assertEqual(
+            compression.choose_encoding("br;q=0.5, gzip;q=0.8", ("br", "gzip")),
+            "gzip",
+        )
+        self.assertEqual(compression.choose_encoding("*", ("br", "gzip")), "br")
+        self.assertIsNone(compression.choose_encoding("*;q=0", ("gzip",)))
+        self.assertIsNone(compression.choose_encoding("gzip;q=bad", ("gzip",)))
+
+    @override_settings(SECURE_SSL_REDIRECT=False, METRICS_TOKEN="secret")
+    def test_middleware_is_installed(self):
+        response = self.client.get(
+            "/metrics",
+            HTTP_ACCEPT_ENCODING="gzip",
+            HTTP_AUTHORIZATION="Bearer secret",
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+
+
+def stub_validate_token(self, token):
+    return {"sub": token, "email": f"{token}@example.com"}
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, CACHES=LOCMEM_CACHES)
+@mock.patch.object(Auth0TokenValidator, "validate_token", stub_validate_token)
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        caches["responses"].clear()
+        cache.stats.reset()
+        metrics.registry.reset()
+        self.user = User.objects.create(username="asyncviews")
+        self.workspace = Workspace.objects.create(name="Async", created_by=self.user)
+        now = timezone.now()
+        self.params = {
+            "workspace_id": str(self.workspace.workspace_id),
+            "start": now.isoformat(),
+            "end": (now + datetime.timedelta(days=1)).isoformat(),
+        }
+        self.url = reverse("events:event-window")
+        self.headers = {"Authorization": "Bearer asyncviews"}
+
+    async def test_metrics_follow_queries_onto_the_orm_thread(self):
+        response = await self.async_client.get(
+            self.url, self.params, headers=self.headers
+        )
+        self.assertEqual(response.status_code, 200)
+
+        view = "events:event-window"
+        self.assertEqual(metrics.DB_QUERIES.count(view=view), 1)
+        # get_or_create of the user, then the window query
+        self.assertGreaterEqual(metrics.DB_QUERIES._series[(view,)]["sum"], 2)
+        self.assertGreater(metrics.AUTH_SECONDS.value(view=view), 0)
+
+    async def test_responses_are_cached_per_workspace_version(self):
+        for _ in range(2):
+            await self.async_client.get(self.url, self.params, headers=self.headers)
+        self.assertEqual(
+            cache.stats.snapshot()["events-window"],
+            {"hits": 1, "misses": 1, "coalesced": 0, "hit_ratio": 0.5},
+        )
+
+        await sync_to_async(cache.bump)(f"workspace:{self.workspace.workspace_id}")
+        await self.async_client.get(self.url, self.params, headers=self.headers)
+        self.assertEqual(cache.stats.snapshot()["events-window"]["misses"], 2)
+
+    async def test_malformed_authorization_is_forbidden(self):
+        response = await self.async_client.get(
+            self.url, self.params, headers={"Authorization": "Token abc"}
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertIn("Bearer <token>", response.json()["detail"])
+
+
+class AsyncSingleFlightTests(SimpleTestCase):
+    def test_concurrent_calls_share_one_computation(self):
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return 42
+
+        async def run():
+            return await asyncio.gather(*(flight.do("k", compute) for _ in range(10)))
+
+        results = asyncio.run(run())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([value for value, _ in results], [42] * 10)
+        self.assertEqual(sum(shared for _, shared in results), 9)
+        self.assertEqual(flight.in_flight(), 0)
+
+    def test_leader_error_reaches_waiters(self):
+        flight = AsyncSingleFlight()
+
+        async def compute():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        async def run():
+            return await asyncio.gather(
+                *(flight.do("k", compute) for _ in range(3)), return_exceptions=True
+            )
+
+        results = asyncio.run(run())
+        self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+
+
+class DatabaseStrategyTests(SimpleTestCase):
+    BASE = {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": "collabdesk",
+        "OPTIONS": {"sslmode": "require"},
+    }
+
+    def configure(self, strategy, **env):
+        return database.configure(self.BASE, strategy, env=env)
+
+    def test_direct_leaves_settings_alone(self):
+        self.assertEqual(self.configure("direct"), self.BASE)
+        self.assertEqual(database.configure(self.BASE, env={}), self.BASE)
+
+    def test_persistent_reuses_checked_connections(self):
+        config = self.configure("persistent", DB_CONN_MAX_AGE="120")
+        self.assertEqual(config["CONN_MAX_AGE"], 120)
+        self.assertTrue(config["CONN_HEALTH_CHECKS"])
+        self.assertNotIn("DISABLE_SERVER_SIDE_CURSORS", config)
+
+    def test_pool_sizes_from_environment(self):
+        with mock.patch("importlib.util.find_spec", return_value=object()):
+            config = self.configure("pool", DB_POOL_MIN_SIZE="4", DB_POOL_MAX_SIZE="8")
+        self.assertEqual(config["CONN_MAX_AGE"], 0)
+        self.assertTrue(config["CONN_HEALTH_CHECKS"])
+        self.assertEqual(config["OPTIONS"]["pool"]["min_size"], 4)
+        self.assertEqual(config["OPTIONS"]["pool"]["max_size"], 8)
+        self.assertEqual(config["OPTIONS"]["sslmode"], "require")
+        # The caller's dict is not modified
+        self.assertNotIn("pool", self.BASE["OPTIONS"])
+
+    def test_pool_requires_psycopg_pool(self):
+        with mock.patch("importlib.util.find_spec", return_value=None):
+            with self.assertRaises(ImproperlyConfigured):
+                self.configure("pool")
+
+    def test_pgbouncer_disables_cursors_and_prepared_statements(self):
+        with mock.patch("importlib.util.find_spec", return_value=object()):
+            config = self.configure("pgbouncer")
+        self.assertTrue(config["DISABLE_SERVER_SIDE_CURSORS"])
+        self.assertIsNone(config["OPTIONS"]["prepare_threshold"])
+        self.assertEqual(config["CONN_MAX_AGE"], 600)
+
+    def test_unknown_strategy(self):
+        with self.assertRaises(ImproperlyConfigured):
+            database.configure(self.BASE, env={"DB_CONNECTION_STRATEGY": "magic"})
+
+
+@override_settings(
+    SECURE_SSL_REDIRECT=False, CACHES=LOCMEM_CACHES, DATABASE_REPLICAS=["replica"]
+)
+class ReplicaRoutingTests(TransactionTestCase):
+    # TestCase would run every request inside its own transaction
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        caches["default"].clear()
+        self.user = User.objects.create(username="replicas")
+        self.workspace = Workspace.objects.create(name="Primary", created_by=self.user)
+        start = timezone.now() + datetime.timedelta(hours=1)
+        self.event = Event.objects.create(
+            title="Primary",
+            start_time=start,
+            end_time=start + datetime.timedelta(hours=1),
+            created_by=self.user,
+            workspace_id=self.workspace,
+        )
+        # The same rows on the replica, which has not caught up on the title.
+        # Flushing skips the replica, whose tables the router never migrates.
+        self.addCleanup(User.objects.using("replica").all().delete)
+        User.objects.using("replica").create(id=self.user.id, username="replicas")
+        Workspace.objects.using("replica").create(
+            workspace_id=self.workspace.workspace_id,
+            name="Replica",
+            created_by=self.user,
+        )
+        Event.objects.using("replica").create(
+            event_id=self.event.event_id,
+            title="Replica",
+            start_time=start,
+            end_time=self.event.end_time,
+            created_by=self.user,
+            workspace_id=self.workspace,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("events:event-detail", args=[self.event.event_id])
+
+    def create_payload(self):
+        start = timezone.now() + datetime.timedelta(days=2)
+        return {
+            "title": "Written",
+            "start_time": start.isoformat(),
+            "end_time": (start + datetime.timedelta(hours=1)).isoformat(),
+            "event_type": "GROUP",
+            "created_by": self.user.id,
+            "workspace_id": str(self.workspace.workspace_id),
+        }
+
+    def title(self):
+        return self.client.get(self.url).data["title"]
+
+    def test_reads_outside_requests_use_the_primary(self):
+        self.assertEqual(Event.objects.get(pk=self.event.pk).title, "Primary")
+
+    def test_safe_requests_read_the_replica(self):
+        self.assertEqual(self.title(), "Replica")
+        self.assertNotIn(routers.PIN_COOKIE, self.client.cookies)
+
+    def test_writes_pin_the_client_to_the_primary(self):
+        response = self.client.post(
+            reverse("events:event-list"), self.create_payload(), format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertIn(routers.PIN_COOKIE, response.cookies)
+        self.assertEqual(self.title(), "Primary")
+
+        with override_settings(REPLICA_PIN_SECONDS=0):
+            with mock.patch("time.time", return_value=time.time() + 60):
+                self.assertEqual(self.title(), "Replica")
+
+    def test_tampered_pin_is_ignored(self):
+        self.client.cookies[routers.PIN_COOKIE] = "1:forged"
+        self.assertEqual(self.title(), "Replica")
+
+    def test_failed_write_does_not_pin(self):
+        response = self.client.post(reverse("events:event-list"), {}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn(routers.PIN_COOKIE, response.cookies)
+
+    def test_cache_pin_store_keys_by_token(self):
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION="Bearer a")
+        store = routers.CachePinStore()
+        self.assertFalse(store.is_pinned(request))
+        store.pin(request, HttpResponse())
+        self.assertTrue(store.is_pinned(request))
+        other = APIRequestFactory().get("/", HTTP_AUTHORIZATION="Bearer b")
+        self.assertFalse(store.is_pinned(other))
+
+        with override_settings(CACHE_ALLOW_PROCESS_LOCAL=False):
+            with self.assertRaises(ImproperlyConfigured):
+                routers.CachePinStore()
+
+    def test_transactions_read_the_primary(self):
+        state = routers.RoutingState()
+        token = routers._state.set(state)
+        self.addCleanup(routers._state.reset, token)
+
+        self.assertEqual(Event.objects.get(pk=self.event.pk).title, "Replica")
+        with transaction.atomic():
+            self.assertEqual(Event.objects.get(pk=self.event.pk).title, "Primary")
+
+    def test_primary_reads_override(self):
+        state = routers.RoutingState()
+        token = routers._state.set(state)
+        self.addCleanup(routers._state.reset, token)
+
+        @routers.primary_reads
+        def read():
+            return Event.objects.get(pk=self.event.pk).title
+
+        self.assertEqual(Event.objects.get(pk=self.event.pk).title, "Replica")
+        self.assertEqual(read(), "Primary")
+        self.assertEqual(state.overrides, 0)
+
+    def test_replicas_are_never_migrated(self):
+        router = routers.ReplicaRouter()
+        self.assertFalse(router.allow_migrate("replica", "events"))
+        self.assertIsNone(router.allow_migrate("default", "events"))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class SearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="searcher")
+        self.colleague = User.objects.create(username="colleague")
+        self.stranger = User.objects.create(username="stranger")
+        self.workspace = Workspace.objects.create(name="S", created_by=self.colleague)
+        self.elsewhere = Workspace.objects.create(name="E", created_by=self.stranger)
+        for user in (self.user, self.colleague):
+            WorkspaceMember.objects.create(workspace=self.workspace, user=user)
+        WorkspaceMember.objects.create(workspace=self.elsewhere, user=self.stranger)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("search")
+
+    def event(self, title, description="", workspace=None, **fields):
+        start = timezone.now()
+        return Event.objects.create(
+            title=title,
+            description=description,
+            location="",
+            start_time=start,
+            end_time=start + datetime.timedelta(hours=1),
+            created_by=self.colleague,
+            workspace_id=workspace or self.workspace,
+            **fields,
+        )
+
+    def search(self, q, **params):
+        response = self.client.get(self.url, {"q": q, **params})
+        self.assertEqual(response.status_code, 200, response.data)
+        return response
+
+    def titles(self, q, **params):
+        return [row["title"] for row in self.search(q, **params).data["results"]]
+
+    def test_ranks_title_matches_first(self):
+        self.event("Budget review", "quarterly planning")
+        self.event("Planning session")
+        self.event("Lunch")
+        self.assertEqual(self.titles("plan"), ["Planning session", "Budget review"])
+
+    def test_every_word_must_match_as_a_prefix(self):
+        self.event("Sprint planning", "backend team")
+        self.event("Sprint retro", "frontend team")
+        self.assertEqual(self.titles("spr back"), ["Sprint planning"])
+
+    def test_scoped_to_what_the_caller_may_see(self):
+        self.event("Offsite hidden", workspace=self.elsewhere)
+        self.event("Offsite private", is_private=True)
+        self.event("Offsite public")
+        self.assertEqual(self.titles("offsite"), ["Offsite public"])
+
+    def test_index_follows_updates_and_deletes(self):
+        event = self.event("Standup")
+        event.title = "Daily sync"
+        event.save()
+        self.assertEqual(self.titles("standup"), [])
+        self.assertEqual(self.titles("sync"), ["Daily sync"])
+        event.delete()
+        self.assertEqual(self.titles("sync"), [])
+
+    def test_cursor_pages_through_tied_ranks(self):
+        for i in range(7):
+            self.event(f"Review {i}")
+        seen, params = [], {"limit": 3}
+        while True:
+            response = self.search("review", **params)
+            seen += [row["title"] for row in response.data["results"]]
+            if response.data["next"] is None:
+                break
+            params["cursor"] = response.data["next"]
+        self.assertEqual(sorted(seen), [f"Review {i}" for i in range(7)])
+
+    def test_profiles_of_shared_workspaces(self):
+        Profile.objects.create(user_id=self.colleague, full_name="Ada Lovelace")
+        Profile.objects.create(user_id=self.stranger, full_name="Ada Byron")
+        response = self.search("ada", type="profiles")
+        self.assertEqual(
+            [row["full_name"] for row in response.data["results"]], ["Ada Lovelace"]
+        )
+        self.assertIn("rank", response.data["results"][0])
+
+    def test_invalid_parameters(self):
+        for params in (
+            {"q": "  ?! "},
+            {"q": "x", "type": "tasks"},
+            {"q": "x", "limit": "0"},
+            {"q": "x", "cursor": "forged"},
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(self.url, params).status_code, 400)
+
+    def test_postgres_query_uses_the_indexed_expressions(self):
+        match, rank = search._expressions(search.EVENTS, ["plan", "q"], "postgresql")
+        sql, params = match.expression.sql, match.expression.params
+        self.assertIn(search.EVENTS.vector_sql(qualify=True), sql)
+        self.assertIn('"events_event"."title" %% %s', sql)
+        self.assertEqual(params, ("plan:* & q:*", "plan q"))
+
+    def test_migrations_index_the_queried_expressions(self):
+        for spec, migration in (
+            (search.EVENTS, "events.migrations.0008_event_search"),
+            (search.PROFILES, "profiles.migrations.0003_profile_search"),
+        ):
+            with self.subTest(spec=spec.name):
+                ddl = " ".join(
+                    " ".join(sql.split())
+                    for sql in importlib.import_module(migration).FORWARD["postgresql"]
+                )
+                self.assertIn(f"(( {spec.vector_sql()} ))", ddl)
+                self.assertIn(f'("{spec.trigram}" gin_trgm_ops)', ddl)
+
+    @unittest.skipUnless(connection.vendor == "sqlite", "FTS5 mirror is SQLite only")
+    def test_fts_triggers_survive_migrations(self):
+        # Remaking a table for an ALTER on SQLite drops its triggers; a
+        # migration doing so must create them again
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+            triggers = {row[0] for row in cursor.fetchall()}
+        for spec in (search.EVENTS, search.PROFILES):
+            for event in ("insert", "delete", "update"):
+                self.assertIn(f"{spec.fts_table}_{event}", triggers)
+
+    @unittest.skipUnless(connection.vendor == "sqlite", "FTS5 mirror is SQLite only")
+    def test_fts_rows_are_keyed_by_primary_key(self):
+        # Not by rowid, which VACUUM may renumber on a UUID-keyed table
+        event = self.event("Keyed")
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT "key" FROM "events_event_fts"')
+            keys = [row[0] for row in cursor.fetchall()]
+        self.assertEqual(keys, [event.pk.hex])
+
+
+class LockTests(TestCase):
+    def test_lock_id_is_a_stable_signed_64_bit_hash(self):
+        self.assertEqual(locks.lock_id("a", 1), locks.lock_id("a", "1"))
+        self.assertNotEqual(locks.lock_id("a", 1), locks.lock_id("b", 1))
+        self.assertTrue(-(2**63) <= locks.lock_id("a", 1) < 2**63)
+
+    def test_keyed_locks_only_serialize_the_same_name(self):
+        keyed = locks.KeyedLocks()
+        held, release = threading.Event(), threading.Event()
+        order = []
+
+        def holder():
+            with keyed.hold("alice"):
+                held.set()
+                release.wait(5)
+                order.append("holder done")
+
+        def waiter(name):
+            with keyed.hold(name):
+                order.append(name)
+
+        thread = threading.Thread(target=holder)
+        thread.start()
+        held.wait(5)
+        # Another name is not blocked by alice's holder
+        waiter("bob")
+        alice = threading.Thread(target=waiter, args=("alice",))
+        alice.start()
+        alice.join(0.05)
+        self.assertTrue(alice.is_alive())
+        release.set()
+        thread.join()
+        alice.join()
+        self.assertEqual(order, ["bob", "holder done", "alice"])
+        self.assertEqual(len(keyed), 0)
+
+    def test_xact_lock_runs_the_block_in_a_transaction(self):
+        with locks.xact_lock("tests", 1):
+            self.assertTrue(connection.in_atomic_block)
+            user = User.objects.create(username="locker")
+            Workspace.objects.create(name="kept", created_by=user)
+            with self.assertRaises(ValueError):
+                with locks.xact_lock("tests", 2):
+                    Workspace.objects.create(name="rolled back", created_by=user)
+                    raise ValueError
+        self.assertEqual(
+            list(Workspace.objects.values_list("name", flat=True)), ["kept"]
+        )
+
+
+class _CountingPostView(APIView):
+    """Counts how many times its POST handler actually runs"""
+
+    authentication_classes = []
+    permission_classes = []
+    calls = 0
+    calls_lock = threading.Lock()
+
+    @idempotency.idempotent("counting")
+    def post(self, request):
+        with self.calls_lock:
+            type(self).calls += 1
+        time.sleep(0.2)
+        return Response({"created": type(self).calls}, status=201)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, CACHES=LOCMEM_CACHES)
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        # Also drops interval index versions left by earlier tests
+        for alias in LOCMEM_CACHES:
+            caches[alias].clear()
+        self.user = User.objects.create(username="retrier")
+        self.workspace = Workspace.objects.create(name="I", created_by=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("events:event-list")
+        start = timezone.now() + datetime.timedelta(days=2)
+        self.payload = {
+            "title": "Retry",
+            "start_time": start.isoformat(),
+            "end_time": (start + datetime.timedelta(hours=1)).isoformat(),
+            "event_type": "INDIVIDUAL",
+            "created_by": self.user.id,
+            "workspace_id": str(self.workspace.workspace_id),
+        }
+
+    def post(self, key, payload=None, client=None):
+        return (client or self.client).post(
+            self.url,
+            payload or self.payload,
+            format="json",
+            headers={"Idempotency-Key": key},
+        )
+
+    def test_retry_replays_the_first_response(self):
+        first = self.post("abc")
+        self.assertEqual(first.status_code, 201)
+        self.assertNotIn(idempotency.REPLAYED_HEADER, first)
+        with self.assertNumQueries(0):
+            retry = self.post("abc")
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry[idempotency.REPLAYED_HEADER], "true")
+        self.assertEqual(Event.objects.count(), 1)
+
+    def test_conflicts_and_validation_errors_are_replayed_too(self):
+        self.post("first")
+        self.assertEqual(self.post("second").status_code, 409)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.post("second").status_code, 409)
+        invalid = {**self.payload, "start_time": "soon"}
+        self.assertEqual(self.post("third", invalid).status_code, 400)
+        self.assertEqual(self.post("third", invalid).status_code, 400)
+
+    def test_reusing_a_key_with_another_body_is_refused(self):
+        self.post("abc")
+        response = self.post("abc", {**self.payload, "title": "Other"})
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Event.objects.count(), 1)
+
+    def test_keys_are_per_user_and_optional(self):
+        other = User.objects.create(username="other-retrier")
+        client = APIClient()
+        client.force_authenticate(user=other)
+        self.post("abc")
+        response = self.post("abc", {**self.payload, "created_by": other.id}, client)
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn(idempotency.REPLAYED_HEADER, response)
+        # Without the header every POST runs
+        for _ in range(2):
+            response = self.client.post(
+                self.url, {**self.payload, "event_type": "GROUP"}, format="json"
+            )
+            self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(Event.objects.count(), 4)
+
+    def test_overlong_keys_are_rejected(self):
+        self.assertEqual(self.post("k" * 256).status_code, 400)
+
+    def test_concurrent_duplicates_wait_for_the_first(self):
+        _CountingPostView.calls = 0
+        view = _CountingPostView.as_view()
+        factory = APIRequestFactory()
+        barrier = threading.Barrier(5)
+        responses = []
+
+        def worker():
+            request = factory.post(
+                "/counting/", {"a": 1}, format="json", HTTP_IDEMPOTENCY_KEY="same"
+            )
+            barrier.wait()
+            responses.append(view(request))
+
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(_CountingPostView.calls, 1)
+        self.assertEqual(
+            {(r.status_code, r.data["created"]) for r in responses}, {(201, 1)}
+        )
+        replayed = [r for r in responses if idempotency.REPLAYED_HEADER in r]
+        self.assertEqual(len(replayed), 4)
+
+    @override_settings(IDEMPOTENCY_LOCK_TIMEOUT=0.2)
+    def test_duplicates_of_a_stuck_attempt_get_409(self):
+        key = idempotency.build_key("events-create", self.user.pk, "abc")
+        fingerprint = idempotency.fingerprint(mock.Mock(data=self.payload))
+        caches["default"].add(
+            key, {"token": "first", "fingerprint": fingerprint, "status": None}
+        )
+        response = self.post("abc")
+        self.assertEqual(response.status_code, 409)
+        self.assertIn("in progress", response.data["Error"])
+        self.assertEqual(Event.objects.count(), 0)
+
+    def test_failed_attempts_release_the_key(self):
+        with mock.patch.object(
+            EventSerializer, "save", side_effect=RuntimeError("boom")
+        ):
+            with self.assertRaises(RuntimeError):
+                self.post("abc")
+        self.assertEqual(self.post("abc").status_code, 201)
+
+    @override_settings(CACHE_ALLOW_PROCESS_LOCAL=False)
+    def test_header_is_ignored_without_a_shared_cache(self):
+        self.assertEqual(
+            [w.id for w in idempotency.check_cache(None)], ["collabdesk.W001"]
+        )
+        payload = {**self.payload, "event_type": "GROUP"}
+        for _ in range(2):
+            with self.assertLogs("collabdesk.idempotency", "WARNING"):
+                response = self.post("abc", payload)
+            self.assertEqual(response.status_code, 201)
+            self.assertNotIn(idempotency.REPLAYED_HEADER, response)
+        self.assertEqual(Event.objects.count(), 2)
@@ -17,6 +17,8 @@ Including another URLconf
 
 from django.contrib import admin
 from django.urls import path, include
+from .views import CacheStatsView, SearchView
+from .metrics import metrics_view
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -24,4 +26,8 @@ urlpatterns = [
     path("api/workspaces/", include("workspaces.urls")),
     path("api/events/", include("events.urls")),
     path("api/profiles/", include("profiles.urls")),
+    path("api/tasks/", include("tasks.urls")),
+    path("api/search/", SearchView.as_view(), name="search"),
+    path("api/cache/stats/", CacheStatsView.as_view(), name="cache-stats"),
+    path("metrics", metrics_view, name="metrics"),
 ]
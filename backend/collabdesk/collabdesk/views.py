@@ -0,0 +1,84 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework import status
+from events import visibility
+from events.serializers import EventSerializer
+from profiles.models import Profile
+from profiles.serializers import ProfileSerializer
+from workspaces.models import WorkspaceMember
+from . import cache, search
+
+
+class CacheStatsView(APIView):
+    """Per-endpoint response cache hit ratios for this worker process"""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(cache.stats.snapshot())
+
+
+def shared_profiles(user_id):
+    """Profiles of everyone sharing a workspace with the user"""
+    return Profile.objects.filter(
+        user_id__in=WorkspaceMember.objects.filter(
+            workspace_id__in=visibility.member_workspaces(user_id)
+        ).values("user_id")
+    )
+
+
+# ?type= -> (search spec, rows a user may find, serializer)
+SEARCH_TYPES = {
+    "events": (search.EVENTS, visibility.visible_events, EventSerializer),
+    "profiles": (search.PROFILES, shared_profiles, ProfileSerializer),
+}
+
+
+class SearchView(APIView):
+    """
+    GET ?q=&type=events|profiles&limit=&cursor= - events the caller may see,
+    or profiles of people sharing a workspace with them, matching every
+    word of ``q`` as a prefix, best first: {"results", "next"}. Each result
+    carries its "rank"; ``next`` is the following page's cursor or null.
+    Supports ?fields=.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            spec, searchable, serializer_class = self.get_type(params)
+            limit = self.get_limit(params)
+            cursor = params.get("cursor")
+            queryset = search.search(
+                searchable(request.user.id),
+                spec,
+                params.get("q", ""),
+                search.decode_cursor(cursor) if cursor else None,
+            )
+        except ValueError as e:
+            return Response({"Error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = serializer_class.optimize_queryset(queryset, request)
+        rows, cursor = search.page(queryset, limit)
+        data = serializer_class(rows, many=True, context={"request": request}).data
+        for row, item in zip(rows, data):
+            item["rank"] = row.search_rank
+        return Response({"results": data, "next": cursor})
+
+    def get_type(self, params):
+        try:
+            return SEARCH_TYPES[params.get("type", "events")]
+        except KeyError:
+            raise ValueError(f"type must be one of {', '.join(SEARCH_TYPES)}")
+
+    def get_limit(self, params):
+        try:
+            limit = int(params.get("limit", search.DEFAULT_LIMIT))
+        except ValueError:
+            raise ValueError("limit must be an integer")
+        if not 1 <= limit <= search.MAX_LIMIT:
+            raise ValueError(f"limit must be between 1 and {search.MAX_LIMIT}")
+        return limit
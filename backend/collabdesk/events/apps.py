@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.core import checks
 
 
 class EventsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "events"
+
+    def ready(self):
+        from collabdesk import idempotency
+        from . import signals  # noqa: F401
+
+        # Event creation is the main Idempotency-Key user
+        checks.register(idempotency.check_cache, checks.Tags.caches)
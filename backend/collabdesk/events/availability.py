@@ -0,0 +1,109 @@
+"""
+Busy time: a user's events merged with their unavailability blocks.
+
+Weekly blocks are stored once and expanded into occurrences only for the
+window being asked about. Candidates for a window come from one indexed
+range query on (user, start_time, series_end), and ``busy_intervals``
+answers for any number of users with one query per table.
+"""
+
+import datetime
+from collections import defaultdict
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Event, Unavailability
+
+WEEK = datetime.timedelta(weeks=1)
+
+
+def shift_weeks(value, weeks):
+    """``value`` moved by whole weeks, keeping its TIME_ZONE wall-clock time"""
+    local = timezone.localtime(value).replace(tzinfo=None)
+    return timezone.make_aware(local + weeks * WEEK)
+
+
+def occurrences(block, start, end):
+    """The (start, end) occurrences of ``block`` overlapping [start, end)"""
+    if block.recurrence != Unavailability.Recurrence.WEEKLY:
+        if block.start_time < end and block.end_time > start:
+            yield block.start_time, block.end_time
+        return
+
+    # Jump close to the window; DST can put the estimate a week late
+    week = max(0, (start - block.end_time) // WEEK)
+    week = max(0, week - 1)
+    while True:
+        occurrence_start = shift_weeks(block.start_time, week)
+        if occurrence_start >= end or (
+            block.repeat_until is not None and occurrence_start >= block.repeat_until
+        ):
+            return
+        occurrence_end = shift_weeks(block.end_time, week)
+        if occurrence_end > start:
+            yield occurrence_start, occurrence_end
+        week += 1
+
+
+def series_end(block):
+    """End of the block's last occurrence, or None if it repeats forever"""
+    if block.recurrence != Unavailability.Recurrence.WEEKLY:
+        return block.end_time
+    if block.repeat_until is None:
+        return None
+    last = None
+    for last in occurrences(block, block.start_time, block.repeat_until):
+        pass
+    return last[1] if last else block.end_time
+
+
+def unavailability_in(user_ids, start, end):
+    """Blocks of ``user_ids`` that may have an occurrence in [start, end)"""
+    return Unavailability.objects.filter(
+        Q(series_end__isnull=True) | Q(series_end__gt=start),
+        user_id__in=user_ids,
+        start_time__lt=end,
+    )
+
+
+def merge(intervals):
+    """Sort and coalesce overlapping or touching intervals"""
+    merged = []
+    for interval_start, interval_end in sorted(intervals):
+        if merged and interval_start <= merged[-1][1]:
+            if interval_end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], interval_end)
+        else:
+            merged.append((interval_start, interval_end))
+    return merged
+
+
+def busy_intervals(user_ids, start, end):
+    """
+    Map each user id to their merged busy intervals within [start, end),
+    clipped to the window. Two queries however many users are asked for.
+    """
+    intervals = defaultdict(list)
+    events = Event.objects.filter(
+        created_by_id__in=user_ids, start_time__lt=end, end_time__gt=start
+    ).values_list("created_by_id", "start_time", "end_time")
+    for user_id, event_start, event_end in events:
+        intervals[user_id].append((event_start, event_end))
+    for block in unavailability_in(user_ids, start, end):
+        intervals[block.user_id].extend(occurrences(block, start, end))
+
+    return {
+        user_id: [
+            (max(s, start), min(e, end)) for s, e in merge(intervals.get(user_id, []))
+        ]
+        for user_id in user_ids
+    }
+
+
+def is_unavailable(user_id, start, end):
+    """Whether any of the user's unavailability blocks overlaps [start, end)"""
+    return any(
+        next(occurrences(block, start, end), None)
+        for block in unavailability_in([user_id], start, end)
+    )
@@ -0,0 +1,227 @@
+"""
+Calendar views bucketed per local day of the viewer's time zone.
+
+The database converts each event's start and end to local dates
+(``TruncDate`` with ``tzinfo``, i.e. ``AT TIME ZONE`` on Postgres) in the
+single query that loads the window; multi-day events are then split into
+one entry per day they cover. Event details are sent once, days only
+reference them, so a month of a busy workspace stays a small payload.
+
+Heatmaps go further and only send counts per local day and hour: events
+count where they start, their booked minutes are spread over every hour
+they overlap.
+"""
+
+import datetime
+import uuid
+import zoneinfo
+
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from . import visibility
+from .models import Event
+
+VIEWS = ("week", "month")
+# Longest range a single heatmap may cover
+HEATMAP_MAX_DAYS = 366
+# Fields of each event sent alongside the day buckets
+CALENDAR_FIELDS = ("event_id", "title", "event_type", "location")
+
+
+def parse_params(query_params):
+    """
+    Return (workspace_id, view, first, last, tz) from ?workspace_id=&view=
+    &date=&tz=, where [first, last) are the local dates shown. Raises
+    ValueError.
+    """
+    try:
+        workspace_id = uuid.UUID(query_params.get("workspace_id", ""))
+    except ValueError:
+        raise ValueError("workspace_id must be a UUID")
+    tz = parse_timezone(query_params.get("tz"))
+    view = query_params.get("view", "week")
+    if "date" in query_params:
+        day = parse_date(query_params["date"])
+        if day is None:
+            raise ValueError("date must be YYYY-MM-DD")
+    else:
+        day = timezone.localdate(timezone=tz)
+    return (workspace_id, view, *view_range(view, day), tz)
+
+
+def parse_timezone(name):
+    try:
+        return zoneinfo.ZoneInfo(name) if name else timezone.get_default_timezone()
+    except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown time zone {name!r}")
+
+
+def view_range(view, day):
+    """First and last+1 local date of the week (from Monday) or month of ``day``"""
+    if view == "week":
+        first = day - datetime.timedelta(days=day.weekday())
+        return first, first + datetime.timedelta(days=7)
+    if view == "month":
+        first = day.replace(day=1)
+        return first, (first + datetime.timedelta(days=32)).replace(day=1)
+    raise ValueError(f"view must be one of {', '.join(VIEWS)}")
+
+
+def local_midnight(day, tz):
+    return datetime.datetime.combine(day, datetime.time(), tzinfo=tz)
+
+
+def calendar_rows(workspace_id, first, last, tz, user_id):
+    """
+    Events ``user_id`` may see overlapping [first, last) local days, with
+    local dates
+    """
+    return (
+        Event.objects.filter(
+            visibility.privacy_filter(user_id),
+            workspace_id=workspace_id,
+            start_time__lt=local_midnight(last, tz),
+            end_time__gt=local_midnight(first, tz),
+        )
+        .annotate(
+            start_day=TruncDate("start_time", tzinfo=tz),
+            end_day=TruncDate("end_time", tzinfo=tz),
+        )
+        .values(*CALENDAR_FIELDS, "start_time", "end_time", "start_day", "end_day")
+        .order_by("start_time", "event_id")
+    )
+
+
+def _clock(value, tz):
+    return value.astimezone(tz).strftime("%H:%M")
+
+
+def bucket(rows, first, last, tz):
+    """
+    Return (events, days): event details keyed by id, and every local day
+    in [first, last) mapped to the pieces of events falling on it, each a
+    {"event_id", "start", "end"} with "HH:MM" local times ("24:00" when it
+    runs past midnight).
+    """
+    days = {}
+    day = first
+    while day < last:
+        days[day.isoformat()] = []
+        day += datetime.timedelta(days=1)
+
+    events = {}
+    for row in rows:
+        start_day = row["start_day"]
+        end_day = last_day = row["end_day"]
+        # An event ending exactly at midnight does not touch that day
+        if last_day > start_day and row["end_time"] == local_midnight(last_day, tz):
+            last_day -= datetime.timedelta(days=1)
+
+        event_id = str(row["event_id"])
+        events[event_id] = {
+            **{name: row[name] for name in CALENDAR_FIELDS[1:]},
+            "start_time": row["start_time"].astimezone(tz),
+            "end_time": row["end_time"].astimezone(tz),
+        }
+        day = max(start_day, first)
+        while day <= last_day and day < last:
+            days[day.isoformat()].append(
+                {
+                    "event_id": event_id,
+                    "start": (
+                        _clock(row["start_time"], tz) if day == start_day else "00:00"
+                    ),
+                    "end": _clock(row["end_time"], tz) if day == end_day else "24:00",
+                }
+            )
+            day += datetime.timedelta(days=1)
+    return events, days
+
+
+def parse_heatmap_params(query_params):
+    """
+    Return (workspace_id, first, last, tz) from ?workspace_id=&start=&end=
+    &tz= with inclusive YYYY-MM-DD dates; [first, last) are the local dates
+    covered. Raises ValueError.
+    """
+    try:
+        workspace_id = uuid.UUID(query_params.get("workspace_id", ""))
+    except ValueError:
+        raise ValueError("workspace_id must be a UUID")
+    tz = parse_timezone(query_params.get("tz"))
+    days = []
+    for name in ("start", "end"):
+        day = parse_date(query_params.get(name, ""))
+        if day is None:
+            raise ValueError(f"{name} must be YYYY-MM-DD")
+        days.append(day)
+    first, last = days[0], days[1] + datetime.timedelta(days=1)
+    if last <= first:
+        raise ValueError("end must not be before start")
+    if (last - first).days > HEATMAP_MAX_DAYS:
+        raise ValueError(f"The range may span at most {HEATMAP_MAX_DAYS} days")
+    return workspace_id, first, last, tz
+
+
+def heatmap_rows(workspace_id, first, last, tz, user_id):
+    """
+    (start_time, end_time) of the events ``user_id`` may see overlapping
+    [first, last) local days
+    """
+    return Event.objects.filter(
+        visibility.privacy_filter(user_id),
+        workspace_id=workspace_id,
+        start_time__lt=local_midnight(last, tz),
+        end_time__gt=local_midnight(first, tz),
+    ).values_list("start_time", "end_time")
+
+
+def _hours(start, end, tz):
+    """(local date, hour, seconds) for each local hour [start, end) covers"""
+    start = start.astimezone(datetime.timezone.utc)
+    while start < end:
+        local = start.astimezone(tz)
+        into = local - local.replace(minute=0, second=0, microsecond=0)
+        step = min(datetime.timedelta(hours=1) - into, end - start)
+        yield local.date(), local.hour, step.total_seconds()
+        start += step
+
+
+def heatmap(rows, first, last, tz):
+    """
+    Days with booked time, each {"events", "minutes", "events_by_hour",
+    "minutes_by_hour"} with 24-entry hourly lists. Events count towards the
+    day and hour they start in; their minutes are split over the hours they
+    overlap, clipped to [first, last).
+    """
+    window_start, window_end = local_midnight(first, tz), local_midnight(last, tz)
+    starts, seconds = {}, {}
+    for start, end in rows:
+        if start >= window_start:
+            local = start.astimezone(tz)
+            slot = (local.date(), local.hour)
+            starts[slot] = starts.get(slot, 0) + 1
+        for day, hour, span in _hours(
+            max(start, window_start), min(end, window_end), tz
+        ):
+            seconds[day, hour] = seconds.get((day, hour), 0) + span
+
+    days = {}
+    for day, hour in sorted(starts.keys() | seconds.keys()):
+        minutes = round(seconds.get((day, hour), 0) / 60)
+        bucket = days.setdefault(
+            day.isoformat(),
+            {
+                "events": 0,
+                "minutes": 0,
+                "events_by_hour": [0] * 24,
+                "minutes_by_hour": [0] * 24,
+            },
+        )
+        bucket["events"] += starts.get((day, hour), 0)
+        bucket["minutes"] += minutes
+        bucket["events_by_hour"][hour] += starts.get((day, hour), 0)
+        bucket["minutes_by_hour"][hour] += minutes
+    return days
@@ -0,0 +1,347 @@
+"""
+In-memory interval indexes of the public events of each workspace, for the
+layout view. Private events depend on who is asking (events/visibility.py),
+so ``visible_overlapping`` adds the caller's from a query instead.
+
+``IntervalIndex`` is a treap ordered by start whose nodes carry the latest
+end below them, so "what overlaps [a, b)" visits only subtrees that contain
+a match: O(log n) per reported interval instead of a scan or a query.
+Updates copy the O(log n) nodes on their path and share the rest, so they
+never disturb a reader still holding the previous copy.
+
+``indexes`` holds the indexes of recently used scopes in this process.
+Each is stamped with the version of its ``intervals:...`` scope in the
+response cache, so checking freshness is one cache read and any worker's
+write invalidates it. That only holds when every worker shares the cache
+(see ``is_shared``); otherwise nothing is kept and ``visible_overlapping``
+queries just the requested window. A write made outside a transaction
+patches the local index when no other write slipped in between; writes
+inside a transaction just invalidate, before the commit and again after it.
+
+Indexes may trail a concurrent commit by one version check, which is fine
+for display but not for enforcing rules: booking conflicts are checked in
+the database (events/serializers.py).
+"""
+
+import heapq
+import random
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from collabdesk import cache
+from collabdesk.routers import use_primary
+from collabdesk.singleflight import is_shared
+from . import visibility
+from .models import Event
+
+
+def workspace_scope(workspace_id):
+    return f"intervals:workspace:{workspace_id}"
+
+
+class _Node:
+    """Treap node; never changed once reachable from an index"""
+
+    __slots__ = ("item", "priority", "left", "right", "max_end", "size")
+
+    def __init__(self, item, priority, left=None, right=None):
+        self.item = item
+        self.priority = priority
+        self.left = left
+        self.right = right
+        self.update()
+
+    def update(self):
+        self.max_end, self.size = self.item[1], 1
+        for child in (self.left, self.right):
+            if child is not None:
+                self.max_end = max(self.max_end, child.max_end)
+                self.size += child.size
+
+    def copy(self, **children):
+        return _Node(
+            self.item,
+            self.priority,
+            children.get("left", self.left),
+            children.get("right", self.right),
+        )
+
+
+def _build(items):
+    """A treap of sorted ``items`` in O(n), by a stack of its right spine"""
+    spine = []
+    for item in items:
+        node = _Node(item, random.random())
+        last = None
+        while spine and spine[-1].priority < node.priority:
+            last = spine.pop()
+        node.left = last
+        if spine:
+            spine[-1].right = node
+        spine.append(node)
+    if not spine:
+        return None
+    # Children before parents for the subtree aggregates
+    order, pending = [], [spine[0]]
+    while pending:
+        node = pending.pop()
+        if node is not None:
+            order.append(node)
+            pending.extend((node.left, node.right))
+    for node in reversed(order):
+        node.update()
+    return spine[0]
+
+
+def _split(node, item):
+    """(nodes before ``item``, the rest), copying only the path to it"""
+    if node is None:
+        return None, None
+    if node.item < item:
+        left, right = _split(node.right, item)
+        return node.copy(right=left), right
+    left, right = _split(node.left, item)
+    return left, node.copy(left=right)
+
+
+def _merge(left, right):
+    if left is None or right is None:
+        return left or right
+    if left.priority > right.priority:
+        return left.copy(right=_merge(left.right, right))
+    return right.copy(left=_merge(left, right.left))
+
+
+def _insert(node, new):
+    if node is None or new.priority > node.priority:
+        left, right = _split(node, new.item)
+        return new.copy(left=left, right=right)
+    if new.item < node.item:
+        return node.copy(left=_insert(node.left, new))
+    return node.copy(right=_insert(node.right, new))
+
+
+def _remove(node, item):
+    if node is None:
+        return None
+    if node.item == item:
+        return _merge(node.left, node.right)
+    if item < node.item:
+        return node.copy(left=_remove(node.left, item))
+    return node.copy(right=_remove(node.right, item))
+
+
+class IntervalIndex:
+    """Immutable set of half-open (start, end, key) intervals"""
+
+    def __init__(self, items=()):
+        items = sorted(items)
+        self._root = _build(items)
+        # Passed on to the copy ``replace`` returns, see there
+        self._by_key = {item[2]: item for item in items}
+
+    @classmethod
+    def _from_root(cls, root, by_key):
+        index = cls.__new__(cls)
+        index._root, index._by_key = root, by_key
+        return index
+
+    def __len__(self):
+        return self._root.size if self._root is not None else 0
+
+    def __iter__(self):
+        stack, node = [], self._root
+        while stack or node is not None:
+            if node is not None:
+                stack.append(node)
+                node = node.left
+                continue
+            node = stack.pop()
+            yield node.item
+            node = node.right
+
+    def replace(self, key, interval=None):
+        """
+        A copy with ``key`` removed and, unless None, re-added at
+        ``interval``. The copy shares all but O(log n) nodes with this
+        index and takes over its key lookup, so replacing in a superseded
+        copy again first rebuilds that in O(n).
+        """
+        by_key = self._by_key
+        if by_key is None:
+            by_key = {item[2]: item for item in self}
+        self._by_key = None
+
+        root = self._root
+        old = by_key.pop(key, None)
+        if old is not None:
+            root = _remove(root, old)
+        if interval is not None:
+            item = by_key[key] = (*interval, key)
+            root = _insert(root, _Node(item, random.random()))
+        return IntervalIndex._from_root(root, by_key)
+
+    def overlapping(self, start, end):
+        """Intervals overlapping [start, end), ordered by start"""
+        found = []
+        stack, node = [], self._root
+        while stack or node is not None:
+            if node is not None:
+                # Nothing below ends after ``start``
+                if node.max_end <= start:
+                    node = None
+                    continue
+                stack.append(node)
+                node = node.left
+                continue
+            node = stack.pop()
+            # Neither does anything after this start before ``end``
+            if node.item[0] >= end:
+                break
+            if node.item[1] > start:
+                found.append(node.item)
+            node = node.right
+        return found
+
+    def overlaps(self, start, end, exclude=None):
+        return any(item[2] != exclude for item in self.overlapping(start, end))
+
+
+def groups(items):
+    """Split intervals into groups of transitively overlapping ones, by start"""
+    found, group, group_end = [], [], None
+    for item in sorted(items):
+        if group and item[0] < group_end:
+            group.append(item)
+            group_end = max(group_end, item[1])
+            continue
+        if group:
+            found.append(group)
+        group, group_end = [item], item[1]
+    if group:
+        found.append(group)
+    return found
+
+
+def collisions(items):
+    """The groups of two or more events that overlap each other"""
+    return [group for group in groups(items) if len(group) > 1]
+
+
+def lanes(items):
+    """
+    Side-by-side layout: {key: (lane, lanes)} where ``lane`` is the column
+    an interval takes within its group and ``lanes`` how many columns that
+    group needs. Each interval takes the lowest column free at its start.
+    """
+    layout = {}
+    for group in groups(items):
+        busy, free, used = [], [], 0
+        placed = []
+        for item_start, item_end, key in group:
+            while busy and busy[0][0] <= item_start:
+                heapq.heappush(free, heapq.heappop(busy)[1])
+            lane = heapq.heappop(free) if free else used
+            used = max(used, lane + 1)
+            heapq.heappush(busy, (item_end, lane))
+            placed.append((key, lane))
+        for key, lane in placed:
+            layout[key] = (lane, used)
+    return layout
+
+
+class IndexRegistry:
+    """LRU of version-stamped indexes, shared by this process's threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def keeps_indexes(self):
+        return is_shared(cache.get_cache())
+
+    def get(self, scope, load):
+        """
+        The index for ``scope``, rebuilt from ``load()`` (an iterable of
+        (start, end, key)) when this process has no current copy. Without a
+        shared cache other workers' writes go unseen, so nothing is kept.
+        """
+        if not self.keeps_indexes():
+            with use_primary():
+                return IntervalIndex(load())
+
+        version = cache.get_versions([scope])[scope]
+        with self._lock:
+            entry = self._entries.get(scope)
+            if entry is not None and version is not None and entry[0] == version:
+                self._entries.move_to_end(scope)
+                return entry[1]
+
+        # A lagging replica would be stamped with the current version
+        with use_primary():
+            index = IntervalIndex(load())
+        if version is not None:
+            with self._lock:
+                self._entries[scope] = (version, index)
+                self._entries.move_to_end(scope)
+                while len(self._entries) > _max_indexes():
+                    self._entries.popitem(last=False)
+        return index
+
+    def invalidate(self, scope):
+        cache.incr_version(scope)
+
+    def apply(self, scope, key, interval=None):
+        """Record a committed write of ``key`` (None for a delete)"""
+        version = cache.incr_version(scope)
+        with self._lock:
+            entry = self._entries.pop(scope, None)
+            # Only patch an index that saw every write before this one
+            if entry is None or version is None or entry[0] != version - 1:
+                return
+            self._entries[scope] = (version, entry[1].replace(key, interval))
+
+    def record(self, scope, key, interval=None):
+        if connection.in_atomic_block:
+            self.invalidate(scope)
+            transaction.on_commit(lambda: self.invalidate(scope))
+        else:
+            self.apply(scope, key, interval)
+
+
+def _max_indexes():
+    return getattr(settings, "INTERVAL_INDEX_MAX_SCOPES", 512)
+
+
+indexes = IndexRegistry()
+
+
+def workspace_index(workspace_id):
+    return indexes.get(
+        workspace_scope(workspace_id),
+        lambda: Event.objects.filter(
+            workspace_id=workspace_id, is_private=False
+        ).values_list("start_time", "end_time", "event_id"),
+    )
+
+
+def visible_overlapping(workspace_id, user_id, start, end):
+    """Intervals of the events ``user_id`` may see overlapping [start, end)"""
+    window = Event.objects.filter(
+        visibility.privacy_filter(user_id),
+        workspace_id=workspace_id,
+        start_time__lt=end,
+        end_time__gt=start,
+    ).values_list("start_time", "end_time", "event_id")
+    if not indexes.keeps_indexes():
+        # An index would be rebuilt from every public event for this call
+        return sorted(window)
+    private = window.filter(is_private=True)
+    return sorted([*workspace_index(workspace_id).overlapping(start, end), *private])
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:22
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0004_event_created_by_event_workspace_id"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Unavailability",
+            fields=[
+                (
+                    "unavailability_id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("reason", models.CharField(blank=True, default="", max_length=100)),
+                ("start_time", models.DateTimeField()),
+                ("end_time", models.DateTimeField()),
+                (
+                    "recurrence",
+                    models.CharField(
+                        choices=[("none", "Does not repeat"), ("weekly", "Weekly")],
+                        default="none",
+                        max_length=10,
+                    ),
+                ),
+                ("repeat_until", models.DateTimeField(blank=True, null=True)),
+                (
+                    "series_end",
+                    models.DateTimeField(blank=True, editable=False, null=True),
+                ),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="unavailability",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["user", "start_time", "series_end"],
+                        name="unavailability_range_idx",
+                    )
+                ],
+            },
+        ),
+    ]
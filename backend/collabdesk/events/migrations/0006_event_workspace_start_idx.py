@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0005_unavailability"),
+        ("workspaces", "0001_initial_old"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["workspace_id", "start_time", "event_id"],
+                name="event_workspace_start_idx",
+            ),
+        ),
+    ]
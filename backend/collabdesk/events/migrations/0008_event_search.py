@@ -0,0 +1,95 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:02
+
+from django.db import migrations
+
+# The DDL is spelled out rather than built by collabdesk.search, so later
+# changes there never alter what this migration does. The index expression
+# must stay identical to search.EVENTS.vector_sql() for queries to use it.
+# The PostgreSQL indexes are built CONCURRENTLY so writes to events_event
+# go on meanwhile, which needs a migration outside a transaction.
+FORWARD = {
+    "postgresql": [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS event_search_idx
+        ON "events_event" USING gin ((
+            setweight(to_tsvector('simple', coalesce("title", '')), 'A')
+            || setweight(to_tsvector('simple', coalesce("description", '')), 'B')
+            || setweight(to_tsvector('simple', coalesce("location", '')), 'C')
+        ))
+        """,
+        """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS event_trigram_idx
+        ON "events_event" USING gin ("title" gin_trgm_ops)
+        """,
+    ],
+    # FTS rows carry the event's primary key; the implicit rowid of a table
+    # keyed by UUID may be renumbered by VACUUM
+    "sqlite": [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS "events_event_fts" USING fts5(
+            "key" UNINDEXED, "title", "description", "location",
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS "events_event_fts_insert"
+        AFTER INSERT ON "events_event" BEGIN
+            INSERT INTO "events_event_fts"("key", "title", "description", "location")
+            VALUES (new."event_id", new."title", new."description", new."location");
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS "events_event_fts_delete"
+        AFTER DELETE ON "events_event" BEGIN
+            DELETE FROM "events_event_fts" WHERE "key" = old."event_id";
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS "events_event_fts_update"
+        AFTER UPDATE ON "events_event" BEGIN
+            DELETE FROM "events_event_fts" WHERE "key" = old."event_id";
+            INSERT INTO "events_event_fts"("key", "title", "description", "location")
+            VALUES (new."event_id", new."title", new."description", new."location");
+        END
+        """,
+        """
+        INSERT INTO "events_event_fts"("key", "title", "description", "location")
+        SELECT "event_id", "title", "description", "location" FROM "events_event"
+        """,
+    ],
+}
+
+BACKWARD = {
+    "postgresql": [
+        "DROP INDEX CONCURRENTLY IF EXISTS event_search_idx",
+        "DROP INDEX CONCURRENTLY IF EXISTS event_trigram_idx",
+    ],
+    "sqlite": [
+        'DROP TRIGGER IF EXISTS "events_event_fts_insert"',
+        'DROP TRIGGER IF EXISTS "events_event_fts_delete"',
+        'DROP TRIGGER IF EXISTS "events_event_fts_update"',
+        'DROP TABLE IF EXISTS "events_event_fts"',
+    ],
+}
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, ()):
+            schema_editor.execute(sql)
+
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("events", "0007_event_participants"),
+    ]
+
+    operations = [
+        migrations.RunPython(run(FORWARD), run(BACKWARD)),
+    ]
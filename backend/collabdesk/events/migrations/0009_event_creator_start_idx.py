@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("events", "0008_event_search"),
+        ("workspaces", "0002_member_user_workspace_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["created_by", "start_time"], name="event_creator_start_idx"
+            ),
+        ),
+    ]
@@ -29,8 +29,129 @@ class Event(models.Model):
         on_delete=models.CASCADE,
         default=uuid.UUID("cdb5abfe-dc99-4394-ac0e-e50a2f21d960"),
     )
+    # Private events are only visible to their creator, participants and
+    # the workspace owner (events/visibility.py)
+    is_private = models.BooleanField(default=False)
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        indexes = [
+            # Window, calendar and upcoming-feed range scans per workspace
+            models.Index(
+                fields=["workspace_id", "start_time", "event_id"],
+                name="event_workspace_start_idx",
+            ),
+            # Double-booking checks per creator (events/serializers.py)
+            models.Index(
+                fields=["created_by", "start_time"],
+                name="event_creator_start_idx",
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Workspace whose caches and interval index hold the event (signals.py)
+        instance._loaded_workspace = instance.__dict__.get("workspace_id_id")
+        return instance
+
     def __str__(self):
         return self.title
+
+
+class EventParticipant(models.Model):
+    """A workspace member a (private) event is shared with"""
+
+    class Status(models.TextChoices):
+        ACCEPTED = "accepted", _("Accepted")
+        DECLINED = "declined", _("Declined")
+        PENDING = "pending", _("Pending")
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    event = models.ForeignKey(
+        Event, on_delete=models.CASCADE, related_name="participants"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="event_participations",
+    )
+    added_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="added_participants",
+    )
+    added_at = models.DateTimeField(auto_now_add=True)
+    status = models.CharField(max_length=20, choices=Status, default=Status.ACCEPTED)
+
+    class Meta:
+        # Both key orders are covering: (event, user) answers the visibility
+        # EXISTS probe and (user, event) lists what is shared with a user,
+        # each from the index alone
+        constraints = [
+            models.UniqueConstraint(
+                fields=["event", "user"], name="evtpart_event_user_uniq"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["user", "event"], name="evtpart_user_event_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} in {self.event_id}"
+
+
+class Unavailability(models.Model):
+    """
+    A block of time a user is unavailable. Weekly blocks repeat at the same
+    wall-clock time (in TIME_ZONE) for occurrences starting before
+    ``repeat_until``, or forever when it is empty.
+    """
+
+    class Recurrence(models.TextChoices):
+        NONE = "none", _("Does not repeat")
+        WEEKLY = "weekly", _("Weekly")
+
+    unavailability_id = models.UUIDField(
+        primary_key=True, default=uuid.uuid4, editable=False
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="unavailability",
+    )
+    reason = models.CharField(max_length=100, blank=True, default="")
+    # The first occurrence of a weekly block
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    recurrence = models.CharField(
+        max_length=10, choices=Recurrence, default=Recurrence.NONE
+    )
+    repeat_until = models.DateTimeField(blank=True, null=True)
+    # End of the last occurrence, null while a weekly block repeats forever;
+    # with start_time it bounds every occurrence for range queries
+    series_end = models.DateTimeField(blank=True, null=True, editable=False)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "start_time", "series_end"],
+                name="unavailability_range_idx",
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        from .availability import series_end
+
+        self.series_end = series_end(self)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "series_end"}
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return self.reason or f"Unavailable from {self.start_time}"
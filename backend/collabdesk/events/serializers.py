@@ -1,7 +1,9 @@
 from rest_framework import serializers, status
 from rest_framework.exceptions import APIException
-from .models import Event
+from .models import Event, EventParticipant, Unavailability
+from . import availability, visibility
 from django.conf import settings
+from collabdesk.fieldsets import SparseFieldsetMixin
 import pytz
 
 
@@ -11,7 +13,7 @@ class ConflictException(APIException):
     default_code = "conflict"
 
 
-class EventSerializer(serializers.ModelSerializer):
+class EventSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Event
         fields = "__all__"
@@ -21,12 +23,12 @@ class EventSerializer(serializers.ModelSerializer):
         # Convert UTC datetimes to the configured timezone
         tz = pytz.timezone(settings.TIME_ZONE)
 
-        if instance.start_time:
+        if "start_time" in data and instance.start_time:
             # Convert to the target timezone and format with offset
             start_local = instance.start_time.astimezone(tz)
             data["start_time"] = start_local.isoformat()
 
-        if instance.end_time:
+        if "end_time" in data and instance.end_time:
             # Convert to the target timezone and format with offset
             end_local = instance.end_time.astimezone(tz)
             data["end_time"] = end_local.isoformat()
@@ -42,7 +44,52 @@ class EventSerializer(serializers.ModelSerializer):
         if event_type == "INDIVIDUAL":
             overlap = Event.objects.filter(
                 created_by=user, start_time__lt=end, end_time__gt=start
-            ).exists()
-            if overlap:
+            )
+            if self.instance is not None:
+                overlap = overlap.exclude(pk=self.instance.pk)
+            overlap = overlap.exists()
+            if overlap or availability.is_unavailable(user.id, start, end):
                 raise ConflictException()
         return data
+
+
+class EventParticipantSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = EventParticipant
+        fields = "__all__"
+        read_only_fields = ("event", "added_by", "added_at")
+
+    def validate_user(self, user):
+        event = self.context["event"]
+        if not visibility.in_workspace(user.id, event.workspace_id_id):
+            raise serializers.ValidationError("Not a member of the event's workspace")
+        if event.participants.filter(user=user).exists():
+            raise serializers.ValidationError("Already a participant of this event")
+        return user
+
+
+class UnavailabilitySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Unavailability
+        fields = "__all__"
+        read_only_fields = ("user", "series_end", "created_at")
+
+    def validate(self, data):
+        start = data.get("start_time", getattr(self.instance, "start_time", None))
+        end = data.get("end_time", getattr(self.instance, "end_time", None))
+        recurrence = data.get(
+            "recurrence",
+            getattr(self.instance, "recurrence", Unavailability.Recurrence.NONE),
+        )
+        if end <= start:
+            raise serializers.ValidationError("end_time must be after start_time")
+        if recurrence == Unavailability.Recurrence.WEEKLY:
+            if end - start > availability.WEEK:
+                raise serializers.ValidationError(
+                    "A weekly block cannot be longer than a week"
+                )
+        elif data.get("repeat_until"):
+            raise serializers.ValidationError(
+                "repeat_until only applies to weekly blocks"
+            )
+        return data
@@ -0,0 +1,51 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from collabdesk import cache
+from . import intervals
+from .models import Event, EventParticipant
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def invalidate_event_caches(sender, instance, **kwargs):
+    workspaces = {instance.workspace_id_id}
+    # An event moved to another workspace leaves the previous one's
+    # responses too (update_interval_indexes below resets this afterwards)
+    loaded = getattr(instance, "_loaded_workspace", None)
+    if loaded is not None:
+        workspaces.add(loaded)
+    cache.bump("events", *(f"workspace:{workspace}" for workspace in workspaces))
+
+
+@receiver(post_save, sender=Event)
+def update_interval_indexes(sender, instance, **kwargs):
+    workspace_id = instance.workspace_id_id
+    loaded = getattr(instance, "_loaded_workspace", workspace_id)
+    if loaded is not None and loaded != workspace_id:
+        # The event left this workspace
+        intervals.indexes.record(intervals.workspace_scope(loaded), instance.pk)
+    # Workspace indexes only hold public events
+    interval = None if instance.is_private else (instance.start_time, instance.end_time)
+    intervals.indexes.record(
+        intervals.workspace_scope(workspace_id), instance.pk, interval
+    )
+    instance._loaded_workspace = workspace_id
+
+
+@receiver(post_delete, sender=Event)
+def remove_from_interval_indexes(sender, instance, **kwargs):
+    intervals.indexes.record(
+        intervals.workspace_scope(instance.workspace_id_id), instance.pk
+    )
+
+
+@receiver(post_save, sender=EventParticipant)
+@receiver(post_delete, sender=EventParticipant)
+def invalidate_participant_caches(sender, instance, **kwargs):
+    # Sharing a private event changes what its workspace's views show
+    workspaces = Event.objects.filter(pk=instance.event_id).values_list(
+        "workspace_id", flat=True
+    )
+    for workspace_id in workspaces:
+        cache.bump("events", f"workspace:{workspace_id}")
@@ -1,14 +1,24 @@
+import random
 import uuid
+import zoneinfo
 import datetime
+import threading
+import time
 
 from django.utils import timezone
-from django.test import TestCase
-from .models import Event
-from workspaces.models import Workspace
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from .models import Event, EventParticipant, Unavailability
+from . import availability, intervals, visibility
+from workspaces.models import Workspace, WorkspaceMember
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from rest_framework.test import APIClient
 from django.test import override_settings
+from django.core.cache import caches
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+from unittest import mock
+from collabdesk.auth import Auth0TokenValidator
 
 
 def createDefaultEvent():
@@ -183,3 +193,989 @@ class EventAPITests(TestCase):
 
         self.assertEqual(response1.status_code, 201)
         self.assertEqual(response2.status_code, 409)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class EventSparseFieldsetTests(TestCase):
+    def setUp(self):
+        self.event = createDefaultEvent()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.event.created_by)
+        self.url = reverse("events:event-list")
+
+    def test_list_with_fields_only_returns_requested_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {"fields": "title,start_time"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()[0]), {"title", "start_time"})
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("description", queries[0]["sql"])
+
+    def test_detail_with_fields(self):
+        url = reverse("events:event-detail", args=(self.event.event_id,))
+        response = self.client.get(url, {"fields": "event_id,location"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            {"event_id": str(self.event.event_id), "location": "School"},
+        )
+
+    def test_without_fields_returns_full_payload(self):
+        response = self.client.get(self.url)
+        self.assertIn("description", response.json()[0])
+        self.assertIn("workspace_id", response.json()[0])
+
+
+def stub_validate_token(self, token):
+    return {"sub": token, "email": f"{token}@example.com"}
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+@mock.patch.object(Auth0TokenValidator, "validate_token", stub_validate_token)
+class EventWindowViewTests(TestCase):
+    def setUp(self):
+        self.event = createDefaultEvent()
+        self.workspace = self.event.workspace_id
+        self.start = self.event.start_time
+        self.url = reverse("events:event-window")
+        self.auth = {"headers": {"Authorization": "Bearer window-user"}}
+
+    def params(self, **overrides):
+        params = {
+            "workspace_id": str(self.workspace.workspace_id),
+            "start": (self.start - datetime.timedelta(hours=1)).isoformat(),
+            "end": (self.start + datetime.timedelta(minutes=30)).isoformat(),
+        }
+        params.update(overrides)
+        return params
+
+    async def test_returns_overlapping_events_in_order(self):
+        later = await Event.objects.acreate(
+            title="Later",
+            start_time=self.start + datetime.timedelta(minutes=15),
+            end_time=self.start + datetime.timedelta(hours=2),
+            created_by=self.event.created_by,
+            workspace_id=self.workspace,
+        )
+        await Event.objects.acreate(
+            title="Outside",
+            start_time=self.start + datetime.timedelta(hours=3),
+            end_time=self.start + datetime.timedelta(hours=4),
+            created_by=self.event.created_by,
+            workspace_id=self.workspace,
+        )
+
+        response = await self.async_client.get(self.url, self.params(), **self.auth)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [event["event_id"] for event in response.json()],
+            [str(self.event.event_id), str(later.event_id)],
+        )
+
+    async def test_matches_sync_list_serialization(self):
+        response = await self.async_client.get(
+            self.url, self.params(fields="event_id,title,start_time"), **self.auth
+        )
+        self.assertEqual(
+            response.json(),
+            [
+                {
+                    "event_id": str(self.event.event_id),
+                    "title": "Meeting",
+                    "start_time": timezone.localtime(self.start).isoformat(),
+                }
+            ],
+        )
+
+    async def test_invalid_windows_are_rejected(self):
+        for params in (
+            self.params(workspace_id="nope"),
+            self.params(start="yesterday"),
+            self.params(end=self.params()["start"]),
+            self.params(end=(self.start + datetime.timedelta(days=100)).isoformat()),
+        ):
+            with self.subTest(params=params):
+                response = await self.async_client.get(self.url, params, **self.auth)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("Error", response.json())
+
+    async def test_requires_authentication(self):
+        response = await self.async_client.get(self.url, self.params())
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(
+            response.json(), {"detail": "Authentication credentials were not provided."}
+        )
+
+
+def local(*args):
+    return timezone.make_aware(datetime.datetime(*args))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class UnavailabilityTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create(username="unavailable")
+        self.other = User.objects.create(username="colleague")
+        self.workspace = Workspace.objects.create(name="Busy", created_by=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        # Mondays 09:00-10:00 New York time, across the November DST change
+        self.weekly = Unavailability.objects.create(
+            user=self.user,
+            reason="Standup",
+            start_time=local(2026, 10, 19, 9),
+            end_time=local(2026, 10, 19, 10),
+            recurrence=Unavailability.Recurrence.WEEKLY,
+            repeat_until=local(2026, 11, 10),
+        )
+
+    def test_weekly_blocks_keep_wall_clock_time(self):
+        found = list(
+            availability.occurrences(
+                self.weekly, local(2026, 10, 25), local(2026, 12, 31)
+            )
+        )
+        self.assertEqual(
+            found,
+            [
+                (local(2026, 10, 26, 9), local(2026, 10, 26, 10)),
+                (local(2026, 11, 2, 9), local(2026, 11, 2, 10)),
+                (local(2026, 11, 9, 9), local(2026, 11, 9, 10)),
+            ],
+        )
+        self.assertEqual(self.weekly.series_end, local(2026, 11, 9, 10))
+
+    def test_range_query_skips_finished_series(self):
+        blocks = availability.unavailability_in(
+            [self.user.id], local(2026, 11, 10), local(2026, 11, 20)
+        )
+        self.assertFalse(blocks.exists())
+
+    def test_individual_event_conflicts_with_an_occurrence(self):
+        payload = {
+            "title": "Clash",
+            "start_time": local(2026, 11, 2, 9, 30).isoformat(),
+            "end_time": local(2026, 11, 2, 11).isoformat(),
+            "event_type": "INDIVIDUAL",
+            "created_by": self.user.id,
+            "workspace_id": str(self.workspace.workspace_id),
+        }
+        url = reverse("events:event-list")
+        self.assertEqual(self.client.post(url, payload, format="json").status_code, 409)
+
+        payload["start_time"] = local(2026, 11, 2, 10).isoformat()
+        self.assertEqual(self.client.post(url, payload, format="json").status_code, 201)
+
+    def test_free_busy_merges_events_and_blocks_in_three_queries(self):
+        WorkspaceMember.objects.create(workspace=self.workspace, user=self.other)
+        Event.objects.create(
+            title="Review",
+            start_time=local(2026, 10, 26, 9, 30),
+            end_time=local(2026, 10, 26, 11),
+            created_by=self.user,
+            workspace_id=self.workspace,
+        )
+        Unavailability.objects.create(
+            user=self.other,
+            start_time=local(2026, 10, 27, 12),
+            end_time=local(2026, 10, 27, 13),
+        )
+        params = {
+            "user_ids": f"{self.user.id},{self.other.id}",
+            "start": local(2026, 10, 26).isoformat(),
+            "end": local(2026, 10, 28).isoformat(),
+        }
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("events:event-freebusy"), params)
+        self.assertEqual(response.status_code, 200)
+        # Who may be looked at, then the events and the blocks
+        self.assertEqual(len(queries), 3)
+        self.assertEqual(
+            response.data,
+            {
+                str(self.user.id): [
+                    {"start": local(2026, 10, 26, 9), "end": local(2026, 10, 26, 11)}
+                ],
+                str(self.other.id): [
+                    {"start": local(2026, 10, 27, 12), "end": local(2026, 10, 27, 13)}
+                ],
+            },
+        )
+
+    def test_free_busy_is_limited_to_shared_workspaces(self):
+        url = reverse("events:event-freebusy")
+        window = {
+            "start": local(2026, 10, 26).isoformat(),
+            "end": local(2026, 10, 28).isoformat(),
+        }
+        stranger = APIClient()
+        stranger.force_authenticate(user=self.other)
+
+        params = {**window, "user_ids": f"{self.other.id},{self.user.id}"}
+        self.assertEqual(stranger.get(url, params).status_code, 403)
+        params = {**window, "workspace_id": str(self.workspace.workspace_id)}
+        self.assertEqual(stranger.get(url, params).status_code, 403)
+        params = {**window, "user_ids": str(self.other.id)}
+        self.assertEqual(stranger.get(url, params).status_code, 200)
+
+        # Members and the owner of a shared workspace see each other
+        WorkspaceMember.objects.create(workspace=self.workspace, user=self.other)
+        params = {**window, "user_ids": f"{self.other.id},{self.user.id}"}
+        self.assertEqual(stranger.get(url, params).status_code, 200)
+        params = {**window, "workspace_id": str(self.workspace.workspace_id)}
+        self.assertEqual(stranger.get(url, params).status_code, 200)
+
+    def test_blocks_are_private_to_their_user(self):
+        block = Unavailability.objects.create(
+            user=self.other,
+            start_time=local(2026, 10, 27, 12),
+            end_time=local(2026, 10, 27, 13),
+        )
+        url = reverse("events:unavailability-detail", args=[block.pk])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        response = self.client.get(reverse("events:unavailability-list"))
+        self.assertEqual(
+            [b["unavailability_id"] for b in response.data],
+            [str(self.weekly.pk)],
+        )
+
+    def test_create_validates_recurrence(self):
+        url = reverse("events:unavailability-list")
+        payload = {
+            "start_time": local(2026, 10, 20, 9).isoformat(),
+            "end_time": local(2026, 10, 20, 17).isoformat(),
+            "repeat_until": local(2026, 12, 1).isoformat(),
+        }
+        self.assertEqual(self.client.post(url, payload, format="json").status_code, 400)
+
+        payload["recurrence"] = "weekly"
+        response = self.client.post(url, payload, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["user"], self.user.id)
+
+
+class IntervalIndexTests(SimpleTestCase):
+    def test_overlapping_matches_a_scan(self):
+        rng = random.Random(11)
+        items = []
+        for key in range(500):
+            start = rng.randrange(10_000)
+            items.append((start, start + rng.choice((1, 5, 30, 400)), key))
+        index = intervals.IntervalIndex(items)
+        for _ in range(200):
+            start = rng.randrange(10_500)
+            end = start + rng.randrange(1, 200)
+            expected = sorted(i for i in items if i[0] < end and i[1] > start)
+            self.assertEqual(index.overlapping(start, end), expected)
+
+    def test_replace_moves_and_removes_keys(self):
+        index = intervals.IntervalIndex([(0, 10, "a"), (5, 15, "b")])
+        moved = index.replace("a", (20, 30))
+        self.assertEqual(list(moved), [(5, 15, "b"), (20, 30, "a")])
+        self.assertEqual(list(moved.replace("b")), [(20, 30, "a")])
+        self.assertEqual(len(index), 2)
+        self.assertFalse(intervals.IntervalIndex([(0, 10, "a")]).overlaps(0, 5, "a"))
+
+    def test_replaced_copies_match_a_scan(self):
+        rng = random.Random(12)
+        current = {key: (key * 10, key * 10 + 15) for key in range(300)}
+        index = intervals.IntervalIndex((*v, k) for k, v in current.items())
+        snapshots = []
+        for _ in range(500):
+            key = rng.randrange(350)
+            if rng.random() < 0.2:
+                current.pop(key, None)
+                interval = None
+            else:
+                start = rng.randrange(4000)
+                interval = current[key] = (start, start + rng.randrange(1, 100))
+            snapshots.append((index, list(index)))
+            index = index.replace(key, interval)
+            items = sorted((*v, k) for k, v in current.items())
+            self.assertEqual(list(index), items)
+            self.assertEqual(len(index), len(items))
+            start = rng.randrange(4000)
+            end = start + rng.randrange(1, 200)
+            self.assertEqual(
+                index.overlapping(start, end),
+                [i for i in items if i[0] < end and i[1] > start],
+            )
+        # Earlier copies are untouched and can still be replaced in
+        old, items = snapshots[100]
+        self.assertEqual(list(old), items)
+        self.assertEqual(list(old.replace(items[0][2])), items[1:])
+
+    def test_lanes_and_collisions(self):
+        items = [(0, 10, "a"), (2, 4, "b"), (5, 8, "c"), (6, 9, "d"), (20, 30, "e")]
+        self.assertEqual(
+            intervals.lanes(items),
+            {
+                "a": (0, 3),
+                "b": (1, 3),
+                "c": (1, 3),
+                "d": (2, 3),
+                "e": (0, 1),
+            },
+        )
+        self.assertEqual(
+            [[key for _, _, key in group] for group in intervals.collisions(items)],
+            [["a", "b", "c", "d"]],
+        )
+
+
+@override_settings(
+    SECURE_SSL_REDIRECT=False,
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "responses": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "interval-tests",
+        },
+    },
+)
+class IntervalIndexRegistryTests(TestCase):
+    def setUp(self):
+        caches["responses"].clear()
+        intervals.indexes.clear()
+        self.event = createDefaultEvent()
+        self.user = self.event.created_by
+        self.workspace_id = self.event.workspace_id_id
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_index_is_reused_until_an_event_changes(self):
+        index = intervals.workspace_index(self.workspace_id)
+        with self.assertNumQueries(0):
+            self.assertIs(intervals.workspace_index(self.workspace_id), index)
+
+        # Writes inside a transaction invalidate
+        self.event.end_time += datetime.timedelta(hours=1)
+        self.event.save()
+        with self.assertNumQueries(1):
+            fresh = intervals.workspace_index(self.workspace_id)
+        self.assertEqual(list(fresh)[0][1], self.event.end_time)
+
+    def test_committed_writes_patch_the_index_in_place(self):
+        scope = intervals.workspace_scope(self.workspace_id)
+        intervals.workspace_index(self.workspace_id)
+        key = uuid.uuid4()
+        intervals.indexes.apply(
+            scope, key, (self.event.start_time, self.event.end_time)
+        )
+        with self.assertNumQueries(0):
+            index = intervals.workspace_index(self.workspace_id)
+        self.assertEqual({item[2] for item in index}, {self.event.pk, key})
+
+        # A write this process did not see forces a rebuild
+        intervals.indexes.invalidate(scope)
+        intervals.indexes.apply(scope, key)
+        with self.assertNumQueries(1):
+            intervals.workspace_index(self.workspace_id)
+
+    def test_moving_an_event_updates_both_workspaces(self):
+        other = Workspace.objects.create(name="Other", created_by=self.user)
+        intervals.workspace_index(self.workspace_id)
+        event = Event.objects.get(pk=self.event.pk)
+        event.workspace_id = other
+        event.save()
+        self.assertEqual(len(intervals.workspace_index(self.workspace_id)), 0)
+        self.assertEqual(len(intervals.workspace_index(other.pk)), 1)
+
+    def test_moving_an_event_refreshes_the_previous_workspace_list(self):
+        other = Workspace.objects.create(name="Other", created_by=self.user)
+        WorkspaceMember.objects.create(workspace=other, user=self.user)
+        url = reverse("events:event-list")
+        query = {"workspace_id": str(self.workspace_id)}
+        self.assertEqual(len(self.client.get(url, query).json()), 1)
+
+        response = self.client.patch(
+            reverse("events:event-detail", args=[self.event.pk]),
+            {"workspace_id": str(other.pk)},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(url, query).json(), [])
+
+    def test_list_rejects_malformed_ids(self):
+        url = reverse("events:event-list")
+        for name in ("workspace_id", "id"):
+            response = self.client.get(url, {name: "nope"})
+            self.assertEqual(response.status_code, 400)
+
+    @override_settings(CACHE_ALLOW_PROCESS_LOCAL=False)
+    def test_process_local_cache_keeps_no_index(self):
+        intervals.workspace_index(self.workspace_id)
+        with self.assertNumQueries(1):
+            intervals.workspace_index(self.workspace_id)
+
+    def test_conflicts_are_checked_against_the_database(self):
+        Event.objects.filter(pk=self.event.pk).update(event_type="INDIVIDUAL")
+        # An index that missed a write must not let a double booking through
+        intervals.workspace_index(self.workspace_id)
+        with mock.patch.object(intervals.IndexRegistry, "get") as get:
+            response = self.client.post(
+                reverse("events:event-list"),
+                {
+                    "title": "Clash",
+                    "event_type": "INDIVIDUAL",
+                    "start_time": self.event.start_time.isoformat(),
+                    "end_time": self.event.end_time.isoformat(),
+                    "workspace_id": str(self.workspace_id),
+                },
+                format="json",
+            )
+        self.assertEqual(response.status_code, 409)
+        get.assert_not_called()
+
+    def test_update_does_not_conflict_with_itself(self):
+        Event.objects.filter(pk=self.event.pk).update(event_type="INDIVIDUAL")
+        response = self.client.patch(
+            reverse("events:event-detail", args=[self.event.pk]),
+            {
+                "event_type": "INDIVIDUAL",
+                "start_time": self.event.start_time.isoformat(),
+                "end_time": (
+                    self.event.end_time + datetime.timedelta(minutes=30)
+                ).isoformat(),
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_layout_endpoint(self):
+        start = self.event.start_time
+        overlapping = Event.objects.create(
+            title="Overlapping",
+            start_time=start + datetime.timedelta(minutes=30),
+            end_time=start + datetime.timedelta(hours=2),
+            created_by=self.user,
+            workspace_id=self.event.workspace_id,
+        )
+        response = self.client.get(
+            reverse("events:event-layout"),
+            {
+                "workspace_id": str(self.workspace_id),
+                "start": (start - datetime.timedelta(days=1)).isoformat(),
+                "end": (start + datetime.timedelta(days=1)).isoformat(),
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(e["event_id"], e["lane"], e["lanes"]) for e in response.data["events"]],
+            [(self.event.pk, 0, 2), (overlapping.pk, 1, 2)],
+        )
+        self.assertEqual(response.data["collisions"], [[self.event.pk, overlapping.pk]])
+
+    @override_settings(CACHE_ALLOW_PROCESS_LOCAL=False)
+    def test_layout_queries_only_the_window_without_an_index(self):
+        start = self.event.start_time
+        with mock.patch.object(intervals, "workspace_index") as workspace_index:
+            with self.assertNumQueries(1):
+                response = self.client.get(
+                    reverse("events:event-layout"),
+                    {
+                        "workspace_id": str(self.workspace_id),
+                        "start": start.isoformat(),
+                        "end": (start + datetime.timedelta(hours=1)).isoformat(),
+                    },
+                )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [e["event_id"] for e in response.data["events"]], [self.event.pk]
+        )
+        workspace_index.assert_not_called()
+
+
+class CalendarTestMixin:
+    """A workspace and helpers for creating events at Tokyo times"""
+
+    def setUp(self):
+        self.event = createDefaultEvent()
+        self.workspace = self.event.workspace_id
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.event.created_by)
+        self.event.delete()
+        self.tz = zoneinfo.ZoneInfo("Asia/Tokyo")
+
+    def create(self, title, start, end):
+        return Event.objects.create(
+            title=title,
+            start_time=start,
+            end_time=end,
+            created_by=self.event.created_by,
+            workspace_id=self.workspace,
+        )
+
+    def tokyo(self, *args):
+        return datetime.datetime(*args, tzinfo=self.tz)
+
+    def get(self, **params):
+        params.setdefault("workspace_id", str(self.workspace.workspace_id))
+        return self.client.get(self.url, params)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class EventCalendarTests(CalendarTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse("events:event-calendar")
+
+    def test_week_buckets_split_events_in_the_viewers_time_zone(self):
+        # 23:00 UTC on Monday is already Tuesday in Tokyo
+        late = self.create(
+            "Late", self.tokyo(2026, 10, 20, 8), self.tokyo(2026, 10, 20, 9)
+        )
+        trip = self.create(
+            "Trip", self.tokyo(2026, 10, 21, 22), self.tokyo(2026, 10, 23, 0)
+        )
+        self.create(
+            "Next week", self.tokyo(2026, 10, 26, 9), self.tokyo(2026, 10, 26, 10)
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(view="week", date="2026-10-22", tz="Asia/Tokyo")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+
+        data = response.data
+        self.assertEqual(
+            (data["start"], data["end"]),
+            (
+                datetime.date(2026, 10, 19),
+                datetime.date(2026, 10, 25),
+            ),
+        )
+        self.assertEqual(len(data["days"]), 7)
+        late_id, trip_id = str(late.pk), str(trip.pk)
+        self.assertEqual(
+            data["days"]["2026-10-20"],
+            [{"event_id": late_id, "start": "08:00", "end": "09:00"}],
+        )
+        self.assertEqual(
+            data["days"]["2026-10-21"],
+            [{"event_id": trip_id, "start": "22:00", "end": "24:00"}],
+        )
+        self.assertEqual(
+            data["days"]["2026-10-22"],
+            [{"event_id": trip_id, "start": "00:00", "end": "24:00"}],
+        )
+        # Ending at midnight does not touch the next day
+        self.assertEqual(data["days"]["2026-10-23"], [])
+        self.assertEqual(set(data["events"]), {late_id, trip_id})
+        self.assertEqual(data["events"][trip_id]["title"], "Trip")
+
+    def test_month_view(self):
+        self.create(
+            "Halloween", self.tokyo(2026, 10, 31, 9), self.tokyo(2026, 10, 31, 10)
+        )
+        response = self.get(view="month", date="2026-10-05", tz="Asia/Tokyo")
+        self.assertEqual(len(response.data["days"]), 31)
+        self.assertEqual(len(response.data["days"]["2026-10-31"]), 1)
+
+    @override_settings(
+        CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+            "responses": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "calendar-tests",
+            },
+        }
+    )
+    def test_default_date_moves_on_at_midnight(self):
+        caches["responses"].clear()
+        before = self.tokyo(2026, 10, 25, 23, 59)
+        after = self.tokyo(2026, 10, 26, 0, 1)
+        with mock.patch("django.utils.timezone.now", return_value=before):
+            self.assertEqual(self.get(tz="Asia/Tokyo").data["start"].day, 19)
+        with mock.patch("django.utils.timezone.now", return_value=after):
+            self.assertEqual(self.get(tz="Asia/Tokyo").data["start"].day, 26)
+
+    def test_invalid_parameters(self):
+        for params in (
+            {"tz": "Mars/Olympus"},
+            {"view": "year"},
+            {"date": "22/10/2026"},
+            {"workspace_id": "nope"},
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(self.get(**params).status_code, 400)
+
+
+@override_settings(
+    SECURE_SSL_REDIRECT=False,
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "responses": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "heatmap-tests",
+        },
+    },
+)
+class EventHeatmapTests(CalendarTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        caches["responses"].clear()
+        self.url = reverse("events:event-heatmap")
+
+    def test_counts_per_local_day_and_hour(self):
+        self.create("a", self.tokyo(2026, 10, 20, 9), self.tokyo(2026, 10, 20, 10))
+        self.create("b", self.tokyo(2026, 10, 20, 9, 30), self.tokyo(2026, 10, 20, 10))
+        self.create("c", self.tokyo(2026, 10, 20, 23), self.tokyo(2026, 10, 21, 1))
+        self.create("d", self.tokyo(2026, 10, 22, 0), self.tokyo(2026, 10, 22, 0, 15))
+        self.create(
+            "outside", self.tokyo(2026, 10, 23, 9), self.tokyo(2026, 10, 23, 10)
+        )
+
+        response = self.get(start="2026-10-20", end="2026-10-22", tz="Asia/Tokyo")
+        self.assertEqual(response.status_code, 200)
+        days = response.data["days"]
+        self.assertEqual(list(days), ["2026-10-20", "2026-10-21", "2026-10-22"])
+        self.assertEqual(
+            (days["2026-10-20"]["events"], days["2026-10-20"]["minutes"]), (3, 150)
+        )
+        self.assertEqual(days["2026-10-20"]["events_by_hour"][9], 2)
+        self.assertEqual(days["2026-10-20"]["minutes_by_hour"][9], 90)
+        # "c" runs past midnight: its minutes follow it into the next day
+        self.assertEqual(days["2026-10-20"]["minutes_by_hour"][23], 60)
+        self.assertEqual(
+            (days["2026-10-21"]["events"], days["2026-10-21"]["minutes"]), (0, 60)
+        )
+        self.assertEqual(days["2026-10-21"]["minutes_by_hour"][0], 60)
+        self.assertEqual(days["2026-10-22"]["events_by_hour"][0], 1)
+
+    def test_minutes_are_clipped_to_the_range(self):
+        self.create(
+            "before", self.tokyo(2026, 10, 19, 23, 30), self.tokyo(2026, 10, 20, 0, 30)
+        )
+        self.create(
+            "after", self.tokyo(2026, 10, 20, 23, 15), self.tokyo(2026, 10, 21, 2)
+        )
+
+        days = self.get(start="2026-10-20", end="2026-10-20", tz="Asia/Tokyo").data[
+            "days"
+        ]
+        self.assertEqual(list(days), ["2026-10-20"])
+        day = days["2026-10-20"]
+        self.assertEqual((day["events"], day["minutes"]), (1, 75))
+        self.assertEqual(day["minutes_by_hour"][0], 30)
+        self.assertEqual(day["events_by_hour"][0], 0)
+        self.assertEqual(day["minutes_by_hour"][23], 45)
+        self.assertTrue(all(minutes <= 60 for minutes in day["minutes_by_hour"]))
+
+    def test_cached_until_the_workspace_changes(self):
+        params = {"start": "2026-10-20", "end": "2026-10-22", "tz": "Asia/Tokyo"}
+        self.get(**params)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get(**params).data["days"], {})
+
+        self.create("new", self.tokyo(2026, 10, 21, 9), self.tokyo(2026, 10, 21, 10))
+        self.assertEqual(list(self.get(**params).data["days"]), ["2026-10-21"])
+
+    def test_invalid_parameters(self):
+        for params in (
+            {"start": "2026-10-20"},
+            {"start": "2026-10-20", "end": "2026-10-19"},
+            {"start": "2025-01-01", "end": "2026-12-31"},
+            {"start": "2026-10-20", "end": "2026-10-22", "tz": "Nowhere"},
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(self.get(**params).status_code, 400)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class UpcomingEventsTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create(username="upcominguser")
+        self.other = User.objects.create(username="upcomingother")
+        self.workspaces = [
+            Workspace.objects.create(name=f"W{i}", created_by=self.other)
+            for i in range(3)
+        ]
+        # The user is not a member of the last workspace
+        for workspace in self.workspaces[:2]:
+            WorkspaceMember.objects.create(workspace=workspace, user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("events:event-upcoming")
+        self.now = timezone.now()
+
+    def create(self, title, workspace, hours):
+        start = self.now + datetime.timedelta(hours=hours)
+        return Event.objects.create(
+            title=title,
+            start_time=start,
+            end_time=start + datetime.timedelta(hours=1),
+            created_by=self.other,
+            workspace_id=self.workspaces[workspace],
+        )
+
+    def test_merges_workspaces_in_start_order(self):
+        self.create("past", 0, -2)
+        self.create("b", 1, 2)
+        self.create("a", 0, 1)
+        self.create("c", 0, 3)
+        self.create("foreign", 2, 1)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+        titles = [event["title"] for event in response.data["results"]]
+        self.assertEqual(titles, ["a", "b", "c"])
+        self.assertIsNone(response.data["next"])
+
+    def test_cursor_continues_past_tied_start_times(self):
+        created = [self.create(f"e{i}", i % 2, 1 + i // 4) for i in range(10)]
+        expected = [
+            event.title
+            for event in sorted(created, key=lambda e: (e.start_time, e.event_id))
+        ]
+        seen, params = [], {"limit": 3}
+        while True:
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 200)
+            seen += [event["title"] for event in response.data["results"]]
+            if response.data["next"] is None:
+                break
+            params["cursor"] = response.data["next"]
+        self.assertEqual(seen, expected)
+
+    def test_invalid_parameters(self):
+        for params in ({"limit": "0"}, {"limit": "x"}, {"cursor": "forged"}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(self.url, params).status_code, 400)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class EventVisibilityTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.owner, self.creator, self.guest, self.member, self.outsider = (
+            User.objects.create(username=f"visibility{i}") for i in range(5)
+        )
+        self.workspace = Workspace.objects.create(name="V", created_by=self.owner)
+        for user in (self.owner, self.creator, self.guest, self.member):
+            WorkspaceMember.objects.create(workspace=self.workspace, user=user)
+        start = timezone.now() + datetime.timedelta(hours=1)
+        self.public, self.private = (
+            Event.objects.create(
+                title=title,
+                start_time=start,
+                end_time=start + datetime.timedelta(hours=1),
+                is_private=title == "private",
+                created_by=self.creator,
+                workspace_id=self.workspace,
+            )
+            for title in ("public", "private")
+        )
+        EventParticipant.objects.create(
+            event=self.private, user=self.guest, added_by=self.creator
+        )
+
+    def visible(self, user):
+        return set(visibility.visible_events(user.id).values_list("title", flat=True))
+
+    def test_private_events_need_creator_participant_or_owner(self):
+        for user in (self.creator, self.guest, self.owner):
+            with self.subTest(user=user.username):
+                self.assertEqual(self.visible(user), {"public", "private"})
+        self.assertEqual(self.visible(self.member), {"public"})
+        self.assertEqual(self.visible(self.outsider), set())
+
+    def test_participants_are_checked_with_one_exists(self):
+        sql = str(visibility.visible_events(self.member.id).query)
+        self.assertEqual(sql.count("EXISTS"), 1)
+
+    def test_detail_hides_private_events_from_others(self):
+        url = reverse("events:event-detail", args=[self.private.event_id])
+        client = APIClient()
+        client.force_authenticate(user=self.member)
+        self.assertEqual(client.get(url).status_code, 404)
+        client.force_authenticate(user=self.guest)
+        self.assertEqual(client.get(url).status_code, 200)
+
+    def seen(self, user, name, **params):
+        """Ids of the events ``user`` gets from the ``name`` endpoint"""
+        client = APIClient()
+        client.force_authenticate(user=user)
+        day = timezone.localdate(self.private.start_time)
+        params = {
+            "workspace_id": str(self.workspace.workspace_id),
+            "start": (self.private.start_time - datetime.timedelta(hours=1)),
+            "end": (self.private.end_time + datetime.timedelta(hours=1)),
+            "date": day,
+            **params,
+        }
+        if name == "event-heatmap":
+            params.update(start=day, end=day + datetime.timedelta(days=1))
+        # The async window view authenticates the bearer token itself
+        headers = {"Authorization": f"Bearer {user.username}"}
+        with mock.patch.object(
+            Auth0TokenValidator, "validate_token", stub_validate_token
+        ):
+            response = client.get(reverse(f"events:{name}"), params, headers=headers)
+        self.assertEqual(response.status_code, 200, response.data)
+        data = response.data
+        if name == "event-calendar":
+            return set(map(uuid.UUID, data["events"]))
+        if name == "event-heatmap":
+            return sum(day["events"] for day in data["days"].values())
+        if name == "event-layout":
+            data = data["events"]
+        return {uuid.UUID(str(event["event_id"])) for event in data}
+
+    @override_settings(
+        CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+            "responses": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "visibility-tests",
+            },
+        }
+    )
+    def test_workspace_views_hide_private_events_from_others(self):
+        caches["responses"].clear()
+        intervals.indexes.clear()
+        both = {self.public.pk, self.private.pk}
+        for name in (
+            "event-list",
+            "event-window",
+            "event-calendar",
+            "event-heatmap",
+            "event-layout",
+        ):
+            with self.subTest(name=name):
+                # The creator's responses are cached first; nobody else reads them
+                for user in (self.creator, self.guest, self.owner, self.member):
+                    expected = both if user != self.member else {self.public.pk}
+                    if name == "event-heatmap":
+                        expected = len(expected)
+                    self.assertEqual(self.seen(user, name), expected)
+
+    def test_upcoming_shows_private_events_to_their_creator(self):
+        client = APIClient()
+        client.force_authenticate(user=self.creator)
+        response = client.get(reverse("events:event-upcoming"))
+        self.assertEqual(
+            {event["title"] for event in response.data["results"]},
+            {"public", "private"},
+        )
+
+
+@override_settings(
+    SECURE_SSL_REDIRECT=False,
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "responses": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "participant-tests",
+        },
+    },
+)
+class EventParticipantTests(EventVisibilityTests):
+    def setUp(self):
+        super().setUp()
+        caches["responses"].clear()
+        self.url = reverse("events:event-participant-list", args=[self.private.pk])
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        return client
+
+    def share(self, by, user):
+        return self.client_for(by).post(self.url, {"user": user.id}, format="json")
+
+    def test_sharing_shows_the_event_to_the_participant(self):
+        self.assertEqual(self.seen(self.member, "event-list"), {self.public.pk})
+        response = self.share(self.creator, self.member)
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data["added_by"], self.creator.id)
+        self.assertEqual(
+            self.seen(self.member, "event-list"), {self.public.pk, self.private.pk}
+        )
+        response = self.client_for(self.member).get(self.url)
+        self.assertEqual(
+            [p["user"] for p in response.data], [self.guest.id, self.member.id]
+        )
+
+    def test_only_creator_or_owner_can_share_with_members(self):
+        self.assertEqual(self.share(self.guest, self.member).status_code, 403)
+        self.assertEqual(self.share(self.owner, self.member).status_code, 201)
+        self.assertEqual(self.share(self.creator, self.member).status_code, 400)
+        self.assertEqual(self.share(self.creator, self.outsider).status_code, 400)
+        # Events the caller may not see are not found
+        client = self.client_for(self.outsider)
+        self.assertEqual(client.get(self.url).status_code, 404)
+
+    def test_participants_can_leave(self):
+        url = reverse(
+            "events:event-participant-detail", args=[self.private.pk, self.guest.id]
+        )
+        self.share(self.creator, self.member)
+        self.assertEqual(self.client_for(self.member).delete(url).status_code, 403)
+        self.assertEqual(self.client_for(self.guest).delete(url).status_code, 204)
+        self.assertEqual(self.seen(self.guest, "event-list"), {self.public.pk})
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class BookingLockStressTests(TransactionTestCase):
+    """
+    Concurrent INDIVIDUAL bookings of one slot by one user through the API.
+    (SQLite's shared in-memory test database cannot run two users' write
+    transactions side by side; collabdesk.tests covers that the locks of
+    different users do not block each other.)
+    """
+
+    THREADS = 8
+
+    def setUp(self):
+        self.user = get_user_model().objects.create(username="booker")
+        self.workspace = Workspace.objects.create(name="B", created_by=self.user)
+        self.start = timezone.now() + datetime.timedelta(days=1)
+
+    def book(self, barrier, results):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        payload = {
+            "title": "Slot",
+            "start_time": self.start.isoformat(),
+            "end_time": (self.start + datetime.timedelta(hours=1)).isoformat(),
+            "event_type": "INDIVIDUAL",
+            "created_by": self.user.id,
+            "workspace_id": str(self.workspace.workspace_id),
+        }
+        try:
+            barrier.wait()
+            response = client.post(reverse("events:event-list"), payload, format="json")
+            results.append(response.status_code)
+        finally:
+            connections.close_all()
+
+    def test_only_one_overlapping_booking_wins(self):
+        barrier = threading.Barrier(self.THREADS)
+        results = []
+        original = availability.is_unavailable
+
+        def slow_check(*args):
+            # Widen the gap between the overlap check and the insert
+            time.sleep(0.02)
+            return original(*args)
+
+        with mock.patch.object(availability, "is_unavailable", slow_check):
+            threads = [
+                threading.Thread(target=self.book, args=(barrier, results))
+                for _ in range(self.THREADS)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(sorted(results), [201] + [409] * (self.THREADS - 1))
+        self.assertEqual(Event.objects.filter(created_by=self.user).count(), 1)
@@ -0,0 +1,80 @@
+"""
+A user's upcoming events across every workspace they are a member of.
+
+One query walks ``event_workspace_start_idx`` on (workspace, start_time,
+event_id) for the user's workspaces, keeping the events they may see
+(events/visibility.py), and returns the next page in (start_time, event_id)
+order, so no per-workspace queries or client-side merging are needed.
+Pages continue from an opaque signed cursor holding the last (start_time,
+event_id) sent: keyset pagination, which stays one index range scan however
+deep the client pages.
+"""
+
+import datetime
+import uuid
+
+from django.core import signing
+from django.db.models import Q
+from django.utils import timezone
+
+from . import visibility
+
+CURSOR_SALT = "collabdesk.events.upcoming"
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+def encode_cursor(event):
+    return signing.dumps(
+        [event.start_time.isoformat(), str(event.event_id)],
+        salt=CURSOR_SALT,
+        compress=True,
+    )
+
+
+def decode_cursor(value):
+    """(start_time, event_id) of the last event of the previous page"""
+    try:
+        start, event_id = signing.loads(value, salt=CURSOR_SALT)
+        return datetime.datetime.fromisoformat(start), uuid.UUID(event_id)
+    except (signing.BadSignature, TypeError, ValueError):
+        raise ValueError("cursor is invalid")
+
+
+def parse_params(query_params):
+    """Return (limit, after) from ?limit=&cursor=. Raises ValueError."""
+    try:
+        limit = int(query_params.get("limit", DEFAULT_LIMIT))
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ValueError(f"limit must be between 1 and {MAX_LIMIT}")
+    cursor = query_params.get("cursor")
+    return limit, decode_cursor(cursor) if cursor else None
+
+
+def upcoming(user_id, after=None, now=None):
+    """
+    Events of the user's workspaces starting from ``now``, or strictly
+    after the (start_time, event_id) of ``after``, in that order.
+    """
+    queryset = visibility.visible_events(user_id)
+    if after is None:
+        queryset = queryset.filter(start_time__gte=now or timezone.now())
+    else:
+        start, event_id = after
+        # The plain range bound keeps this an index range scan
+        queryset = queryset.filter(
+            Q(start_time__gt=start) | Q(start_time=start, event_id__gt=event_id),
+            start_time__gte=start,
+        )
+    return queryset.order_by("start_time", "event_id")
+
+
+def page(queryset, limit):
+    """(events, next cursor or None) for the first ``limit`` rows"""
+    events = list(queryset[: limit + 1])
+    if len(events) <= limit:
+        return events, None
+    events = events[:limit]
+    return events, encode_cursor(events[-1])
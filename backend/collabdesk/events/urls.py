@@ -6,5 +6,31 @@ from .views import *
 app_name = "events"
 urlpatterns = [
     path("", EventListCreateView.as_view(), name="event-list"),
+    path("window/", EventWindowView.as_view(), name="event-window"),
+    path("calendar/", EventCalendarView.as_view(), name="event-calendar"),
+    path("heatmap/", EventHeatmapView.as_view(), name="event-heatmap"),
+    path("mine/upcoming/", UpcomingEventsView.as_view(), name="event-upcoming"),
+    path("layout/", EventLayoutView.as_view(), name="event-layout"),
+    path("freebusy/", FreeBusyView.as_view(), name="event-freebusy"),
+    path(
+        "unavailability/",
+        UnavailabilityListCreateView.as_view(),
+        name="unavailability-list",
+    ),
+    path(
+        "unavailability/<uuid:pk>/",
+        UnavailabilityDetailView.as_view(),
+        name="unavailability-detail",
+    ),
     path("<uuid:pk>/", EventDetailView.as_view(), name="event-detail"),
+    path(
+        "<uuid:pk>/participants/",
+        EventParticipantListCreateView.as_view(),
+        name="event-participant-list",
+    ),
+    path(
+        "<uuid:pk>/participants/<int:user_id>/",
+        EventParticipantDetailView.as_view(),
+        name="event-participant-detail",
+    ),
 ]
@@ -1,23 +1,137 @@
 from rest_framework import generics
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.permissions import IsAuthenticated
-from .serializers import EventSerializer
-from .models import Event
+from rest_framework.views import APIView
+from .serializers import (
+    EventParticipantSerializer,
+    EventSerializer,
+    UnavailabilitySerializer,
+)
+from .models import Event, EventParticipant, Unavailability
+from . import availability, calendar, intervals, upcoming, visibility
+from collabdesk.fieldsets import SparseFieldsetViewMixin
+from collabdesk.cache import acache_response, cache_response
+from collabdesk.asyncviews import AsyncAPIView
+from collabdesk.idempotency import idempotent
+from collabdesk.locks import xact_lock
+from profiles.views import parse_user_ids
+from workspaces.models import WorkspaceMember
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+import datetime
+import uuid
+
+# Longest span a single window query may cover
+EVENT_WINDOW_MAX_DAYS = 92
+# Lock namespace serializing one user's overlap-checked event writes
+BOOKING_LOCK = "events:booking"
 
 # Create your views here.
 
 
-class EventListCreateView(generics.ListCreateAPIView):
+def event_list_scopes(request, *args, **kwargs):
+    if request.query_params.get("id"):
+        return None
+    workspace_id = request.query_params.get("workspace_id")
+    if workspace_id:
+        try:
+            return [f"workspace:{uuid.UUID(workspace_id)}"]
+        except ValueError:
+            return None
+    return ["events"]
+
+
+def event_user_vary(request, *args, **kwargs):
+    # Which private events are included depends on the caller
+    return {"user": request.user.pk}
+
+
+def event_calendar_vary(request, *args, **kwargs):
+    varies = event_user_vary(request)
+    # Without ?date= the period is today's, which the query string lacks
+    if "date" not in request.query_params:
+        try:
+            tz = calendar.parse_timezone(request.query_params.get("tz"))
+        except ValueError:
+            return varies
+        varies["date"] = timezone.localdate(timezone=tz)
+    return varies
+
+
+def parse_window(query_params):
+    """
+    Return (workspace_id, start, end) from ?workspace_id=&start=&end=.
+    Naive datetimes are read in the current time zone. Raises ValueError.
+    """
+    try:
+        workspace_id = uuid.UUID(query_params.get("workspace_id", ""))
+    except ValueError:
+        raise ValueError("workspace_id must be a UUID")
+    return (workspace_id, *parse_bounds(query_params))
+
+
+def parse_bounds(query_params):
+    """Return (start, end) from ?start=&end=, as for parse_window()"""
+    bounds = []
+    for name in ("start", "end"):
+        value = parse_datetime(query_params.get(name, ""))
+        if value is None:
+            raise ValueError(f"{name} must be an ISO 8601 datetime")
+        if timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        bounds.append(value)
+
+    start, end = bounds
+    if end <= start:
+        raise ValueError("end must be after start")
+    if end - start > datetime.timedelta(days=EVENT_WINDOW_MAX_DAYS):
+        raise ValueError(f"The window may span at most {EVENT_WINDOW_MAX_DAYS} days")
+    return start, end
+
+
+def event_window_scopes(request, *args, **kwargs):
+    try:
+        return [f"workspace:{uuid.UUID(request.query_params.get('workspace_id'))}"]
+    except (TypeError, ValueError):
+        return None
+
+
+class EventListCreateView(SparseFieldsetViewMixin, generics.ListCreateAPIView):
     queryset = Event.objects.all()
     serializer_class = EventSerializer
     permission_classes = [IsAuthenticated]
 
+    def get_queryset(self):
+        queryset = (
+            super()
+            .get_queryset()
+            .filter(visibility.privacy_filter(self.request.user.id))
+        )
+        workspace_id = self.request.query_params.get("workspace_id")
+        if workspace_id:
+            queryset = queryset.filter(workspace_id=workspace_id)
+        return queryset
+
+    @cache_response("events-list", event_list_scopes, vary=event_user_vary)
     def get(self, request, *args, **kwargs):
+        for name in ("workspace_id", "id"):
+            value = request.query_params.get(name)
+            if not value:
+                continue
+            try:
+                uuid.UUID(value)
+            except ValueError:
+                return Response(
+                    {"Error": f"{name} must be a UUID"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
         event_id = request.query_params.get("id")
         if event_id:
             try:
-                event = Event.objects.get(id=event_id)
+                event = self.get_queryset().get(event_id=event_id)
             except Event.DoesNotExist:
                 return Response({"Error": "Event not found"}, status=404)
 
@@ -25,15 +139,334 @@ class EventListCreateView(generics.ListCreateAPIView):
             return Response(serializer.data)
         return super().get(request, *args, **kwargs)
 
+    @idempotent("events-create")
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        # The overlap check and the insert must not interleave with another
+        # write to the same user's calendar
+        with xact_lock(BOOKING_LOCK, request.user.id):
+            if serializer.is_valid():
+                serializer.save()
+                return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class EventDetailView(generics.RetrieveUpdateDestroyAPIView):
+class EventDetailView(SparseFieldsetViewMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Event.objects.all()
     serializer_class = EventSerializer
     permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return (
+            super()
+            .get_queryset()
+            .filter(visibility.privacy_filter(self.request.user.id))
+        )
+
+    def update(self, request, *args, **kwargs):
+        with xact_lock(BOOKING_LOCK, request.user.id):
+            return super().update(request, *args, **kwargs)
+
+
+class EventParticipantMixin:
+    """The event of the URL, as far as the caller may see it"""
+
+    serializer_class = EventParticipantSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_event(self):
+        if not hasattr(self, "_event"):
+            self._event = get_object_or_404(
+                Event.objects.filter(
+                    visibility.privacy_filter(self.request.user.id)
+                ).select_related("workspace_id"),
+                event_id=self.kwargs["pk"],
+            )
+        return self._event
+
+    def can_share(self):
+        event = self.get_event()
+        user_id = self.request.user.id
+        return user_id in (event.created_by_id, event.workspace_id.created_by_id)
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), "event": self.get_event()}
+
+
+class EventParticipantListCreateView(EventParticipantMixin, generics.ListCreateAPIView):
+    """
+    GET - who the event is shared with. POST {"user", "status"} - share it
+    with a member of its workspace; only its creator and the workspace
+    owner can.
+    """
+
+    def get_queryset(self):
+        return EventParticipant.objects.filter(event=self.get_event()).order_by(
+            "added_at"
+        )
+
+    def perform_create(self, serializer):
+        if not self.can_share():
+            raise PermissionDenied("Only the creator or workspace owner can share")
+        serializer.save(event=self.get_event(), added_by=self.request.user)
+
+
+class EventParticipantDetailView(
+    EventParticipantMixin, generics.RetrieveDestroyAPIView
+):
+    """
+    GET or DELETE one participant by user id. Participants can remove
+    themselves; anyone else needs the rights to share the event.
+    """
+
+    lookup_field = "user_id"
+
+    def get_queryset(self):
+        return EventParticipant.objects.filter(event=self.get_event())
+
+    def perform_destroy(self, instance):
+        if instance.user_id != self.request.user.id and not self.can_share():
+            raise PermissionDenied("Only the creator or workspace owner can unshare")
+        instance.delete()
+
+
+class EventWindowView(AsyncAPIView):
+    """
+    GET ?workspace_id=&start=&end= - the workspace's events the caller may
+    see overlapping [start, end), ordered by start time. Supports ?fields=.
+    """
+
+    @acache_response("events-window", event_window_scopes, vary=event_user_vary)
+    async def get(self, request):
+        try:
+            workspace_id, start, end = parse_window(request.query_params)
+        except ValueError as e:
+            return Response({"Error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = EventSerializer.optimize_queryset(
+            Event.objects.filter(
+                visibility.privacy_filter(request.user.id),
+                workspace_id=workspace_id,
+                start_time__lt=end,
+                end_time__gt=start,
+            ).order_by("start_time", "event_id"),
+            request,
+        )
+        events = [event async for event in queryset]
+        serializer = EventSerializer(events, many=True, context={"request": request})
+        return Response(serializer.data)
+
+
+class EventCalendarView(APIView):
+    """
+    GET ?workspace_id=&view=week|month&date=YYYY-MM-DD&tz=Area/City - the
+    workspace's events in the week (from Monday) or month containing
+    ``date`` (default today), bucketed per day in ``tz`` (default
+    TIME_ZONE): {"view", "tz", "start", "end", "events": {id: details},
+    "days": {date: [{"event_id", "start", "end"}]}}. Events spanning
+    midnight appear on every day they cover.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @cache_response("events-calendar", event_window_scopes, vary=event_calendar_vary)
+    def get(self, request):
+        try:
+            workspace_id, view, first, last, tz = calendar.parse_params(
+                request.query_params
+            )
+        except ValueError as e:
+            return Response({"Error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = calendar.calendar_rows(workspace_id, first, last, tz, request.user.id)
+        events, days = calendar.bucket(rows, first, last, tz)
+        return Response(
+            {
+                "view": view,
+                "tz": str(tz),
+                "start": first,
+                "end": last - datetime.timedelta(days=1),
+                "events": events,
+                "days": days,
+            }
+        )
+
+
+class EventHeatmapView(APIView):
+    """
+    GET ?workspace_id=&start=YYYY-MM-DD&end=YYYY-MM-DD&tz=Area/City - event
+    counts per local day and hour each event starts in, and the booked
+    minutes falling in each hour of the range: {"tz", "start", "end",
+    "days": {date: {"events", "minutes", "events_by_hour",
+    "minutes_by_hour"}}}. Days without booked time are omitted.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @cache_response("events-heatmap", event_window_scopes, vary=event_user_vary)
+    def get(self, request):
+        try:
+            workspace_id, first, last, tz = calendar.parse_heatmap_params(
+                request.query_params
+            )
+        except ValueError as e:
+            return Response({"Error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = calendar.heatmap_rows(workspace_id, first, last, tz, request.user.id)
+        return Response(
+            {
+                "tz": str(tz),
+                "start": first,
+                "end": last - datetime.timedelta(days=1),
+                "days": calendar.heatmap(rows, first, last, tz),
+            }
+        )
+
+
+class UpcomingEventsView(APIView):
+    """
+    GET ?limit=&cursor= - the caller's next events across every workspace
+    they are a member of, in start order: {"results", "next"}, where
+    ``next`` is the cursor of the following page or null. Supports ?fields=.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            limit, after = upcoming.parse_params(request.query_params)
+        except ValueError as e:
+            return Response({"Error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = EventSerializer.optimize_queryset(
+            upcoming.upcoming(request.user.id, after), request
+        )
+        events, cursor = upcoming.page(queryset, limit)
+        serializer = EventSerializer(events, many=True, context={"request": request})
+        return Response({"results": serializer.data, "next": cursor})
+
+
+class EventLayoutView(APIView):
+    """
+    GET ?workspace_id=&start=&end= - side-by-side layout of the workspace's
+    events the caller may see overlapping the window, public ones answered
+    from the workspace's interval index: each event's lane, the lane count
+    of its group of overlapping events, and the groups that collide.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            workspace_id, start, end = parse_window(request.query_params)
+        except ValueError as e:
+            return Response({"Error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        found = intervals.visible_overlapping(workspace_id, request.user.id, start, end)
+        layout = intervals.lanes(found)
+        return Response(
+            {
+                "events": [
+                    {
+                        "event_id": event_id,
+                        "start_time": event_start,
+                        "end_time": event_end,
+                        "lane": layout[event_id][0],
+                        "lanes": layout[event_id][1],
+                    }
+                    for event_start, event_end, event_id in found
+                ],
+                "collisions": [
+                    [event_id for _, _, event_id in group]
+                    for group in intervals.collisions(found)
+                ],
+            }
+        )
+
+
+class UnavailabilityListCreateView(generics.ListCreateAPIView):
+    """
+    The current user's unavailability blocks, optionally only those with an
+    occurrence in ?start=&end=.
+    """
+
+    serializer_class = UnavailabilitySerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = Unavailability.objects.filter(user=self.request.user)
+        if "start" in self.request.query_params:
+            start, end = parse_bounds(self.request.query_params)
+            queryset = availability.unavailability_in(
+                [self.request.user.id], start, end
+            )
+        return queryset.order_by("start_time")
+
+    def list(self, request, *args, **kwargs):
+        try:
+            return super().list(request, *args, **kwargs)
+        except ValueError as e:
+            return Response({"Error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+
+class UnavailabilityDetailView(generics.RetrieveUpdateDestroyAPIView):
+    serializer_class = UnavailabilitySerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return Unavailability.objects.filter(user=self.request.user)
+
+
+class FreeBusyView(APIView):
+    """
+    GET ?start=&end= with ?user_ids=1,2 or ?workspace_id= (all members) -
+    each user's merged busy intervals (events and unavailability) within
+    the window, keyed by user id. Only the calendars of the caller and of
+    people sharing a workspace with them can be read.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            start, end = parse_bounds(request.query_params)
+            user_ids = self.get_user_ids(request)
+        except ValueError as e:
+            return Response({"Error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except PermissionDenied as e:
+            return Response({"Error": e.detail}, status=status.HTTP_403_FORBIDDEN)
+
+        busy = availability.busy_intervals(user_ids, start, end)
+        return Response(
+            {
+                str(user_id): [
+                    {"start": interval_start, "end": interval_end}
+                    for interval_start, interval_end in intervals
+                ]
+                for user_id, intervals in busy.items()
+            }
+        )
+
+    def get_user_ids(self, request):
+        query_params = request.query_params
+        if "user_ids" in query_params:
+            user_ids = parse_user_ids(query_params["user_ids"])
+            if len(visibility.colleagues(request.user.id, user_ids)) < len(user_ids):
+                raise PermissionDenied(
+                    "user_ids may only name people sharing a workspace with you"
+                )
+            return user_ids
+        try:
+            workspace_id = uuid.UUID(query_params.get("workspace_id", ""))
+        except ValueError:
+            raise ValueError("user_ids or workspace_id is required")
+        if not visibility.in_workspace(request.user.id, workspace_id):
+            raise PermissionDenied("You are not a member of this workspace")
+        return list(
+            WorkspaceMember.objects.filter(workspace_id=workspace_id).values_list(
+                "user_id", flat=True
+            )
+        )
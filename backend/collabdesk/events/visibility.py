@@ -0,0 +1,80 @@
+"""
+Which events a user may see.
+
+Public events are visible to every member of their workspace. Private ones
+only to their creator, the users they are shared with (``EventParticipant``)
+and the workspace owner.
+
+``visible_events`` first narrows to the user's workspaces with an IN
+subquery over ``member_user_workspace_idx``, so the planner drives from the
+user's memberships into ``event_workspace_start_idx``. The privacy rule is
+then checked per candidate row. The public/creator columns are tested
+first, and only a private event the user did not create costs a probe. That
+probe is a single correlated EXISTS, answered from the
+``evtpart_event_user_uniq`` index alone.
+
+``colleagues`` bounds whose calendars a user may look at: those of the
+people sharing a workspace with them.
+"""
+
+from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef, Q
+
+from workspaces.models import Workspace, WorkspaceMember
+from .models import Event, EventParticipant
+
+
+def member_workspaces(user_id):
+    return WorkspaceMember.objects.filter(user_id=user_id).values("workspace_id")
+
+
+def owned_workspaces(user_id):
+    return Workspace.objects.filter(created_by_id=user_id).values("workspace_id")
+
+
+def privacy_filter(user_id):
+    """Q passing public events and the private ones ``user_id`` may see"""
+    shared = EventParticipant.objects.filter(event_id=OuterRef("pk"), user_id=user_id)
+    return (
+        Q(is_private=False)
+        | Q(created_by_id=user_id)
+        | Exists(shared)
+        | Q(workspace_id__in=owned_workspaces(user_id))
+    )
+
+
+def visible_events(user_id):
+    """Events of the user's workspaces that they may see"""
+    return Event.objects.filter(
+        privacy_filter(user_id), workspace_id__in=member_workspaces(user_id)
+    )
+
+
+def user_workspaces(user_id):
+    """Workspaces ``user_id`` is a member or the owner of"""
+    return Workspace.objects.filter(
+        Q(workspace_id__in=member_workspaces(user_id)) | Q(created_by_id=user_id)
+    ).values("workspace_id")
+
+
+def in_workspace(user_id, workspace_id):
+    return user_workspaces(user_id).filter(workspace_id=workspace_id).exists()
+
+
+def colleagues(user_id, user_ids):
+    """
+    The ids among ``user_ids`` of ``user_id`` and everyone sharing a
+    workspace with them, as a member or its owner
+    """
+    shared = user_workspaces(user_id)
+    found = set(
+        get_user_model()
+        .objects.filter(
+            Q(workspaces__workspace_id__in=shared) | Q(created_workspaces__in=shared),
+            id__in=user_ids,
+        )
+        .values_list("id", flat=True)
+    )
+    if user_id in user_ids:
+        found.add(user_id)
+    return found
@@ -0,0 +1,134 @@
+"""
+Avatar storage and resizing.
+
+Originals are stored under a content hash on the ``avatars`` storage alias
+(see ``STORAGES`` in settings). Fixed-size square variants are rendered in a
+small worker pool off the request thread and, because the name changes
+whenever the image does, can be served with long-lived immutable caching.
+"""
+
+import hashlib
+import io
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+AVATAR_STORAGE_ALIAS = "avatars"
+AVATAR_SIZES = (64, 128, 256)
+AVATAR_FORMATS = {"webp": "WEBP", "jpg": "JPEG"}
+AVATAR_DEFAULT_SIZE = 128
+AVATAR_DEFAULT_FORMAT = "webp"
+AVATAR_MAX_UPLOAD_BYTES = 5 * 1024 * 1024
+AVATAR_HASH_LENGTH = 16
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class InvalidAvatar(ValueError):
+    pass
+
+
+def get_storage():
+    return storages[AVATAR_STORAGE_ALIAS]
+
+
+def get_executor():
+    """Lazily create the process-wide worker pool used for resizing"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "AVATAR_WORKERS", 2),
+                thread_name_prefix="avatar",
+            )
+    return _executor
+
+
+def original_name(avatar_hash):
+    return f"{avatar_hash}/original"
+
+
+def variant_name(avatar_hash, size, fmt):
+    return f"{avatar_hash}/{size}.{fmt}"
+
+
+def variant_url(avatar_hash, size=AVATAR_DEFAULT_SIZE, fmt=AVATAR_DEFAULT_FORMAT):
+    return f"/api/profiles/avatars/{avatar_hash}/{size}.{fmt}"
+
+
+def store_original(upload):
+    """
+    Validate an uploaded image and store it under its content hash.
+    Returns the hash; identical uploads are only stored once.
+    """
+    if upload.size > AVATAR_MAX_UPLOAD_BYTES:
+        raise InvalidAvatar("Avatar exceeds the maximum upload size")
+
+    content = upload.read()
+    try:
+        with Image.open(io.BytesIO(content)) as image:
+            image.verify()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError):
+        raise InvalidAvatar("Uploaded file is not a valid image")
+
+    avatar_hash = hashlib.sha256(content).hexdigest()[:AVATAR_HASH_LENGTH]
+    storage = get_storage()
+    name = original_name(avatar_hash)
+    if not storage.exists(name):
+        publish(storage, name, ContentFile(content))
+    return avatar_hash
+
+
+def publish(storage, name, content):
+    """
+    Save ``content`` as ``name`` so that readers never see a partial file
+    and concurrent writers of the same content leave a single copy
+    """
+    try:
+        path = storage.path(name)
+    except NotImplementedError:
+        # Remote backends store objects whole
+        saved = storage.save(name, content)
+        if saved != name:
+            # Someone else saved it first and this copy got a new name
+            storage.delete(saved)
+        return
+    temp = storage.save(f"{name}.{uuid.uuid4().hex}.tmp", content)
+    os.replace(storage.path(temp), path)
+
+
+def render_variant(avatar_hash, size, fmt):
+    """Render one square variant from the stored original and save it"""
+    storage = get_storage()
+    name = variant_name(avatar_hash, size, fmt)
+    if storage.exists(name):
+        return name
+
+    with storage.open(original_name(avatar_hash)) as f:
+        with Image.open(f) as image:
+            image = ImageOps.exif_transpose(image).convert("RGB")
+            image = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+
+    buffer = io.BytesIO()
+    image.save(buffer, AVATAR_FORMATS[fmt], quality=85)
+    # Another worker may be rendering it too
+    publish(storage, name, ContentFile(buffer.getvalue()))
+    return name
+
+
+def render_all_variants(avatar_hash):
+    for size in AVATAR_SIZES:
+        for fmt in AVATAR_FORMATS:
+            render_variant(avatar_hash, size, fmt)
+
+
+def schedule_variants(avatar_hash):
+    """Queue variant generation on the worker pool and return its future"""
+    return get_executor().submit(render_all_variants, avatar_hash)
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 12:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("profiles", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profile",
+            name="avatar_hash",
+            field=models.CharField(blank=True, default="", max_length=16),
+        ),
+    ]
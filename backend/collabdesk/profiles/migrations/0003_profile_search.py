@@ -0,0 +1,94 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:02
+
+from django.db import migrations
+
+# The DDL is spelled out rather than built by collabdesk.search, so later
+# changes there never alter what this migration does. The index expression
+# must stay identical to search.PROFILES.vector_sql() for queries to use it.
+# The PostgreSQL indexes are built CONCURRENTLY so writes to profiles_profile
+# go on meanwhile, which needs a migration outside a transaction.
+FORWARD = {
+    "postgresql": [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS profile_search_idx
+        ON "profiles_profile" USING gin ((
+            setweight(to_tsvector('simple', coalesce("full_name", '')), 'A')
+            || setweight(to_tsvector('simple', coalesce("bio", '')), 'B')
+        ))
+        """,
+        """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS profile_trigram_idx
+        ON "profiles_profile" USING gin ("full_name" gin_trgm_ops)
+        """,
+    ],
+    # FTS rows carry the profile's primary key; the implicit rowid of a
+    # table keyed by UUID may be renumbered by VACUUM
+    "sqlite": [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS "profiles_profile_fts" USING fts5(
+            "key" UNINDEXED, "full_name", "bio",
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS "profiles_profile_fts_insert"
+        AFTER INSERT ON "profiles_profile" BEGIN
+            INSERT INTO "profiles_profile_fts"("key", "full_name", "bio")
+            VALUES (new."profile_id", new."full_name", new."bio");
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS "profiles_profile_fts_delete"
+        AFTER DELETE ON "profiles_profile" BEGIN
+            DELETE FROM "profiles_profile_fts" WHERE "key" = old."profile_id";
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS "profiles_profile_fts_update"
+        AFTER UPDATE ON "profiles_profile" BEGIN
+            DELETE FROM "profiles_profile_fts" WHERE "key" = old."profile_id";
+            INSERT INTO "profiles_profile_fts"("key", "full_name", "bio")
+            VALUES (new."profile_id", new."full_name", new."bio");
+        END
+        """,
+        """
+        INSERT INTO "profiles_profile_fts"("key", "full_name", "bio")
+        SELECT "profile_id", "full_name", "bio" FROM "profiles_profile"
+        """,
+    ],
+}
+
+BACKWARD = {
+    "postgresql": [
+        "DROP INDEX CONCURRENTLY IF EXISTS profile_search_idx",
+        "DROP INDEX CONCURRENTLY IF EXISTS profile_trigram_idx",
+    ],
+    "sqlite": [
+        'DROP TRIGGER IF EXISTS "profiles_profile_fts_insert"',
+        'DROP TRIGGER IF EXISTS "profiles_profile_fts_delete"',
+        'DROP TRIGGER IF EXISTS "profiles_profile_fts_update"',
+        'DROP TABLE IF EXISTS "profiles_profile_fts"',
+    ],
+}
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, ()):
+            schema_editor.execute(sql)
+
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("profiles", "0002_profile_avatar_hash"),
+    ]
+
+    operations = [
+        migrations.RunPython(run(FORWARD), run(BACKWARD)),
+    ]
@@ -13,6 +13,7 @@ class Profile(models.Model):
     user_id = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     full_name = models.CharField(max_length=50, default="none")
     avatar_url = models.CharField(max_length=100, default="none")
+    avatar_hash = models.CharField(max_length=16, blank=True, default="")
     bio = models.CharField(max_length=200, default="none")
     created_at = models.DateTimeField(default=timezone.now)
 
@@ -1,20 +1,24 @@
 from rest_framework import serializers
 from .models import Profile
 from django.conf import settings
+from collabdesk.fieldsets import SparseFieldsetMixin
 import pytz
 
 
-class ProfileSerializer(serializers.ModelSerializer):
+class ProfileSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Profile
         fields = "__all__"
+        read_only_fields = ("avatar_hash",)
+        # Batch lookups key their response by user, so always load the FK
+        required_columns = ("user_id",)
 
     def to_representation(self, instance):
         data = super().to_representation(instance)
         # Convert UTC datetimes to the configured timezone
         tz = pytz.timezone(settings.TIME_ZONE)
 
-        if instance.created_at:
+        if "created_at" in data and instance.created_at:
             # Convert to the target timezone and format with offset
             end_local = instance.created_at.astimezone(tz)
             data["created_at"] = end_local.isoformat()
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from collabdesk import cache
+from .models import Profile
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_profile_caches(sender, instance, **kwargs):
+    cache.bump("profiles", f"user:{instance.user_id_id}")
@@ -1,5 +1,9 @@
 import uuid
+import io
 import json
+import os
+import shutil
+import tempfile
 
 from django.test import TestCase
 from .models import Profile
@@ -7,7 +11,15 @@ from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 import unittest
-from django.test import override_settings
+from django.test import AsyncRequestFactory, override_settings
+from .views import AsyncProfileBatchView
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.test import APIClient
+from PIL import Image
+from unittest import mock
+from . import avatars
 
 
 # Create your tests here.
@@ -105,3 +117,157 @@ class ProfilePOSTTests(TestCase):
 
         self.assertEqual(response.status_code, 201)
         # self.assertIn("profile_id", response.json())
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ProfileBatchLookupTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user1 = User.objects.create(username="Bob")
+        self.user2 = User.objects.create(username="Jessie")
+        self.user3 = User.objects.create(username="NoProfile")
+        createProfile(self.user1, "Bob", "example.com", "Student", timezone.now())
+        createProfile(self.user2, "Jessie", "example.com", "Student", timezone.now())
+
+    def test_get_with_user_ids_returns_profiles_keyed_by_user(self):
+        url = reverse("profiles:profile-list")
+        ids = f"{self.user1.id},{self.user2.id},{self.user3.id}"
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {"user_ids": ids})
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data[str(self.user1.id)]["full_name"], "Bob")
+        self.assertEqual(data[str(self.user2.id)]["full_name"], "Jessie")
+        self.assertNotIn(str(self.user3.id), data)
+
+    def test_get_with_invalid_user_ids(self):
+        url = reverse("profiles:profile-list")
+        response = self.client.get(url, {"user_ids": "1,abc"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_post_batch_lookup(self):
+        url = reverse("profiles:profile-batch")
+        response = self.client.post(
+            url,
+            data=json.dumps({"user_ids": [self.user1.id, self.user2.id]}),
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()), {str(self.user1.id), str(self.user2.id)})
+
+    def test_post_batch_lookup_rejects_oversized_requests(self):
+        url = reverse("profiles:profile-batch")
+        response = self.client.post(
+            url,
+            data=json.dumps({"user_ids": list(range(1, 2000))}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+    async def test_async_batch_lookup_matches_sync(self):
+        body = json.dumps({"user_ids": [self.user1.id, self.user2.id, self.user3.id]})
+        expected = await self.async_client.post(
+            reverse("profiles:profile-batch"), body, content_type="application/json"
+        )
+        request = AsyncRequestFactory().post(
+            "/api/profiles/batch/", body, content_type="application/json"
+        )
+        response = await AsyncProfileBatchView.as_view()(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), expected.json())
+
+    async def test_async_batch_lookup_rejects_bad_ids(self):
+        request = AsyncRequestFactory().post(
+            "/api/profiles/batch/", {"user_ids": "1,x"}, content_type="application/json"
+        )
+        response = await AsyncProfileBatchView.as_view()(request)
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ProfileAvatarTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        storage_settings = {
+            **settings.STORAGES,
+            "avatars": {
+                "BACKEND": "django.core.files.storage.FileSystemStorage",
+                "OPTIONS": {"location": self.media},
+            },
+        }
+        storage_override = override_settings(STORAGES=storage_settings)
+        storage_override.enable()
+        self.addCleanup(storage_override.disable)
+
+        User = get_user_model()
+        self.user = User.objects.create(username="avatar_user")
+        self.profile = createProfile(
+            self.user, "Bob", "example.com", "Student", timezone.now()
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse(
+            "profiles:profile-avatar-upload", args=(self.profile.profile_id,)
+        )
+
+    def make_image(self, size=(600, 400)):
+        buffer = io.BytesIO()
+        Image.new("RGB", size, (200, 30, 30)).save(buffer, "PNG")
+        return SimpleUploadedFile("avatar.png", buffer.getvalue(), "image/png")
+
+    def test_upload_generates_variants_off_request(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(self.url, {"avatar": self.make_image()})
+
+        self.assertEqual(response.status_code, 201)
+        self.profile.refresh_from_db()
+        self.assertEqual(response.json()["avatar_url"], self.profile.avatar_url)
+
+        # the on_commit hook hands rendering to the worker pool
+        callbacks[-1]().result()
+        variant = os.path.join(self.media, self.profile.avatar_hash, "64.webp")
+        with Image.open(variant) as image:
+            self.assertEqual(image.size, (64, 64))
+
+    def test_serve_variant_with_immutable_cache_headers(self):
+        self.client.post(self.url, {"avatar": self.make_image()})
+        self.profile.refresh_from_db()
+
+        response = self.client.get(self.profile.avatar_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/webp")
+        self.assertIn("immutable", response["Cache-Control"])
+
+        etag = response["ETag"]
+        response = self.client.get(self.profile.avatar_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_upload_rejects_non_image(self):
+        upload = SimpleUploadedFile("avatar.png", b"not an image", "image/png")
+        response = self.client.post(self.url, {"avatar": upload})
+        self.assertEqual(response.status_code, 400)
+
+    def test_upload_rejects_decompression_bombs(self):
+        with mock.patch.object(Image, "MAX_IMAGE_PIXELS", 1000):
+            response = self.client.post(self.url, {"avatar": self.make_image()})
+        self.assertEqual(response.status_code, 400)
+
+    def test_concurrent_writers_leave_one_complete_file(self):
+        storage = avatars.get_storage()
+        # Both workers found no variant and rendered it
+        for _ in range(2):
+            avatars.publish(storage, "abc/64.webp", ContentFile(b"webp"))
+        self.assertEqual(os.listdir(os.path.join(self.media, "abc")), ["64.webp"])
+        with storage.open("abc/64.webp") as f:
+            self.assertEqual(f.read(), b"webp")
+
+    def test_upload_rejects_other_users_profile(self):
+        other = get_user_model().objects.create(username="intruder")
+        self.client.force_authenticate(user=other)
+        response = self.client.post(self.url, {"avatar": self.make_image()})
+        self.assertEqual(response.status_code, 403)
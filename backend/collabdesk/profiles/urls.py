@@ -1,8 +1,22 @@
-from django.urls import path
+from django.conf import settings
+from django.urls import path, re_path
 from .views import *
 
+batch_view = AsyncProfileBatchView if settings.ASYNC_READ_VIEWS else ProfileBatchView
+
 app_name = "profiles"
 urlpatterns = [
     path("", ProfileListCreateView.as_view(), name="profile-list"),
+    path("batch/", batch_view.as_view(), name="profile-batch"),
     path("<uuid:pk>/", ProfileDetailView.as_view(), name="profile-detail"),
+    path(
+        "<uuid:pk>/avatar/",
+        ProfileAvatarUploadView.as_view(),
+        name="profile-avatar-upload",
+    ),
+    re_path(
+        r"^avatars/(?P<avatar_hash>[0-9a-f]{16})/(?P<size>[0-9]+)\.(?P<fmt>webp|jpg)$",
+        ProfileAvatarView.as_view(),
+        name="profile-avatar",
+    ),
 ]
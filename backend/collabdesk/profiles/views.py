@@ -1,26 +1,106 @@
 from rest_framework import generics
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.views import APIView
+from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.permissions import IsAuthenticated
+from django.db import transaction
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404
 from .serializers import ProfileSerializer
 from .models import Profile
+from . import avatars
+from collabdesk.asyncviews import AsyncAPIView
+from collabdesk.cache import cache_response
+from collabdesk.fieldsets import SparseFieldsetViewMixin
 
-# Create your views here.
+# Upper bound on how many user ids a single batch lookup may resolve
+MAX_BATCH_USER_IDS = 1000
 
 
-class ProfileListCreateView(generics.ListCreateAPIView):
+def parse_user_ids(raw):
+    """
+    Normalize a comma separated string or a list of user ids into a
+    de-duplicated list of ints. Raises ValueError on malformed input.
+    """
+    if isinstance(raw, str):
+        raw = [part for part in raw.split(",") if part.strip()]
+    if not isinstance(raw, (list, tuple)):
+        raise ValueError("user_ids must be a list or a comma separated string")
+
+    user_ids = list(dict.fromkeys(int(str(value).strip()) for value in raw))
+    if len(user_ids) > MAX_BATCH_USER_IDS:
+        raise ValueError(f"At most {MAX_BATCH_USER_IDS} user_ids may be requested")
+    return user_ids
+
+
+def profiles_by_user(user_ids, context=None):
+    """
+    Resolve the profiles of many users with a single IN query on the
+    Profile.user_id foreign key and return them keyed by user id.
+    """
+    context = context or {}
+    return key_by_user(list(profiles_queryset(user_ids, context)), context)
+
+
+async def aprofiles_by_user(user_ids, context=None):
+    """profiles_by_user() on the async ORM"""
+    context = context or {}
+    profiles = [p async for p in profiles_queryset(user_ids, context)]
+    return key_by_user(profiles, context)
+
+
+def profiles_queryset(user_ids, context):
+    return ProfileSerializer.optimize_queryset(
+        Profile.objects.filter(user_id__in=user_ids).order_by("created_at"),
+        context.get("request"),
+    )
+
+
+def key_by_user(profiles, context):
+    serializer = ProfileSerializer(profiles, many=True, context=context)
+    result = {}
+    for profile, data in zip(profiles, serializer.data):
+        # Users with several profiles keep their oldest one
+        result.setdefault(str(profile.user_id_id), data)
+    return result
+
+
+def profile_list_scopes(request, *args, **kwargs):
+    if request.query_params.get("profile_id"):
+        return None
+    if "user_ids" in request.query_params:
+        try:
+            user_ids = parse_user_ids(request.query_params["user_ids"])
+        except ValueError:
+            return None
+        return [f"user:{user_id}" for user_id in user_ids]
+    return ["profiles"]
+
+
+class ProfileListCreateView(SparseFieldsetViewMixin, generics.ListCreateAPIView):
     queryset = Profile.objects.all()
     serializer_class = ProfileSerializer
 
+    @cache_response("profiles-list", profile_list_scopes)
     def get(self, request, *args, **kwargs):
         profile_id = request.query_params.get("profile_id")
         if profile_id:
             try:
-                profile = Profile.objects.get(profile_id=profile_id)
+                profile = self.get_queryset().get(profile_id=profile_id)
             except Profile.DoesNotExist:
                 return Response({"Error": "Profile not found"}, status=404)
 
             serializer = self.get_serializer(profile)
             return Response(serializer.data)
+
+        if "user_ids" in request.query_params:
+            try:
+                user_ids = parse_user_ids(request.query_params["user_ids"])
+            except ValueError as e:
+                return Response({"Error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            return Response(profiles_by_user(user_ids, self.get_serializer_context()))
+
         return super().get(request, *args, **kwargs)
 
     def post(self, request, *args, **kwargs):
@@ -31,6 +111,109 @@ class ProfileListCreateView(generics.ListCreateAPIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class ProfileDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ProfileBatchView(APIView):
+    """
+    POST variant of the user_ids lookup for id sets too large for a query string.
+    Body: {"user_ids": [1, 2, 3]}
+    """
+
+    def post(self, request):
+        try:
+            user_ids = parse_user_ids(request.data.get("user_ids", []))
+        except (AttributeError, ValueError, TypeError) as e:
+            return Response({"Error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(profiles_by_user(user_ids, {"request": request}))
+
+
+class AsyncProfileBatchView(AsyncAPIView):
+    """ProfileBatchView on the async ORM"""
+
+    require_authentication = False
+
+    async def post(self, request):
+        try:
+            user_ids = parse_user_ids(request.data.get("user_ids", []))
+        except (AttributeError, ValueError, TypeError) as e:
+            return Response({"Error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(await aprofiles_by_user(user_ids, {"request": request}))
+
+
+class ProfileDetailView(SparseFieldsetViewMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Profile.objects.all()
     serializer_class = ProfileSerializer
+
+
+class ProfileAvatarUploadView(APIView):
+    """
+    Upload a new avatar for a profile as multipart form field "avatar".
+    Resized variants are generated in the background once the profile commits.
+    """
+
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser, FormParser]
+
+    def post(self, request, pk):
+        profile = get_object_or_404(Profile, profile_id=pk)
+        if profile.user_id_id != request.user.id:
+            return Response(
+                {"Error": "You can only change your own avatar"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        upload = request.FILES.get("avatar")
+        if upload is None:
+            return Response(
+                {"Error": "avatar file is required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            avatar_hash = avatars.store_original(upload)
+        except avatars.InvalidAvatar as e:
+            return Response({"Error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        profile.avatar_hash = avatar_hash
+        profile.avatar_url = avatars.variant_url(avatar_hash)
+        profile.save(update_fields=["avatar_hash", "avatar_url"])
+        transaction.on_commit(lambda: avatars.schedule_variants(avatar_hash))
+
+        return Response(
+            {
+                "avatar_url": profile.avatar_url,
+                "variants": {
+                    f"{size}.{fmt}": avatars.variant_url(avatar_hash, size, fmt)
+                    for size in avatars.AVATAR_SIZES
+                    for fmt in avatars.AVATAR_FORMATS
+                },
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class ProfileAvatarView(APIView):
+    """
+    Serve a resized avatar variant. Names are content-hashed, so responses
+    are cacheable forever. Variants still queued are rendered inline.
+    """
+
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request, avatar_hash, size, fmt):
+        size = int(size)
+        if size not in avatars.AVATAR_SIZES:
+            raise Http404("Unknown avatar variant")
+        if request.headers.get("If-None-Match") == f'"{avatar_hash}"':
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            storage = avatars.get_storage()
+            if not storage.exists(avatars.original_name(avatar_hash)):
+                raise Http404("Avatar not found")
+            name = avatars.render_variant(avatar_hash, size, fmt)
+            response = FileResponse(
+                storage.open(name),
+                content_type=f"image/{'jpeg' if fmt == 'jpg' else fmt}",
+            )
+        response["Cache-Control"] = "public, max-age=31536000, immutable"
+        response["ETag"] = f'"{avatar_hash}"'
+        return response
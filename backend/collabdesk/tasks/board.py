@@ -0,0 +1,178 @@
+"""
+Board operations on ranked tasks.
+
+Every placement computes a rank from at most two neighbouring ranks in the
+target column (one indexed lookup each) and writes only the moved rows.
+Columns whose ranks have grown past ``ranks.REBALANCE_LENGTH`` are respread
+on a single background worker once the write commits.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from collabdesk import cache
+from workspaces.models import Workspace
+from . import ranks
+from .models import Task
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class InvalidMove(ValueError):
+    pass
+
+
+def board_scope(workspace_id):
+    return f"tasks:{workspace_id}"
+
+
+def member_workspaces(user_id):
+    """The workspaces whose board ``user_id`` may use: as a member or owner"""
+    return Workspace.objects.filter(
+        Q(members__user_id=user_id) | Q(created_by_id=user_id)
+    ).values("workspace_id")
+
+
+def is_member(user_id, workspace_id):
+    return member_workspaces(user_id).filter(workspace_id=workspace_id).exists()
+
+
+def column(workspace_id, status, exclude=()):
+    return Task.objects.filter(workspace_id=workspace_id, status=status).exclude(
+        task_id__in=exclude
+    )
+
+
+def _first_rank(queryset, order):
+    return queryset.order_by(order).values_list("rank", flat=True).first()
+
+
+def _rank_of(queryset, task_id, name):
+    rank = queryset.filter(task_id=task_id).values_list("rank", flat=True).first()
+    if rank is None:
+        raise InvalidMove(f"{name} task is not in the target column")
+    return rank
+
+
+def neighbour_ranks(workspace_id, status, after=None, before=None, exclude=()):
+    """
+    The ranks a task placed after task ``after`` and/or before task
+    ``before`` must fall between. Without either it goes to the end.
+    """
+    tasks = column(workspace_id, status, exclude)
+    if after is not None:
+        low = _rank_of(tasks, after, "after")
+        if before is not None:
+            return low, _rank_of(tasks, before, "before")
+        return low, _first_rank(tasks.filter(rank__gt=low), "rank")
+    if before is not None:
+        high = _rank_of(tasks, before, "before")
+        return _first_rank(tasks.filter(rank__lt=high), "-rank"), high
+    return _first_rank(tasks, "-rank"), None
+
+
+def _between(workspace_id, status, low, high):
+    if low is not None and high is not None and low >= high:
+        if low == high:
+            # Tied ranks from concurrent moves; respread so a retry succeeds
+            schedule_rebalance(workspace_id, status)
+            raise InvalidMove("The column is being rebalanced; retry the move")
+        raise InvalidMove("The after task must come before the before task")
+    return ranks.between(low, high)
+
+
+def end_rank(workspace_id, status):
+    low, _ = neighbour_ranks(workspace_id, status)
+    return ranks.between(low, None)
+
+
+def move(task, status=None, after=None, before=None):
+    """Place ``task`` in column ``status`` with a single-row update"""
+    status = status or task.status
+    low, high = neighbour_ranks(
+        task.workspace_id, status, after, before, exclude=[task.task_id]
+    )
+    task.status = status
+    task.rank = _between(task.workspace_id, status, low, high)
+    task.save(update_fields=["status", "rank", "updated_at"])
+    if ranks.needs_rebalance(task.rank):
+        schedule_rebalance(task.workspace_id, status)
+    return task
+
+
+def bulk_move(workspace_id, task_ids, status):
+    """
+    Append the tasks to the end of column ``status`` in the given order
+    with one UPDATE. Returns the moved tasks.
+    """
+    task_ids = list(dict.fromkeys(task_ids))
+    tasks = {
+        task.task_id: task
+        for task in Task.objects.filter(workspace_id=workspace_id, task_id__in=task_ids)
+    }
+    if len(tasks) != len(task_ids):
+        raise InvalidMove("Some tasks do not exist in this workspace")
+
+    low = _first_rank(column(workspace_id, status, exclude=task_ids), "-rank")
+    now = timezone.now()
+    moved = [tasks[task_id] for task_id in task_ids]
+    for task, rank in zip(moved, ranks.between_many(low, None, len(moved))):
+        task.status, task.rank, task.updated_at = status, rank, now
+    with transaction.atomic():
+        Task.objects.bulk_update(moved, ["status", "rank", "updated_at"])
+        # bulk_update() sends no post_save signals
+        cache.bump(board_scope(workspace_id))
+    if ranks.needs_rebalance(*(task.rank for task in moved)):
+        schedule_rebalance(workspace_id, status)
+    return moved
+
+
+def rebalance_column(workspace_id, status):
+    """Respread a column's ranks evenly, keeping the order. Returns the size."""
+    with transaction.atomic():
+        task_ids = list(
+            column(workspace_id, status)
+            .select_for_update()
+            .order_by("rank", "task_id")
+            .values_list("task_id", flat=True)
+        )
+        Task.objects.bulk_update(
+            [
+                Task(task_id=task_id, rank=rank)
+                for task_id, rank in zip(task_ids, ranks.spread(len(task_ids)))
+            ],
+            ["rank"],
+            batch_size=500,
+        )
+        cache.bump(board_scope(workspace_id))
+    return len(task_ids)
+
+
+def get_executor():
+    """One worker, so rebalances of the same column never overlap"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="task-rebalance"
+            )
+    return _executor
+
+
+def _run_rebalance(workspace_id, status):
+    close_old_connections()
+    try:
+        return rebalance_column(workspace_id, status)
+    finally:
+        close_old_connections()
+
+
+def schedule_rebalance(workspace_id, status):
+    transaction.on_commit(
+        lambda: get_executor().submit(_run_rebalance, workspace_id, status)
+    )
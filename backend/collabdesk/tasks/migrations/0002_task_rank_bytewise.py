@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:06
+
+import tasks.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="task",
+            name="rank",
+            field=tasks.models.RankField(max_length=255),
+        ),
+    ]
@@ -0,0 +1,75 @@
+import uuid
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class RankField(models.CharField):
+    """
+    CharField compared byte by byte, so the database orders ranks exactly as
+    tasks/ranks.py does: the "C" collation on PostgreSQL, while SQLite
+    already compares with BINARY.
+    """
+
+    def db_parameters(self, connection):
+        params = super().db_parameters(connection)
+        if connection.vendor == "postgresql":
+            params["collation"] = "C"
+        return params
+
+
+class Task(models.Model):
+    class Status(models.TextChoices):
+        TODO = "todo", _("To Do")
+        IN_PROGRESS = "in-progress", _("In Progress")
+        DONE = "done", _("Done")
+
+    class Priority(models.TextChoices):
+        HIGH = "high", _("High")
+        MEDIUM = "medium", _("Medium")
+        LOW = "low", _("Low")
+
+    task_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    workspace = models.ForeignKey(
+        "workspaces.Workspace", on_delete=models.CASCADE, related_name="tasks"
+    )
+    name = models.CharField(max_length=200)
+    description = models.TextField(blank=True, default="")
+    due_date = models.DateField(blank=True, null=True)
+    priority = models.CharField(
+        max_length=10, choices=Priority, default=Priority.MEDIUM
+    )
+    tags = models.JSONField(default=list, blank=True)
+    status = models.CharField(max_length=20, choices=Status, default=Status.TODO)
+    # Position within the status column, see tasks/ranks.py
+    rank = RankField(max_length=255)
+    assigned_to = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name="assigned_tasks",
+    )
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="created_tasks"
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Serves the whole board: WHERE workspace ORDER BY status, rank
+            models.Index(fields=["workspace", "status", "rank"], name="task_board_idx"),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Workspace whose board holds the task (tasks/signals.py)
+        instance._loaded_workspace = instance.__dict__.get("workspace_id")
+        return instance
+
+    def __str__(self):
+        return self.name
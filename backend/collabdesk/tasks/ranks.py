@@ -0,0 +1,98 @@
+"""
+Lexicographic fractional ranks for ordering tasks within a board column.
+
+A rank is a string of base-36 digits read as a fraction (``"i"`` is 18/36),
+so plain string comparison orders tasks and there is always a rank between
+any two others: moving a task rewrites only that task's rank. Ranks never
+end in ``"0"`` (``"a0"`` would equal ``"a"``, leaving no room between them).
+The rank column compares bytes (``RankField``) rather than following the
+database's locale collation, so the database orders ranks as this module
+does on every backend.
+
+Repeated inserts into the same gap lengthen ranks; ``needs_rebalance``
+reports when a column should be respread evenly with ``spread``.
+"""
+
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+# Ranks this long trigger a rebalance of their column
+REBALANCE_LENGTH = 32
+
+
+def _digit(rank, index):
+    return DIGITS.index(rank[index]) if index < len(rank) else 0
+
+
+def _midpoint(low, high):
+    """A rank strictly between low ("" for the start) and high (None for the end)"""
+    if high is not None:
+        # Keep the common prefix and split the remainder
+        n = 0
+        while n < len(high) and _digit(low, n) == _digit(high, n):
+            n += 1
+        if n:
+            return high[:n] + _midpoint(low[n:], high[n:])
+
+    low_digit = _digit(low, 0)
+    high_digit = _digit(high, 0) if high is not None else BASE
+    if high_digit - low_digit > 1:
+        return DIGITS[(low_digit + high_digit) // 2]
+    # Adjacent first digits: extend low, or take high's first digit when
+    # high continues past it (it is then strictly smaller than high)
+    if high is not None and len(high) > 1:
+        return high[0]
+    return DIGITS[low_digit] + _midpoint(low[1:], None)
+
+
+def validate(rank):
+    if not rank or rank.endswith("0") or any(c not in DIGITS for c in rank):
+        raise ValueError(f"Invalid rank {rank!r}")
+
+
+def between(low=None, high=None):
+    """
+    Return a rank sorting after ``low`` and before ``high``; either may be
+    None for the start or end of the column. Raises ValueError when
+    ``low >= high``.
+    """
+    for rank in (low, high):
+        if rank is not None:
+            validate(rank)
+    if low is not None and high is not None and low >= high:
+        raise ValueError(f"{low!r} does not sort before {high!r}")
+    return _midpoint(low or "", high)
+
+
+def between_many(low, high, count):
+    """``count`` ascending ranks between ``low`` and ``high``, bisecting the gap"""
+    if count <= 0:
+        return []
+    middle = between(low, high)
+    half = count // 2
+    return (
+        between_many(low, middle, half)
+        + [middle]
+        + between_many(middle, high, count - half - 1)
+    )
+
+
+def _to_digits(value, width):
+    digits = []
+    for _ in range(width):
+        value, remainder = divmod(value, BASE)
+        digits.append(DIGITS[remainder])
+    return "".join(reversed(digits))
+
+
+def spread(count):
+    """``count`` evenly spaced ranks, as short as the count allows"""
+    width = 1
+    while BASE**width <= count:
+        width += 1
+    step = BASE**width // (count + 1)
+    # Fixed-width fractions keep their order once trailing zeros are dropped
+    return [_to_digits(step * (i + 1), width).rstrip("0") for i in range(count)]
+
+
+def needs_rebalance(*ranks):
+    return any(len(rank) > REBALANCE_LENGTH for rank in ranks)
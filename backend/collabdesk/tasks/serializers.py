@@ -0,0 +1,34 @@
+from rest_framework import serializers
+from collabdesk.fieldsets import SparseFieldsetMixin
+from .models import Task
+
+
+class TaskSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Task
+        fields = "__all__"
+        # Ranks are assigned by the board (tasks/board.py), never by clients
+        read_only_fields = ("rank", "created_by", "created_at", "updated_at")
+        # The board groups tasks into columns by status
+        required_columns = ("status",)
+
+    def validate_tags(self, value):
+        if not isinstance(value, list) or not all(isinstance(t, str) for t in value):
+            raise serializers.ValidationError("tags must be a list of strings")
+        return value
+
+
+class TaskMoveSerializer(serializers.Serializer):
+    """Body of a single move: target column and the neighbours to land between"""
+
+    status = serializers.ChoiceField(choices=Task.Status.choices, required=False)
+    after = serializers.UUIDField(required=False, allow_null=True)
+    before = serializers.UUIDField(required=False, allow_null=True)
+
+
+class TaskBulkMoveSerializer(serializers.Serializer):
+    workspace_id = serializers.UUIDField()
+    task_ids = serializers.ListField(
+        child=serializers.UUIDField(), allow_empty=False, max_length=500
+    )
+    status = serializers.ChoiceField(choices=Task.Status.choices)
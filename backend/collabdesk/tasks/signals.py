@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from collabdesk import cache
+from .board import board_scope
+from .models import Task
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def invalidate_task_caches(sender, instance, **kwargs):
+    workspaces = {instance.workspace_id}
+    # A task moved to another workspace leaves the previous board too
+    loaded = getattr(instance, "_loaded_workspace", None)
+    if loaded is not None:
+        workspaces.add(loaded)
+    cache.bump(*(board_scope(workspace) for workspace in workspaces))
+    instance._loaded_workspace = instance.workspace_id
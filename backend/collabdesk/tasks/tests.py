@@ -0,0 +1,294 @@
+import random
+import uuid
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from workspaces.models import Workspace, WorkspaceMember
+from . import board, ranks
+from .models import Task
+
+User = get_user_model()
+
+
+class RankTests(SimpleTestCase):
+    def test_between_sorts_strictly_between_neighbours(self):
+        rng = random.Random(7)
+        column = []
+        for _ in range(2000):
+            index = rng.randrange(len(column) + 1)
+            low = column[index - 1] if index else None
+            high = column[index] if index < len(column) else None
+            rank = ranks.between(low, high)
+            ranks.validate(rank)
+            self.assertTrue(low is None or low < rank)
+            self.assertTrue(high is None or rank < high)
+            column.insert(index, rank)
+        # Random inserts keep ranks short
+        self.assertLessEqual(max(map(len, column)), 6)
+
+    def test_inserting_at_the_front_never_runs_out(self):
+        column = [ranks.between()]
+        for _ in range(200):
+            column.insert(0, ranks.between(None, column[0]))
+        self.assertEqual(column, sorted(column))
+        self.assertTrue(ranks.needs_rebalance(column[0]))
+
+    def test_between_rejects_unordered_or_invalid_bounds(self):
+        with self.assertRaises(ValueError):
+            ranks.between("m", "c")
+        with self.assertRaises(ValueError):
+            ranks.between("a0", None)
+        with self.assertRaises(ValueError):
+            ranks.between("A", None)
+
+    def test_spread_and_between_many_are_ordered_and_unique(self):
+        for count in (1, 35, 36, 5000):
+            spread = ranks.spread(count)
+            self.assertEqual(spread, sorted(set(spread)))
+        many = ranks.between_many("a", "b", 300)
+        self.assertEqual(many, sorted(set(many)))
+        self.assertTrue("a" < many[0] and many[-1] < "b")
+
+    def test_rank_column_compares_bytes(self):
+        field = Task._meta.get_field("rank")
+        postgres = mock.MagicMock(vendor="postgresql")
+        self.assertEqual(field.db_parameters(postgres)["collation"], "C")
+        # SQLite compares text with BINARY already
+        sqlite = mock.MagicMock(vendor="sqlite")
+        self.assertIsNone(field.db_parameters(sqlite)["collation"])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class TaskBoardTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="boarduser")
+        self.workspace = Workspace.objects.create(name="Board", created_by=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("tasks:task-board")
+
+    def create(self, name, status="todo"):
+        response = self.client.post(
+            self.url,
+            {
+                "name": name,
+                "status": status,
+                "priority": "high",
+                "tags": ["backend"],
+                "workspace": str(self.workspace.workspace_id),
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data["task_id"]
+
+    def board(self):
+        response = self.client.get(
+            self.url, {"workspace_id": str(self.workspace.workspace_id)}
+        )
+        self.assertEqual(response.status_code, 200)
+        return {
+            column: [task["name"] for task in tasks]
+            for column, tasks in response.data.items()
+        }
+
+    def move(self, task_id, **body):
+        return self.client.post(
+            reverse("tasks:task-move", args=[task_id]),
+            {key: str(value) for key, value in body.items()},
+            format="json",
+        )
+
+    def test_board_groups_columns_in_creation_order(self):
+        self.create("a")
+        self.create("b")
+        self.create("c", "done")
+        self.assertEqual(
+            self.board(), {"todo": ["a", "b"], "in-progress": [], "done": ["c"]}
+        )
+
+    def test_board_is_one_query(self):
+        for i in range(5):
+            self.create(f"t{i}", Task.Status.values[i % 3])
+        with CaptureQueriesContext(connection) as queries:
+            self.board()
+        # The membership check, then the board itself
+        self.assertEqual(len(queries), 2)
+
+    def test_board_is_limited_to_members(self):
+        task_id = self.create("a")
+        stranger = APIClient()
+        stranger.force_authenticate(User.objects.create(username="stranger"))
+        workspace_id = str(self.workspace.workspace_id)
+
+        self.assertEqual(self.board()["todo"], ["a"])
+        response = stranger.get(self.url, {"workspace_id": workspace_id})
+        self.assertEqual(response.status_code, 403)
+        response = stranger.post(
+            self.url, {"name": "b", "workspace": workspace_id}, format="json"
+        )
+        self.assertEqual(response.status_code, 403)
+        response = stranger.post(
+            reverse("tasks:task-bulk-move"),
+            {"workspace_id": workspace_id, "task_ids": [task_id], "status": "done"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 403)
+        response = stranger.post(
+            reverse("tasks:task-move", args=[task_id]), {}, format="json"
+        )
+        self.assertEqual(response.status_code, 404)
+        detail = reverse("tasks:task-detail", args=[task_id])
+        self.assertEqual(stranger.get(detail).status_code, 404)
+
+        WorkspaceMember.objects.create(
+            workspace=self.workspace, user=User.objects.get(username="stranger")
+        )
+        response = stranger.get(self.url, {"workspace_id": workspace_id})
+        self.assertEqual(response.status_code, 200)
+
+    def test_board_requires_workspace_id(self):
+        response = self.client.get(self.url, {"workspace_id": "nope"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_move_updates_a_single_row(self):
+        a, b, c = self.create("a"), self.create("b"), self.create("c")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.move(c, after=a, before=b)
+        self.assertEqual(response.status_code, 200)
+        writes = [q for q in queries if q["sql"].startswith("UPDATE")]
+        self.assertEqual(len(writes), 1)
+        self.assertEqual(self.board()["todo"], ["a", "c", "b"])
+
+    def test_move_across_columns(self):
+        a, b = self.create("a"), self.create("b")
+        done = self.create("done", "done")
+        self.move(b, status="done", before=done)
+        self.move(a, status="in-progress")
+        self.assertEqual(
+            self.board(), {"todo": [], "in-progress": ["a"], "done": ["b", "done"]}
+        )
+
+    def test_move_relative_to_a_task_outside_the_column(self):
+        a, b = self.create("a"), self.create("b", "done")
+        response = self.move(a, after=b)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("not in the target column", response.data["Error"])
+
+    def test_reversed_neighbours_are_rejected(self):
+        a, b, c = self.create("a"), self.create("b"), self.create("c")
+        self.assertEqual(self.move(c, after=b, before=a).status_code, 400)
+
+    def test_bulk_move_appends_in_order(self):
+        a, b, c = self.create("a"), self.create("b"), self.create("c")
+        self.create("done", "done")
+        response = self.client.post(
+            reverse("tasks:task-bulk-move"),
+            {
+                "workspace_id": str(self.workspace.workspace_id),
+                "task_ids": [c, a],
+                "status": "done",
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            self.board(), {"todo": ["b"], "in-progress": [], "done": ["done", "c", "a"]}
+        )
+
+    def test_retried_bulk_move_is_not_applied_twice(self):
+        a, b = self.create("a"), self.create("b")
+        self.create("done", "done")
+        body = {
+            "workspace_id": str(self.workspace.workspace_id),
+            "task_ids": [a, b],
+            "status": "done",
+        }
+        key = {"Idempotency-Key": str(uuid.uuid4())}
+        ranks_after = []
+        for _ in range(2):
+            response = self.client.post(
+                reverse("tasks:task-bulk-move"), body, format="json", headers=key
+            )
+            self.assertEqual(response.status_code, 200)
+            ranks_after.append(sorted(Task.objects.values_list("rank", flat=True)))
+        self.assertEqual(response["Idempotent-Replayed"], "true")
+        self.assertEqual(ranks_after[0], ranks_after[1])
+        self.assertEqual(self.board()["done"], ["done", "a", "b"])
+
+    def test_bulk_move_rejects_foreign_tasks(self):
+        response = self.client.post(
+            reverse("tasks:task-bulk-move"),
+            {
+                "workspace_id": str(self.workspace.workspace_id),
+                "task_ids": [str(uuid.uuid4())],
+                "status": "done",
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_changing_status_by_edit_appends_to_the_column(self):
+        a = self.create("a")
+        self.create("done", "done")
+        response = self.client.patch(
+            reverse("tasks:task-detail", args=[a]), {"status": "done"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.board()["done"], ["done", "a"])
+
+    @override_settings(
+        CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+            "responses": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "board-tests",
+            },
+        }
+    )
+    def test_moving_to_another_workspace_refreshes_both_boards(self):
+        caches["responses"].clear()
+        task_id = self.create("a")
+        self.assertEqual(self.board()["todo"], ["a"])
+        other = Workspace.objects.create(name="Other", created_by=self.user)
+        response = self.client.patch(
+            reverse("tasks:task-detail", args=[task_id]),
+            {"workspace": str(other.workspace_id)},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.board()["todo"], [])
+
+    def test_long_ranks_schedule_a_rebalance(self):
+        first = self.create("first")
+        Task.objects.filter(task_id=first).update(
+            rank="0" * (ranks.REBALANCE_LENGTH - 1) + "1"
+        )
+        moved = self.create("moved")
+
+        executor = mock.Mock()
+        with mock.patch.object(board, "get_executor", return_value=executor):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.move(moved, before=first)
+        executor.submit.assert_called_once_with(
+            board._run_rebalance, self.workspace.workspace_id, "todo"
+        )
+
+    def test_rebalance_keeps_order_and_shortens_ranks(self):
+        ids = [self.create(name) for name in "abcd"]
+        for task_id in reversed(ids[1:]):
+            for _ in range(30):
+                self.move(task_id, before=ids[0])
+        before = self.board()["todo"]
+        self.assertEqual(board.rebalance_column(self.workspace.workspace_id, "todo"), 4)
+        self.assertEqual(self.board()["todo"], before)
+        self.assertEqual(
+            set(Task.objects.values_list("rank", flat=True)), set(ranks.spread(4))
+        )
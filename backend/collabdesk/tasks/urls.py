@@ -0,0 +1,10 @@
+from django.urls import path
+from .views import TaskBoardView, TaskBulkMoveView, TaskDetailView, TaskMoveView
+
+app_name = "tasks"
+urlpatterns = [
+    path("", TaskBoardView.as_view(), name="task-board"),
+    path("move/", TaskBulkMoveView.as_view(), name="task-bulk-move"),
+    path("<uuid:pk>/", TaskDetailView.as_view(), name="task-detail"),
+    path("<uuid:pk>/move/", TaskMoveView.as_view(), name="task-move"),
+]
@@ -0,0 +1,152 @@
+from rest_framework import generics
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.views import APIView
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import IsAuthenticated
+from django.shortcuts import get_object_or_404
+from .serializers import TaskBulkMoveSerializer, TaskMoveSerializer, TaskSerializer
+from .models import Task
+from . import board
+from collabdesk.cache import cache_response
+from collabdesk.fieldsets import SparseFieldsetViewMixin
+from collabdesk.idempotency import idempotent
+import uuid
+
+
+def task_board_scopes(request, workspace_id):
+    return [board.board_scope(workspace_id)]
+
+
+NOT_A_MEMBER = {"Error": "You are not a member of this workspace"}
+
+
+class TaskBoardView(APIView):
+    """
+    GET ?workspace_id= - the workspace's tasks grouped into status columns,
+    each in rank order, read with one query on the board index. Supports
+    ?fields=.
+    POST - create a task at the end of its column. Honours Idempotency-Key.
+    Both are limited to the workspace's members and owner.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            workspace_id = uuid.UUID(request.query_params.get("workspace_id", ""))
+        except ValueError:
+            return Response(
+                {"Error": "workspace_id must be a UUID"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        # Checked outside the cache, whose entries every member shares
+        if not board.is_member(request.user.id, workspace_id):
+            return Response(NOT_A_MEMBER, status=status.HTTP_403_FORBIDDEN)
+        return self.get_board(request, workspace_id)
+
+    @cache_response("tasks-board", task_board_scopes)
+    def get_board(self, request, workspace_id):
+        queryset = TaskSerializer.optimize_queryset(
+            Task.objects.filter(workspace_id=workspace_id).order_by("status", "rank"),
+            request,
+        )
+        tasks = list(queryset)
+        serializer = TaskSerializer(tasks, many=True, context={"request": request})
+        columns = {value: [] for value in Task.Status.values}
+        for task, data in zip(tasks, serializer.data):
+            columns[task.status].append(data)
+        return Response(columns)
+
+    @idempotent("tasks-create")
+    def post(self, request):
+        serializer = TaskSerializer(data=request.data, context={"request": request})
+        if serializer.is_valid():
+            workspace = serializer.validated_data["workspace"]
+            if not board.is_member(request.user.id, workspace.workspace_id):
+                return Response(NOT_A_MEMBER, status=status.HTTP_403_FORBIDDEN)
+            column = serializer.validated_data.get("status", Task.Status.TODO)
+            serializer.save(
+                created_by=request.user,
+                rank=board.end_rank(workspace.workspace_id, column),
+            )
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class TaskDetailView(SparseFieldsetViewMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Task.objects.all()
+    serializer_class = TaskSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return (
+            super()
+            .get_queryset()
+            .filter(workspace_id__in=board.member_workspaces(self.request.user.id))
+        )
+
+    def perform_update(self, serializer):
+        task = serializer.instance
+        workspace = serializer.validated_data.get("workspace")
+        workspace_id = workspace.workspace_id if workspace else task.workspace_id
+        if workspace and not board.is_member(self.request.user.id, workspace_id):
+            raise PermissionDenied(NOT_A_MEMBER["Error"])
+        column = serializer.validated_data.get("status", task.status)
+        if workspace_id != task.workspace_id or column != task.status:
+            # Changing column through an edit lands at the end of it
+            serializer.save(rank=board.end_rank(workspace_id, column))
+        else:
+            serializer.save()
+
+
+class TaskMoveView(APIView):
+    """
+    POST {"status", "after", "before"} - move a task within or across
+    columns, between the tasks with ids "after" and "before" (either may
+    be omitted; neither appends to the column). Only the moved task's row
+    is updated. Tasks of workspaces the user is not a member of are not found.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pk):
+        task = get_object_or_404(
+            Task.objects.filter(
+                workspace_id__in=board.member_workspaces(request.user.id)
+            ),
+            task_id=pk,
+        )
+        serializer = TaskMoveSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            board.move(task, **serializer.validated_data)
+        except board.InvalidMove as e:
+            return Response({"Error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(TaskSerializer(task, context={"request": request}).data)
+
+
+class TaskBulkMoveView(APIView):
+    """
+    POST {"workspace_id", "task_ids", "status"} - append the tasks to the
+    end of a column in the given order with a single UPDATE. Honours
+    Idempotency-Key, as a retried move would append the tasks again.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @idempotent("tasks-bulk-move")
+    def post(self, request):
+        serializer = TaskBulkMoveSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        workspace_id = serializer.validated_data["workspace_id"]
+        if not board.is_member(request.user.id, workspace_id):
+            return Response(NOT_A_MEMBER, status=status.HTTP_403_FORBIDDEN)
+        try:
+            moved = board.bulk_move(**serializer.validated_data)
+        except board.InvalidMove as e:
+            return Response({"Error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = TaskSerializer(moved, many=True, context={"request": request})
+        return Response(serializer.data)
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("workspaces", "0001_initial_old"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="workspacemember",
+            index=models.Index(
+                fields=["user", "workspace"], name="member_user_workspace_idx"
+            ),
+        ),
+    ]
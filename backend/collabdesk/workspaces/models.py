@@ -41,6 +41,12 @@ class WorkspaceMember(models.Model):
 
     class Meta:
         unique_together = ("workspace", "user")
+        indexes = [
+            # A user's workspace ids straight from the index
+            models.Index(
+                fields=["user", "workspace"], name="member_user_workspace_idx"
+            ),
+        ]
 
 
 class Permission(models.Model):
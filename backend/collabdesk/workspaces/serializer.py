@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from collabdesk.fieldsets import SparseFieldsetMixin
 from .models import Workspace, WorkspaceMember, Role
 
 
@@ -18,7 +19,7 @@ class WorkspaceMemberSerializer(serializers.ModelSerializer):
         fields = ["user_id", "username", "role", "joined_at"]
 
 
-class WorkspaceSerializer(serializers.ModelSerializer):
+class WorkspaceSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     members = WorkspaceMemberSerializer(many=True, read_only=True)
     owner = serializers.SerializerMethodField()
     member_count = serializers.SerializerMethodField()
@@ -34,6 +35,10 @@ class WorkspaceSerializer(serializers.ModelSerializer):
             "members",
             "member_count",
         ]
+        expandable_fields = {
+            "members": {"prefetch_related": ["members__user", "members__role"]},
+            "owner": {"select_related": ["created_by"]},
+        }
 
     def get_owner(self, obj):
         return {
@@ -43,4 +48,7 @@ class WorkspaceSerializer(serializers.ModelSerializer):
         }
 
     def get_member_count(self, obj):
+        # Async views annotate the count because they cannot query lazily
+        if hasattr(obj, "num_members"):
+            return obj.num_members
         return obj.members.count()
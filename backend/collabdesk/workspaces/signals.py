@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from collabdesk import cache
+from .models import Workspace, WorkspaceMember
+
+
+@receiver(post_save, sender=Workspace)
+@receiver(post_delete, sender=Workspace)
+def invalidate_workspace_caches(sender, instance, **kwargs):
+    cache.bump("workspaces", f"workspace:{instance.workspace_id}")
+
+
+@receiver(post_save, sender=WorkspaceMember)
+@receiver(post_delete, sender=WorkspaceMember)
+def invalidate_member_caches(sender, instance, **kwargs):
+    cache.bump(f"workspace:{instance.workspace_id}", f"user:{instance.user_id}")
@@ -1,10 +1,16 @@
+import json
 import uuid
+
+from asgiref.sync import sync_to_async
 from django.urls import reverse
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from django.contrib.auth import get_user_model
 from workspaces.models import Workspace, WorkspaceMember
-from django.test import override_settings
+from django.test import AsyncRequestFactory, override_settings
+from unittest import mock
+from collabdesk.auth import Auth0TokenValidator
+from .views import AsyncWorkspaceInformationView
 
 User = get_user_model()
 
@@ -115,3 +121,107 @@ class WorkspaceListViewTests(APITestCase):
         response = self.client.get(self.url)
         print(response)
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class WorkspaceSparseFieldsetTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="sparseuser", password="testpass")
+        self.client.force_authenticate(user=self.user)
+        self.workspace = Workspace.objects.create(
+            name="Sparse Workspace", created_by=self.user
+        )
+        WorkspaceMember.objects.create(workspace=self.workspace, user=self.user)
+        self.params = {
+            "workspace_id": str(self.workspace.workspace_id),
+            "user_id": str(self.user.id),
+        }
+        self.url = reverse("workspaces:workspace-information")
+
+    def test_members_and_owner_expanded_by_default(self):
+        response = self.client.get(self.url, self.params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["members"]), 1)
+        self.assertEqual(response.data["owner"]["username"], "sparseuser")
+
+    def test_empty_expand_skips_nested_members(self):
+        response = self.client.get(self.url, {**self.params, "expand": ""})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("members", response.data)
+        self.assertNotIn("owner", response.data)
+
+    def test_expanded_members_do_not_query_per_member(self):
+        for i in range(5):
+            other = User.objects.create_user(username=f"member{i}", password="x")
+            WorkspaceMember.objects.create(workspace=self.workspace, user=other)
+
+        # workspace, members, users, membership check (no roles to prefetch)
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url, {**self.params, "expand": "members"})
+        self.assertEqual(len(response.data["members"]), 6)
+        self.assertEqual(response.data["member_count"], 6)
+
+    def test_fields_prunes_workspace_payload(self):
+        response = self.client.get(self.url, {**self.params, "fields": "name"})
+        self.assertEqual(response.data["name"], "Sparse Workspace")
+        self.assertNotIn("description", response.data)
+        self.assertNotIn("members", response.data)
+
+    def test_workspace_list_with_fields(self):
+        url = reverse("workspaces:workspace-name-list")
+        response = self.client.get(url, {"fields": "name,description"})
+        self.assertEqual(set(response.data[0]), {"name", "description"})
+
+
+def stub_validate_token(self, token):
+    return {"sub": token, "email": f"{token}@example.com"}
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+@mock.patch.object(Auth0TokenValidator, "validate_token", stub_validate_token)
+class AsyncWorkspaceInformationViewTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="asyncuser")
+        self.client.force_authenticate(user=self.user)
+        self.workspace = Workspace.objects.create(
+            name="Async Workspace", created_by=self.user
+        )
+        for i in range(3):
+            other = User.objects.create(username=f"async{i}")
+            WorkspaceMember.objects.create(workspace=self.workspace, user=other)
+        self.params = {
+            "workspace_id": str(self.workspace.workspace_id),
+            "user_id": str(self.user.id),
+        }
+        self.url = reverse("workspaces:workspace-information")
+
+    async def get_async(self, params):
+        request = AsyncRequestFactory().get(
+            self.url, params, headers={"Authorization": "Bearer asyncuser"}
+        )
+        response = await AsyncWorkspaceInformationView.as_view()(request)
+        return response.status_code, json.loads(response.content)
+
+    async def test_matches_sync_view(self):
+        await WorkspaceMember.objects.acreate(workspace=self.workspace, user=self.user)
+        for extra in ({}, {"expand": ""}, {"expand": "owner"}, {"fields": "name"}):
+            with self.subTest(extra=extra):
+                params = {**self.params, **extra}
+                expected = await sync_to_async(self.client.get)(self.url, params)
+                self.assertEqual(await self.get_async(params), (200, expected.json()))
+
+    async def test_non_member_gets_no_members(self):
+        status_code, data = await self.get_async(self.params)
+        self.assertEqual(status_code, 200)
+        self.assertFalse(data["is_member"])
+        self.assertNotIn("members", data)
+        self.assertEqual(data["member_count"], 3)
+
+    async def test_errors(self):
+        missing = await self.get_async({"user_id": str(self.user.id)})
+        self.assertEqual(missing[0], status.HTTP_400_BAD_REQUEST)
+        unknown = await self.get_async({**self.params, "workspace_id": uuid.uuid4()})
+        self.assertEqual(
+            unknown, (404, {"detail": "No Workspace matches the given query."})
+        )
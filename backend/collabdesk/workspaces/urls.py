@@ -1,10 +1,19 @@
+from django.conf import settings
 from django.urls import path
-from .views import WorkspaceInformationView, WorkspaceListView
+from .views import (
+    AsyncWorkspaceInformationView,
+    WorkspaceInformationView,
+    WorkspaceListView,
+)
+
+information_view = (
+    AsyncWorkspaceInformationView
+    if settings.ASYNC_READ_VIEWS
+    else WorkspaceInformationView
+)
 
 app_name = "workspaces"
 urlpatterns = [
-    path(
-        "information/", WorkspaceInformationView.as_view(), name="workspace-information"
-    ),
+    path("information/", information_view.as_view(), name="workspace-information"),
     path("list/", WorkspaceListView.as_view(), name="workspace-name-list"),
 ]
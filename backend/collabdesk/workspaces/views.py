@@ -2,15 +2,53 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
-from django.shortcuts import get_object_or_404
+from django.db.models import Count
+from django.shortcuts import aget_object_or_404, get_object_or_404
 from urllib.parse import unquote
 from .models import Workspace, WorkspaceMember
 from .serializer import WorkspaceSerializer
+from collabdesk.fieldsets import FIELDS_PARAM, parse_list_param
+from collabdesk.asyncviews import AsyncAPIView
+from collabdesk.cache import acache_response, cache_response
+import uuid
+
+
+def workspace_information_scopes(request, *args, **kwargs):
+    workspace_id = request.query_params.get("workspace_id")
+    if not workspace_id or not request.query_params.get("user_id"):
+        return None
+    try:
+        return [f"workspace:{uuid.UUID(workspace_id)}"]
+    except ValueError:
+        return None
+
+
+def workspace_list_scopes(request, *args, **kwargs):
+    return ["workspaces"]
+
+
+def workspace_information(workspace, is_member, request, default_expand):
+    serializer = WorkspaceSerializer(
+        workspace,
+        context={"request": request, "default_expand": default_expand},
+    )
+    data = serializer.data
+    data["is_member"] = is_member
+    data["is_public"] = False  # you can extend model later
+
+    # If user not member → strip members & owner info
+    if not is_member:
+        data.pop("members", None)
+        data.pop("owner", None)
+    return data
 
 
 class WorkspaceInformationView(APIView):
     permission_classes = [IsAuthenticated]
+    # Members and owner stay in the default payload; ?expand= narrows it
+    default_expand = ("members", "owner")
 
+    @cache_response("workspace-information", workspace_information_scopes)
     def get(self, request):
         workspace_id = request.query_params.get("workspace_id")
         user_id = request.query_params.get("user_id")
@@ -22,29 +60,63 @@ class WorkspaceInformationView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        workspace = get_object_or_404(Workspace, workspace_id=workspace_id)
+        queryset = WorkspaceSerializer.optimize_queryset(
+            Workspace.objects.all(), request, self.default_expand
+        )
+        workspace = get_object_or_404(queryset, workspace_id=workspace_id)
 
         # Check if user is a member
         is_member = WorkspaceMember.objects.filter(
             workspace=workspace, user_id=user_id
         ).exists()
 
-        serializer = WorkspaceSerializer(workspace)
-        data = serializer.data
-        data["is_member"] = is_member
-        data["is_public"] = False  # you can extend model later
+        data = workspace_information(workspace, is_member, request, self.default_expand)
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class AsyncWorkspaceInformationView(AsyncAPIView):
+    """WorkspaceInformationView on the async ORM"""
+
+    default_expand = WorkspaceInformationView.default_expand
 
-        # If user not member → strip members & owner info
-        if not is_member:
-            data.pop("members", None)
-            data.pop("owner", None)
+    @acache_response("workspace-information", workspace_information_scopes)
+    async def get(self, request):
+        workspace_id = request.query_params.get("workspace_id")
+        user_id = request.query_params.get("user_id")
+
+        if not workspace_id or not user_id:
+            return Response(
+                {"error": "workspace_id and user_id are required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # The count is annotated since the serializer cannot query lazily here
+        queryset = WorkspaceSerializer.optimize_queryset(
+            Workspace.objects.annotate(num_members=Count("members")),
+            request,
+            self.default_expand,
+        )
+        workspace = await aget_object_or_404(queryset, workspace_id=workspace_id)
+        is_member = await WorkspaceMember.objects.filter(
+            workspace=workspace, user_id=user_id
+        ).aexists()
 
+        data = workspace_information(workspace, is_member, request, self.default_expand)
         return Response(data, status=status.HTTP_200_OK)
 
 
 class WorkspaceListView(APIView):
     permission_classes = [IsAuthenticated]
+    default_fields = ("workspace_id", "name")
+    allowed_fields = ("workspace_id", "name", "description", "created_at")
 
+    @cache_response("workspace-list", workspace_list_scopes)
     def get(self, request):
-        workspaces = Workspace.objects.all().values("workspace_id", "name")
+        fields = parse_list_param(request, FIELDS_PARAM)
+        if fields is None:
+            columns = self.default_fields
+        else:
+            columns = [name for name in self.allowed_fields if name in fields]
+            columns = columns or self.default_fields
+        workspaces = Workspace.objects.all().values(*columns)
         return Response(list(workspaces))